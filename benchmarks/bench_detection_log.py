@@ -0,0 +1,87 @@
+"""
+Benchmark: columnar detection log vs per-box Python loops
+---------------------------------------------------------
+Builds a `DetectionLog` from synthetic per-frame detections (a long 25 fps
+video) and times appending, vectorized summaries (class counts, 1 s
+timeline, per-second rates) and NPZ persistence. The baseline is the
+per-box dict loop `run_on_video` and demo_inference used to count classes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_detection_log --frames 250000 --per-frame 12
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.reel_traffic_detection.data.detection_log import DetectionLog
+
+NAMES = {i: f"class_{i}" for i in range(80)}
+
+
+def synthetic_frames(frames, per_frame, fps, seed=0):
+    """Per-frame (index, ms, class_ids, confidences, boxes), sliced from flat arrays."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.poisson(per_frame, frames)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    total = int(offsets[-1])
+    class_ids = rng.choice(8, total, p=[0.5, 0.2, 0.1, 0.08, 0.05, 0.04, 0.02, 0.01]).astype(np.int16)
+    confidences = rng.random(total).astype(np.float32)
+    boxes = (rng.random((total, 4)) * 640).astype(np.float32)
+    return [(i, i * 1000.0 / fps, class_ids[lo:hi], confidences[lo:hi], boxes[lo:hi])
+            for i, (lo, hi) in enumerate(zip(offsets[:-1], offsets[1:]))]
+
+
+def python_counts(records):
+    counts = {}
+    for _, _, class_ids, _, _ in records:
+        for cls_id in class_ids:
+            name = NAMES[int(cls_id)]
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(args):
+    records = synthetic_frames(args.frames, args.per_frame, args.fps)
+    log, append_s = timed(lambda: DetectionLog.from_stream(records, NAMES))
+    print(f"📦 {log.n_frames:,} frames ({log.duration_s() / 3600:.1f} h at {args.fps:g} fps), "
+          f"{len(log):,} detections")
+    print(f"   append            {append_s:8.3f}s ({append_s / log.n_frames * 1e6:.1f} µs/frame)")
+
+    counts, counts_s = timed(log.class_counts)
+    baseline, baseline_s = timed(lambda: python_counts(records))
+    assert counts == baseline
+    _, timeline_s = timed(lambda: log.timeline(1.0))
+    _, rates_s = timed(lambda: log.rates(1.0, min_confidence=0.5))
+    print(f"   class_counts      {counts_s * 1e3:8.1f} ms (per-box loop {baseline_s:.2f}s, "
+          f"{baseline_s / counts_s:,.0f}x)")
+    print(f"   timeline(1 s)     {timeline_s * 1e3:8.1f} ms")
+    print(f"   rates(conf>=0.5)  {rates_s * 1e3:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "detections.npz")
+        _, save_s = timed(lambda: log.save(path))
+        size = os.path.getsize(path)
+        loaded, load_s = timed(lambda: DetectionLog.load(path))
+    assert loaded.class_counts() == counts
+    print(f"   save/load .npz    {save_s * 1e3:8.1f} / {load_s * 1e3:.1f} ms, "
+          f"{size / 2**20:.1f} MiB ({size / len(log):.0f} B/detection)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=250_000)
+    parser.add_argument("--per-frame", type=float, default=12.0,
+                        help="Mean detections per frame")
+    parser.add_argument("--fps", type=float, default=25.0)
+    args = parser.parse_args()
+    main(args)
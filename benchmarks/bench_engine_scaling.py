@@ -0,0 +1,71 @@
+"""
+Benchmark: shared inference engine, predictions/sec vs thread count
+-------------------------------------------------------------------
+Drives one `InferenceEngine` (one shared model) with 1, 2, 4, ... threads
+and reports predictions per second and the speedup over one thread, for
+single-sample calls (`predict_sample`) and for batches of several sizes
+(`predict_batch`). Speedup above 1x comes only from code that releases the
+GIL: sklearn's Cython tree traversal, and NumPy kernels once the arrays
+are large enough to outweigh the per-call Python overhead, which stays
+serialized. Compare `--backend sklearn` with `--backend compiled`.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_engine_scaling --threads 1 2 4 8 --batches 1 64 1024
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from src.reel_traffic_detection.models.inference_engine import InferenceEngine
+from src.reel_traffic_detection.models.onnx_export import sample_inputs
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+
+def rate(engine, X, batch, seconds):
+    """Predictions/sec over roughly `seconds` of work."""
+    if batch == 1:
+        run = lambda: list(engine.map(X))                      # noqa: E731
+    else:
+        engine.chunk_size = batch
+        run = lambda: engine.predict_many(X)                   # noqa: E731
+    run()                                                       # warm up every thread
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        run()
+        done += len(X)
+    return done / (time.perf_counter() - start)
+
+
+def main(args):
+    warnings.filterwarnings("ignore")
+    inference = RealTimeInferenceML(args.model, args.scaler, backend=args.backend)
+    X = sample_inputs(inference.preprocessor, args.rows)
+
+    print(f"🧵 {args.backend} backend, {args.rows:,} rows per pass, {args.seconds}s per cell")
+    print(f"{'threads':>8}" + "".join(f"{f'batch {b}':>22}" for b in args.batches))
+    baseline = {}
+    for threads in args.threads:
+        cells = []
+        with InferenceEngine(inference, threads=threads) as engine:
+            for batch in args.batches:
+                per_sec = rate(engine, X, batch, args.seconds)
+                baseline.setdefault(batch, per_sec)
+                cells.append(f"{per_sec:>13,.0f}/s {per_sec / baseline[batch]:>5.2f}x")
+        print(f"{threads:>8}" + "".join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--backend", default="compiled", choices=("sklearn", "compiled"))
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 64, 1024],
+                        help="Rows per call (1 = predict_sample)")
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,82 @@
+"""
+Benchmark: adaptive frame skipping vs full processing
+-----------------------------------------------------
+Streams a clip through `RealTimeInferenceYOLO.stream_video` once on every
+frame and once per scene-change threshold with a `SceneChangeGate`, and
+reports frames skipped, fps and the speedup, plus how far the
+carried-forward detections drift from full processing: total detection
+count deviation, per-class worst deviation, and the mean absolute
+per-frame count difference.
+
+The deviation columns need real detections, i.e. pretrained weights.
+Without network access they cannot be downloaded; `--weights yolov8n.yaml`
+(random weights, same per-frame cost) still measures skip rate and fps,
+but its untrained head detects nothing, so the deviations read 0.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_frame_skipping --video data/MGR.mp4 --weights yolov8n.pt \\
+        --thresholds 0.02 0.05 --max-stride 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.reel_traffic_detection.data.detection_log import DetectionLog
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceYOLO
+from src.reel_traffic_detection.models.scene_change import SceneChangeGate
+
+
+def streamed(rti, video, gate=None):
+    start = time.perf_counter()
+    log = DetectionLog.from_stream(rti.stream_video(video, gate=gate), rti.model.names)
+    return log, time.perf_counter() - start
+
+
+def per_frame_counts(log):
+    return np.bincount(log.column("frame_index"), minlength=log.n_frames)
+
+
+def deviation(full, gated) -> dict:
+    full_counts, gated_counts = full.class_counts(), gated.class_counts()
+    total = sum(full_counts.values())
+    worst = max((abs(gated_counts.get(c, 0) - n) / n for c, n in full_counts.items()),
+                default=0.0)
+    return {"total": (len(gated) - total) / total if total else 0.0,
+            "worst_class": worst,
+            "per_frame_mae": float(np.mean(np.abs(per_frame_counts(gated)
+                                                  - per_frame_counts(full))))}
+
+
+def main(args):
+    rti = RealTimeInferenceYOLO(args.weights)
+    rti.model.overrides.update(verbose=False, conf=args.conf)
+    next(iter(rti.stream_video(args.video)))                   # warm up the model
+
+    full, full_s = streamed(rti, args.video)
+    full_fps = full.n_frames / full_s
+    print(f"🎞️ {args.video}, {args.weights}, conf={args.conf}, max_stride={args.max_stride}: "
+          f"{full.n_frames} frames, {len(full):,} detections")
+    print(f"   {'threshold':>9} {'skipped':>8} {'fps':>7} {'speedup':>8} "
+          f"{'Δ total':>8} {'Δ class':>8} {'|Δ|/frame':>10}")
+    print(f"   {'all':>9} {0:>8.1%} {full_fps:>7.1f} {1:>7.2f}x {0:>8.1%} {0:>8.1%} {0:>10.2f}")
+    for threshold in args.thresholds:
+        gate = SceneChangeGate(threshold=threshold, max_stride=args.max_stride)
+        gated, gated_s = streamed(rti, args.video, gate)
+        fps = gated.n_frames / gated_s
+        d = deviation(full, gated)
+        print(f"   {threshold:>9g} {gate.stats()['skip_rate']:>8.1%} {fps:>7.1f} "
+              f"{fps / full_fps:>7.2f}x {d['total']:>+8.1%} {d['worst_class']:>8.1%} "
+              f"{d['per_frame_mae']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", default="data/MGR.mp4")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--conf", type=float, default=0.25, help="Detector confidence floor")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.02, 0.05])
+    parser.add_argument("--max-stride", type=int, default=10)
+    args = parser.parse_args()
+    main(args)
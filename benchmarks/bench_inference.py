@@ -0,0 +1,108 @@
+"""
+Benchmark: batch vs per-row ML inference
+----------------------------------------
+Scores N synthetic feature windows with the trained model through
+`RealTimeInferenceML.predict_batch` and compares with the per-row
+`predict` loop (timed on a sample and extrapolated). The single-sample
+section compares the DataFrame `predict` path with the pandas-free
+`predict_sample` path, timing the overhead each adds around the model
+call, and the sklearn model call with its compiled counterpart.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inference --rows 1000000
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.reel_traffic_detection.models.compiled_forest import compile_model
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+
+def synthetic_windows(names, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(np.abs(rng.normal(1.0, 0.5, size=(rows, len(names)))), columns=names)
+
+
+def median_us(fn, samples, repeat):
+    times = []
+    for i in range(repeat):
+        sample = samples[i % len(samples)]
+        start = time.perf_counter()
+        fn(sample)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e6
+
+
+class _ConstantModel:
+    """Model stand-in so the single-sample numbers show only path overhead."""
+
+    _probs = np.array([[0.25, 0.75]])
+
+    def predict_proba(self, X):
+        return self._probs
+
+
+def bench_single(inference, frame, repeat):
+    rows = [frame.iloc[[i]] for i in range(min(len(frame), 64))]
+    dicts = [row.iloc[0].to_dict() for row in rows]
+    vectors = [row.to_numpy(dtype=np.float32)[0] for row in rows]
+    scaled = [inference.preprocessor.transform(row) for row in rows]
+
+    model = inference.model
+    if hasattr(model, "n_jobs"):
+        # One row never benefits from the thread pool
+        model.n_jobs = 1
+    model_us = median_us(model.predict_proba, scaled, repeat)
+    compiled_us = median_us(compile_model(model).predict_proba, scaled, repeat)
+    inference.model = _ConstantModel()
+    print(f"🔬 single sample, median of {repeat}")
+    print(f"   model call: sklearn {model_us:,.1f} µs, compiled {compiled_us:,.1f} µs")
+    for label, fn, samples in (("predict(DataFrame)", inference.predict, rows),
+                               ("predict_sample(dict)", inference.predict_sample, dicts),
+                               ("predict_sample(float32)", inference.predict_sample, vectors)):
+        print(f"   {label:<24} {median_us(fn, samples, repeat):8,.1f} µs overhead")
+    inference.model = model
+
+
+def main(args):
+    warnings.filterwarnings("ignore")
+    inference = RealTimeInferenceML(args.model, args.scaler)
+    frame = synthetic_windows(list(inference.preprocessor.feature_names_in_), args.rows)
+
+    start = time.perf_counter()
+    labels, _ = inference.predict_batch(frame, chunk_size=args.chunk)
+    batch_s = time.perf_counter() - start
+
+    sample = min(args.sample, len(frame))
+    start = time.perf_counter()
+    for i in range(sample):
+        inference.predict(frame.iloc[[i]])
+    per_row_s = (time.perf_counter() - start) / max(sample, 1)
+
+    print(f"📦 {len(frame):,} windows, {frame.shape[1]} features, "
+          f"{labels.mean():.1%} labelled video")
+    print(f"⚡ predict_batch: {batch_s:.2f}s ({len(frame) / batch_s:,.0f} windows/s)")
+    print(f"🐢 per-row predict: {per_row_s * 1e3:.2f} ms/window "
+          f"(~{per_row_s * len(frame):,.0f}s extrapolated, "
+          f"{per_row_s * len(frame) / batch_s:,.0f}x slower)")
+    bench_single(inference, frame, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=100_000,
+                        help="Rows per model call")
+    parser.add_argument("--sample", type=int, default=200,
+                        help="Rows timed through the per-row loop")
+    parser.add_argument("--repeat", type=int, default=500,
+                        help="Calls timed per single-sample path")
+    args = parser.parse_args()
+    main(args)
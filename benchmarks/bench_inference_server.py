@@ -0,0 +1,127 @@
+"""
+Load generator: micro-batching inference server
+-----------------------------------------------
+Starts the inference server in a subprocess (or targets a running one
+with --connect) and drives it open-loop at increasing request rates over
+several connections. Every rate step reports achieved throughput, p50/p99
+client-side latency and the share of requests shed as overloaded.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inference_server --rates 500 1000 2000 5000 --seconds 3
+    python -m benchmarks.bench_inference_server --connect 127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+async def _reader(reader, sent, latencies, counts):
+    while line := await reader.readline():
+        reply = json.loads(line)
+        received = time.perf_counter()
+        start = sent.pop(reply["id"])
+        if "error" in reply:
+            counts["shed" if reply["error"] == "overloaded" else "errors"] += 1
+        else:
+            latencies.append((received - start) * 1e3)
+
+
+async def run_step(host, port, rate, seconds, connections, features):
+    streams = [await asyncio.open_connection(host, port) for _ in range(connections)]
+    sent, latencies, counts = {}, [], {"shed": 0, "errors": 0}
+    readers = [asyncio.create_task(_reader(r, sent, latencies, counts)) for r, _ in streams]
+
+    total = int(rate * seconds)
+    start = time.perf_counter()
+    issued = 0
+    while issued < total:
+        # Open loop: issue every request that is due by now, then yield
+        due = min(total, int((time.perf_counter() - start) * rate) + 1)
+        while issued < due:
+            _, writer = streams[issued % connections]
+            sent[issued] = time.perf_counter()
+            writer.write(json.dumps({"id": issued, "features": features}).encode() + b"\n")
+            issued += 1
+        await asyncio.sleep(0.0005)
+    for _, writer in streams:
+        await writer.drain()
+        writer.write_eof()
+    await asyncio.gather(*readers)
+    elapsed = time.perf_counter() - start
+    for _, writer in streams:
+        writer.close()
+
+    served = len(latencies)
+    return {
+        "target_rps": rate,
+        "achieved_rps": served / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if served else float("nan"),
+        "p99_ms": float(np.percentile(latencies, 99)) if served else float("nan"),
+        "shed": counts["shed"] / total,
+        "errors": counts["errors"],
+    }
+
+
+def start_server(args):
+    cmd = [sys.executable, "-m", "src.reel_traffic_detection.app.inference_server",
+           "--port", str(args.port), "--backend", args.backend,
+           "--max-batch", str(args.max_batch), "--max-wait-ms", str(args.max_wait_ms),
+           "--max-queue", str(args.max_queue)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                            env={**os.environ, "PYTHONPATH": os.getcwd()})
+    line = proc.stdout.readline()
+    if not line.startswith("Serving"):
+        proc.kill()
+        raise RuntimeError("inference server did not start")
+    return proc
+
+
+def feature_names(args):
+    import joblib
+
+    return list(joblib.load(args.scaler).feature_names_in_)
+
+
+async def main(args):
+    features = {name: 1.0 for name in feature_names(args)}
+    host, port = "127.0.0.1", args.port
+    proc = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        port = int(port)
+    else:
+        proc = start_server(args)
+    try:
+        print(f"{'target':>8} {'achieved':>10} {'p50 ms':>8} {'p99 ms':>8} {'shed':>7}")
+        for rate in args.rates:
+            r = await run_step(host, port, rate, args.seconds, args.connections, features)
+            print(f"{r['target_rps']:>8,} {r['achieved_rps']:>10,.0f} {r['p50_ms']:>8.2f} "
+                  f"{r['p99_ms']:>8.2f} {r['shed']:>7.1%}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rates", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--connect", default=None, help="host:port of a running server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scaler", default="models/scaler.pkl",
+                        help="Source of the feature names sent in requests")
+    parser.add_argument("--backend", default="compiled", choices=("sklearn", "compiled", "onnx"))
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,130 @@
+"""
+Benchmark: model loading, pickles vs bundle
+-------------------------------------------
+Times loading the model + preprocessor from separate joblib pickles
+against a model bundle (with and without checksum verification, compiled
+and sklearn backends), and measures the private memory each of several
+worker process allocates on its heap while loading: bundle arrays are memory-mapped and
+shared, pickled models are copied into every worker.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_model_load
+    python -m benchmarks.bench_model_load --synthetic-trees 300 --workers 4
+"""
+
+import argparse
+import gc
+import multiprocessing as mp
+import os
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.reel_traffic_detection.models.bundle import save_bundle
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+
+def private_kb() -> int:
+    """
+    Proportional anonymous memory of this process (heap, including
+    copy-on-write copies of the parent's pages), Linux only. Pages of a
+    file mapping live in the shared page cache and are not counted,
+    however many workers map them.
+    """
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss_Anon:"):
+                return int(line.split()[1])
+    return 0
+
+
+def synthetic_model(trees, rows=20_000, features=7, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, features)),
+                     columns=[f"f{i}" for i in range(features)])
+    y = (X["f0"] * X["f1"] + rng.normal(scale=0.5, size=rows) > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    return RandomForestClassifier(trees, random_state=0, n_jobs=-1).fit(scaler.transform(X), y), scaler
+
+
+def load_pickles(model_path, scaler_path):
+    return RealTimeInferenceML(model_path, scaler_path)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rti = fn()
+        rti.predict_sample(np.zeros(len(rti.feature_names)))
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def _worker(loader, queue):
+    before = private_kb()
+    rti = loader()
+    rti.predict_sample(np.zeros(len(rti.feature_names)))
+    queue.put(private_kb() - before)
+
+
+def worker_memory(loader, workers):
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    gc.collect()
+    gc.freeze()      # keep the collector from copy-on-writing the parent's objects
+    procs = [ctx.Process(target=_worker, args=(loader, queue)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    grown = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    gc.unfreeze()
+    return float(np.mean(grown))
+
+
+def main(args):
+    warnings.filterwarnings("ignore")
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path, scaler_path = args.model, args.scaler
+        if args.synthetic_trees:
+            model, scaler = synthetic_model(args.synthetic_trees)
+            model_path, scaler_path = os.path.join(tmp, "model.pkl"), os.path.join(tmp, "scaler.pkl")
+            joblib.dump(model, model_path)
+            joblib.dump(scaler, scaler_path)
+        bundle_path = os.path.join(tmp, "model.rtdb")
+        save_bundle(bundle_path, joblib.load(model_path), joblib.load(scaler_path))
+        print(f"📦 pickles {os.path.getsize(model_path) / 2**20:.1f} MiB, "
+              f"bundle {os.path.getsize(bundle_path) / 2**20:.1f} MiB")
+
+        loaders = {
+            "joblib pickles (sklearn)": lambda: load_pickles(model_path, scaler_path),
+            "bundle, sklearn": lambda: RealTimeInferenceML.from_bundle(bundle_path, "sklearn"),
+            "bundle, compiled": lambda: RealTimeInferenceML.from_bundle(bundle_path),
+            "bundle, compiled, no verify": lambda: RealTimeInferenceML.from_bundle(
+                bundle_path, verify=False),
+        }
+        print(f"⏱️ load + first prediction (best of {args.repeat}), "
+              f"private memory per worker ({args.workers} forked workers):")
+        for label, loader in loaders.items():
+            ms = timed(loader, args.repeat)
+            kb = worker_memory(loader, args.workers)
+            print(f"   {label:<28} {ms:9.1f} ms  {kb / 1024:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--synthetic-trees", type=int, default=0,
+                        help="Benchmark a freshly trained deep forest of this size instead")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,80 @@
+"""
+Benchmark: quantized LRU prediction cache on replayed traffic
+-------------------------------------------------------------
+Replays a stream of feature windows from a set of steady flows: every
+flow keeps a base feature vector and each of its windows repeats it with
+small relative jitter, while flows start and end over time. The stream is
+scored window by window with `predict_sample`, with and without the
+prediction cache, reporting hit rate, evictions, mean per-window latency
+and label agreement with the uncached model.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_prediction_cache --windows 20000 --flows 200 --jitter 1e-4
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+
+def replayed_windows(scaler, windows, flows, jitter, seed=0):
+    """(windows, n_features) raw rows from `flows` concurrent steady flows."""
+    rng = np.random.default_rng(seed)
+    mean, scale = scaler.mean_, scaler.scale_
+    bases = rng.normal(size=(flows, len(mean))) * scale + mean
+    rows = np.empty((windows, len(mean)))
+    for i in range(windows):
+        flow = rng.integers(flows)
+        if rng.random() < 0.01:          # a flow ends and a new one takes its slot
+            bases[flow] = rng.normal(size=len(mean)) * scale + mean
+        rows[i] = bases[flow] * (1 + jitter * rng.normal(size=len(mean)))
+    return rows
+
+
+def replay(inference, rows):
+    labels = np.empty(len(rows), dtype=np.int64)
+    start = time.perf_counter()
+    for i, row in enumerate(rows):
+        labels[i] = inference.predict_sample(row)[0]
+    return labels, (time.perf_counter() - start) / len(rows)
+
+
+def main(args):
+    warnings.filterwarnings("ignore")
+    inference = RealTimeInferenceML(args.model, args.scaler, backend=args.backend)
+    if hasattr(inference.model, "n_jobs"):
+        inference.model.n_jobs = 1       # one row never benefits from the thread pool
+    scaler = getattr(inference.preprocessor, "scaler", inference.preprocessor)
+    rows = replayed_windows(scaler, args.windows, args.flows, args.jitter)
+
+    expected, uncached_s = replay(inference, rows)
+    print(f"📦 {len(rows):,} windows from {args.flows} flows, jitter {args.jitter:g}, "
+          f"{args.backend} backend")
+    print(f"🐢 no cache:        {uncached_s * 1e6:9,.1f} µs/window")
+    for step in args.steps:
+        cache = inference.enable_cache(args.entries, step=step)
+        labels, cached_s = replay(inference, rows)
+        stats = cache.stats()
+        print(f"⚡ step {step:<8g} {cached_s * 1e6:9,.1f} µs/window "
+              f"({uncached_s / cached_s:4.1f}x), hit rate {stats['hit_rate']:6.1%}, "
+              f"{stats['evictions']:,} evictions, "
+              f"agreement {np.mean(labels == expected):.4%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--backend", default="sklearn", choices=("sklearn", "compiled"))
+    parser.add_argument("--windows", type=int, default=20_000)
+    parser.add_argument("--flows", type=int, default=200)
+    parser.add_argument("--jitter", type=float, default=1e-4,
+                        help="Relative per-window noise around each flow's features")
+    parser.add_argument("--entries", type=int, default=4096)
+    parser.add_argument("--steps", type=float, nargs="+", default=[1e-3, 1e-2])
+    args = parser.parse_args()
+    main(args)
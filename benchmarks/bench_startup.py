@@ -0,0 +1,79 @@
+"""
+Benchmark: ML inference cold start
+----------------------------------
+Measures, in a fresh interpreter, the time from `import` of the inference
+module through model loading to the first prediction, and checks that
+the video stack (torch, ultralytics, OpenCV) is never imported on the
+ML-only path. Exits non-zero when a guard fails, so it can run in CI.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --backend sklearn --budget-ms 3000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+VIDEO_MODULES = ("torch", "ultralytics", "cv2")
+
+PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+t1 = time.perf_counter()
+rti = RealTimeInferenceML({model!r}, {scaler!r}, backend={backend!r})
+t2 = time.perf_counter()
+rti.predict_sample([0.0] * len(rti.feature_names))
+t3 = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1e3,
+    "load_ms": (t2 - t1) * 1e3,
+    "first_prediction_ms": (t3 - t2) * 1e3,
+    "total_ms": (t3 - t0) * 1e3,
+    "video_modules": [m for m in {video!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(model, scaler, backend, root="."):
+    """Run the cold-start probe in a fresh interpreter and return its timings."""
+    code = PROBE.format(model=model, scaler=scaler, backend=backend, video=VIDEO_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                         capture_output=True, text=True, env={**os.environ, "PYTHONPATH": root})
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(args):
+    runs = [measure(args.model, args.scaler, args.backend) for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["total_ms"])
+    print(f"🚀 cold start ({args.backend}, best of {args.runs}): import {best['import_ms']:.0f} ms, "
+          f"load {best['load_ms']:.0f} ms, first prediction {best['first_prediction_ms']:.1f} ms "
+          f"-> {best['total_ms']:.0f} ms")
+
+    failed = False
+    leaked = sorted({m for r in runs for m in r["video_modules"]})
+    if leaked:
+        print(f"❌ video stack imported on the ML path: {', '.join(leaked)}")
+        failed = True
+    if args.budget_ms and best["total_ms"] > args.budget_ms:
+        print(f"❌ over the {args.budget_ms:.0f} ms startup budget")
+        failed = True
+    if not failed:
+        print("✅ no video modules imported" + (f", within {args.budget_ms:.0f} ms"
+                                                  if args.budget_ms else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--backend", default="sklearn", choices=("sklearn", "compiled"))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail when import + load + first prediction exceeds this")
+    args = parser.parse_args()
+    main(args)
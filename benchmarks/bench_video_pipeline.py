@@ -0,0 +1,91 @@
+"""
+Benchmark: pipelined vs serial YOLO video loop
+----------------------------------------------
+Runs `RealTimeInferenceYOLO.run_on_video` over a local clip with the
+serial loop (`pipelined=False`) and with the decode / infer /
+annotate-encode pipeline at each batch size, and reports frames per
+second for each. The annotated video is encoded in every run (into a
+temporary directory) and nothing is displayed. `--frames` trims the clip
+to its first N frames for quicker runs.
+
+Without network access the pretrained weights cannot be downloaded; pass
+`--weights yolov8n.yaml` to build the same network with random weights,
+which costs the same per frame.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_video_pipeline --video data/MGR.mp4 --weights yolov8n.pt \
+        --batch-sizes 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceYOLO
+
+
+def timed_run(rti, video, pipelined, queue_size, batch_size=1):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = rti.run_on_video(video, save_output=True, display=False, pipelined=pipelined,
+                                   queue_size=queue_size, batch_size=batch_size)
+    return len(results), time.perf_counter() - start
+
+
+def trimmed(video, frames, directory):
+    """The first `frames` frames of `video`, copied to an MJPG clip."""
+    import cv2
+
+    cap = cv2.VideoCapture(video)
+    path = os.path.join(directory, "clip.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), cap.get(cv2.CAP_PROP_FPS),
+                          (int(cap.get(3)), int(cap.get(4))))
+    for _ in range(frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        out.write(frame)
+    cap.release()
+    out.release()
+    return path
+
+
+def main(args):
+    video = os.path.abspath(args.video)
+    rti = RealTimeInferenceYOLO(args.weights)
+    rti.model.overrides["verbose"] = False
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)                      # run_on_video writes output_detected.mp4 here
+        try:
+            if args.frames:
+                video = trimmed(video, args.frames, tmp)
+            rti.run_on_video(video, display=False, pipelined=False)    # warm up the model
+            rows = [("serial", *timed_run(rti, video, False, args.queue_size))]
+            for batch_size in args.batch_sizes:
+                rows.append((f"pipelined, batch {batch_size}",
+                             *timed_run(rti, video, True, args.queue_size, batch_size)))
+        finally:
+            os.chdir(cwd)
+
+    print(f"🎞️ {args.video}, {args.weights}, queue_size={args.queue_size}")
+    serial_fps = rows[0][1] / rows[0][2]
+    for label, frames, seconds in rows:
+        fps = frames / seconds
+        print(f"   {label:<20} {frames:5d} frames in {seconds:6.1f}s = {fps:6.1f} fps "
+              f"({fps / serial_fps:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", default="data/MGR.mp4")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--frames", type=int, default=None,
+                        help="Only use the first N frames of the clip")
+    args = parser.parse_args()
+    main(args)
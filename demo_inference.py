@@ -18,21 +18,15 @@ Supports:
 
 import argparse
 import pandas as pd
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
+# YOLO (ultralytics/torch, OpenCV) is only imported when --mode yolo runs
+from src.reel_traffic_detection.data.detection_log import DetectionLog
 from src.reel_traffic_detection.models.realtime_inference import (
     RealTimeInferenceML,
     RealTimeInferenceYOLO,
 )
-import argparse
-import pandas as pd
-import joblib
-import torch
-import argparse
-import pandas as pd
-import joblib
-import torch
 
-# 🔑 Make sure the class name matches the one in your realtime_inference.py
-from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
 
 def run_ml_inference(data_path):
     print("\n🚀 Running ML Inference...")
@@ -53,8 +47,6 @@ def run_ml_inference(data_path):
 
     print(f"✅ Prediction: {'Reel/Video' if pred==1 else 'Non-Reel'} (conf={conf:.2f})")
 
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-
 def evaluate_ml_inference(data_path):
     print("\n📊 Running ML Evaluation...")
 
@@ -73,13 +65,8 @@ def evaluate_ml_inference(data_path):
     rti_ml = RealTimeInferenceML(model_path="models/trained_model.pkl",
                                  scaler_path="models/scaler.pkl")
 
-    preds = []
-    confs = []
-
-    for _, row in X.iterrows():
-        pred, conf = rti_ml.predict(pd.DataFrame([row]))
-        preds.append(pred)
-        confs.append(conf)
+    # One vectorized call over the whole dataset
+    preds, confs = rti_ml.predict_batch(X, chunk_size=100_000)
 
     # Compute metrics
     acc = accuracy_score(y_true, preds)
@@ -104,20 +91,18 @@ def run_yolo_inference(video_path):
     print("\n🚀 Running YOLO Inference...")
 
     rti_yolo = RealTimeInferenceYOLO("yolov8n.pt")
-    results = rti_yolo.run_on_video(video_path, save_output=True)
-
-    # Count objects across all frames
-    obj_counts = {}
-    for res in results:
-        for cls_id in res.boxes.cls.cpu().numpy():
-            cls_name = rti_yolo.model.names[int(cls_id)]
-            obj_counts[cls_name] = obj_counts.get(cls_name, 0) + 1
+    # Stream compact per-frame records into a columnar log; counts are vectorized
+    log = DetectionLog.from_stream(
+        rti_yolo.stream_video(video_path, output_path="output_detected.mp4"),
+        rti_yolo.model.names)
+    obj_counts = log.class_counts()
+    log.save("detections.npz")
 
     # Print summary
     print("🚦 YOLO Traffic Detection Complete")
     for cls, count in obj_counts.items():
         print(f"   {cls}: {count}")
-    print("📂 Output saved to output_detected.mp4")
+    print("📂 Output saved to output_detected.mp4, detections to detections.npz")
 
 
 
@@ -16,6 +16,9 @@ setup(
         "numpy",
         "joblib"
     ],
+    extras_require={
+        "onnx": ["skl2onnx>=1.16.0", "onnxruntime>=1.17.0"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -1,20 +1,66 @@
-import joblib
-import pandas as pd
+"""
+Demo Service
+------------
+Classifies the traffic of a pcap byte stream per flow and per 250 ms hop.
+The capture can be a recorded file, a named pipe or stdin, so it works
+both offline and on a live capture.
+
+Usage:
+    python -m src.reel_traffic_detection.app.demo_service --pcap data/sample.pcap
+    cat data/sample.pcap | python -m src.reel_traffic_detection.app.demo_service --pcap -
+    tcpdump -i eth0 -w - | python -m src.reel_traffic_detection.app.demo_service --pcap - --json
+"""
+
 import argparse
+import json
+import sys
 
-# Load trained model
-clf = joblib.load("video_classifier.pkl")
+from src.reel_traffic_detection.app.stream_classifier import StreamClassifier
+from src.reel_traffic_detection.data.pcap_parser import UnsupportedCaptureError
+from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
 
-def run_demo(pcap_file):
-    # Placeholder: Convert pcap -> features
-    print(f"Processing {pcap_file}...")
-    df = pd.read_csv("demo_features.csv")  # Replace with real extractor
-    preds = clf.predict(df)
-    for i, p in enumerate(preds):
-        print(f"Window {i}: {'VIDEO' if p==1 else 'NON-VIDEO'}")
 
-if __name__ == "__main__":
+def run_demo(pcap_file, model_path="models/trained_model.pkl",
+             scaler_path="models/scaler.pkl", as_json=False, bundle_path=None):
+    if bundle_path:
+        inference = RealTimeInferenceML.from_bundle(bundle_path)
+    else:
+        inference = RealTimeInferenceML(model_path=model_path, scaler_path=scaler_path)
+    classifier = StreamClassifier(inference)
+    source = sys.stdin.buffer if pcap_file == "-" else pcap_file
+    print(f"Processing {'stdin' if pcap_file == '-' else pcap_file}...", file=sys.stderr)
+
+    for label in classifier.run(source):
+        if as_json:
+            print(json.dumps(label), flush=True)
+        else:
+            print(f"[{label['window_end']:10.2f}s] flow {label['flow']:>5} "
+                  f"{label['client']}:{label['client_port']} -> "
+                  f"{label['server']}:{label['server_port']} "
+                  f"{label['label']:<9} conf={label['confidence']:.2f} "
+                  f"latency={label['latency_ms']:.1f}ms", flush=True)
+
+    stats = classifier.last_run_stats
+    print(f"Classified {stats['packets']} packets at {stats['packets_per_sec']:,.0f} pkts/s",
+          file=sys.stderr)
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
-    parser.add_argument("--pcap", type=str, required=True, help="PCAP file to analyze")
-    args = parser.parse_args()
-    run_demo(args.pcap)
+    parser.add_argument("--pcap", type=str, required=True,
+                        help="PCAP file, named pipe, or - for stdin")
+    parser.add_argument("--model", type=str, default="models/trained_model.pkl")
+    parser.add_argument("--scaler", type=str, default="models/scaler.pkl")
+    parser.add_argument("--bundle", type=str, default=None,
+                        help="Model bundle (models/model.rtdb); replaces --model/--scaler")
+    parser.add_argument("--json", action="store_true", help="Emit one JSON object per label")
+    args = parser.parse_args(argv)
+    try:
+        run_demo(args.pcap, args.model, args.scaler, args.json, args.bundle)
+    except UnsupportedCaptureError as exc:
+        sys.exit(f"error: {exc}: the streaming path reads classic pcap only (pcapng is not "
+                 "supported; convert with editcap -F pcap in.pcapng out.pcap)")
+
+
+if __name__ == "__main__":
+    main()
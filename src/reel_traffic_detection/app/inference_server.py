@@ -0,0 +1,267 @@
+"""
+Micro-batching Inference Server
+-------------------------------
+An asyncio service in front of `RealTimeInferenceML`. Clients send one
+feature window per request; concurrent requests are coalesced into
+micro-batches that are scored with a single `predict_batch` call. A batch
+is flushed as soon as it holds `max_batch` requests or its oldest request
+has waited `max_wait_ms`. Model calls run in a thread pool, so the event
+loop keeps accepting requests while a batch is scored.
+
+The request queue is bounded: when `max_queue` requests are already
+waiting, new ones are shed immediately (`ServerOverloaded`, or an
+"overloaded" error reply) instead of queueing without limit and letting
+every request's latency grow.
+
+Wire protocol (TCP, one JSON object per line, replies may be reordered):
+
+    -> {"id": 7, "features": {"avg_packet_size": 512.0, ...}}
+    <- {"id": 7, "prediction": 1, "label": "VIDEO", "confidence": 0.93, "latency_ms": 1.8}
+    <- {"id": 8, "error": "overloaded"}
+
+Usage:
+    python -m src.reel_traffic_detection.app.inference_server --bundle models/model.rtdb --port 8765
+
+    async with MicroBatcher(RealTimeInferenceML.from_bundle("models/model.rtdb")) as batcher:
+        label, confidence = await batcher.predict({"avg_packet_size": 512.0, ...})
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.reel_traffic_detection.app.stream_classifier import LABEL_NAMES
+from src.reel_traffic_detection.utils.latency import LatencyStats
+
+
+class ServerOverloaded(RuntimeError):
+    """Raised when the request queue is full and a request is shed."""
+
+
+class MicroBatcher:
+    def __init__(self, inference, max_batch: int = 64, max_wait_ms: float = 2.0,
+                 max_queue: int = 1024, workers: int = 1):
+        """
+        Initialize the batching front end.
+
+        Args:
+            inference: A `RealTimeInferenceML` (anything with
+                `predict_batch(X) -> (labels, confidences)` and
+                `feature_names`).
+            max_batch: Largest number of requests scored together.
+            max_wait_ms: Longest a request waits for its batch to fill.
+            max_queue: Waiting requests beyond which new ones are shed.
+            workers: Threads running model calls (batches in flight).
+        """
+        self.inference = inference
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1e3
+        self.max_queue = max_queue
+        self.workers = workers
+        self.stats = {"requests": 0, "shed": 0, "batches": 0, "batched_requests": 0}
+        # queue: enqueue -> batch start, batch: model call, request: end to end
+        self.latency = LatencyStats(("queue", "batch", "request"))
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="inference")
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        return self
+
+    async def stop(self):
+        """Score everything already queued, then stop the batch loops."""
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def _vector(self, features) -> np.ndarray:
+        """
+        One request as a float64 row, validated before it is queued so a
+        malformed request fails on its own instead of failing its batch.
+        """
+        names = self.inference.feature_names
+        if isinstance(features, dict):
+            if names is None:
+                raise ValueError("dict features need a model with known feature names")
+            vector = np.array([features[name] for name in names], dtype=np.float64)
+        else:
+            vector = np.asarray(features, dtype=np.float64)
+        if vector.ndim != 1 or (names is not None and len(vector) != len(names)):
+            expected = f"({len(names)},)" if names is not None else "a 1-D vector"
+            raise ValueError(f"expected features of shape {expected}, got {vector.shape}")
+        if not np.isfinite(vector).all():
+            raise ValueError("features must be finite")
+        return vector
+
+    async def predict(self, features):
+        """
+        Score one feature window.
+
+        Args:
+            features: Dict keyed by feature name, or a vector in
+                `inference.feature_names` order.
+
+        Returns:
+            tuple(pred_label, confidence_score)
+
+        Raises:
+            ValueError: The features have the wrong shape or are not finite.
+            ServerOverloaded: The queue is full; the request was dropped.
+        """
+        self.stats["requests"] += 1
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((self._vector(features), future, time.perf_counter_ns()))
+        except asyncio.QueueFull:
+            self.stats["shed"] += 1
+            raise ServerOverloaded(f"{self.max_queue} requests already queued") from None
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter_ns()
+            try:
+                X = np.vstack([vector for vector, _, _ in batch])
+                labels, confidences = await loop.run_in_executor(
+                    self._executor, self.inference.predict_batch, X)
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                done = time.perf_counter_ns()
+                self.latency.record(batch=done - started)
+                for (_, future, enqueued), label, confidence in zip(batch, labels.tolist(),
+                                                                    confidences.tolist()):
+                    self.latency.record(queue=started - enqueued, request=done - enqueued)
+                    if not future.done():       # the client may have gone away
+                        future.set_result((label, confidence))
+            finally:
+                self.stats["batches"] += 1
+                self.stats["batched_requests"] += len(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+
+async def _reply(batcher: MicroBatcher, line: bytes) -> dict:
+    start = time.perf_counter()
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        prediction, confidence = await batcher.predict(request["features"])
+    except ServerOverloaded:
+        return {"id": request_id, "error": "overloaded"}
+    except (ValueError, KeyError, TypeError) as exc:
+        return {"id": request_id, "error": f"bad request: {exc}"}
+    except Exception as exc:                    # model failure: still answer the client
+        return {"id": request_id, "error": f"{type(exc).__name__}: {exc}"}
+    return {"id": request_id, "prediction": prediction,
+            "label": LABEL_NAMES.get(prediction, str(prediction)),
+            "confidence": confidence,
+            "latency_ms": (time.perf_counter() - start) * 1e3}
+
+
+async def handle_client(batcher: MicroBatcher, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter):
+    """Serve one connection; requests on it are scored concurrently."""
+    async def answer(line):
+        writer.write(json.dumps(await _reply(batcher, line)).encode() + b"\n")
+
+    pending = set()
+    try:
+        while line := await reader.readline():
+            task = asyncio.create_task(answer(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            if writer.transport.get_write_buffer_size() > 1 << 16:
+                await writer.drain()
+        await asyncio.gather(*pending)
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(batcher: MicroBatcher, host: str = "127.0.0.1", port: int = 8765):
+    """Start the TCP front end; returns the `asyncio.Server`."""
+    return await asyncio.start_server(
+        lambda r, w: handle_client(batcher, r, w), host, port)
+
+
+async def _main(args):
+    from src.reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+    if args.bundle:
+        inference = RealTimeInferenceML.from_bundle(args.bundle)
+    else:
+        inference = RealTimeInferenceML(args.model, args.scaler, backend=args.backend)
+    if args.cache_size:
+        inference.enable_cache(args.cache_size, step=args.cache_step)
+    async with MicroBatcher(inference, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                            max_queue=args.max_queue, workers=args.workers) as batcher:
+        server = await serve(batcher, args.host, args.port)
+        print(f"Serving on {args.host}:{args.port} (max_batch={args.max_batch}, "
+              f"max_wait={args.max_wait_ms}ms, max_queue={args.max_queue})", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bundle", type=str, default=None)
+    parser.add_argument("--model", type=str, default="models/trained_model.pkl")
+    parser.add_argument("--scaler", type=str, default="models/scaler.pkl")
+    parser.add_argument("--backend", default="sklearn", choices=("sklearn", "compiled", "onnx"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="LRU prediction cache entries (0 = off)")
+    parser.add_argument("--cache-step", type=float, default=1e-3,
+                        help="Cache quantization step in feature standard deviations")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
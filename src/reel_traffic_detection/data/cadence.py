@@ -0,0 +1,181 @@
+"""
+Segment Cadence Feature
+-----------------------
+`cadence_score` (docs/03_feature_engineering.md, section 3.7): normalized
+spectral peak strength of the downstream byte series in the 0.2-0.6 Hz
+band over the last 10-20 s, which captures the 2-6 s segment request
+cycle of DASH/HLS video.
+
+Instead of an FFT over the whole history at every hop, each flow keeps a
+sliding DFT of only the few frequency bins inside the band. A new hop
+sample updates every bin in O(1):
+
+    X_k <- (X_k - x_oldest + x_newest) * exp(2j*pi*k/N)
+
+and the total non-DC power comes from running sums via Parseval, so the
+per-hop cost is independent of the history length. Bins are recomputed
+exactly once per history length to stop floating-point drift.
+
+Usage:
+    from src.reel_traffic_detection.data.cadence import CadenceTracker
+
+    tracker = CadenceTracker(history=16.0, hop=0.25)
+    score = tracker.update(flow=0, bucket=42, value=down_bytes_in_hop)
+"""
+
+import math
+import numpy as np
+
+
+CADENCE_BAND = (0.2, 0.6)
+
+
+def score_from_bins(X, s1, s2, n):
+    """
+    Peak share of the non-DC spectral power held by one band bin.
+
+    Args:
+        X: band-bin DFT coefficients, shape (..., bins).
+        s1, s2: sum and sum of squares of the n history samples.
+        n: history length in samples.
+    """
+    power = n * np.asarray(s2) - np.asarray(s1) ** 2
+    peak = 2.0 * (np.abs(X) ** 2).max(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.where(power > 1e-9 * np.maximum(n * np.asarray(s2), 1.0), peak / power, 0.0)
+    return np.clip(score, 0.0, 1.0)
+
+
+class _CadenceState:
+    __slots__ = ("ring", "pos", "X", "s1", "s2", "last_bucket", "since_resync")
+
+    def __init__(self, n, n_bins, bucket):
+        self.ring = np.zeros(n)
+        self.pos = 0
+        self.X = np.zeros(n_bins, dtype=np.complex128)
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.last_bucket = bucket - 1
+        self.since_resync = 0
+
+
+class CadenceTracker:
+    def __init__(self, history: float = 16.0, hop: float = 0.25, band=CADENCE_BAND):
+        """
+        Initialize per-flow cadence tracking.
+
+        Args:
+            history: Seconds of downstream byte history analysed (10-20 s).
+            hop: Seconds per sample (the window engine's hop).
+            band: (low, high) frequency band in Hz.
+        """
+        n = history / hop
+        if abs(n - round(n)) > 1e-9:
+            raise ValueError("history must be a whole multiple of hop")
+        self.n = int(round(n))
+        self.hop = hop
+        lo = math.ceil(band[0] * history - 1e-9)
+        hi = math.floor(band[1] * history + 1e-9)
+        self.bins = np.arange(max(lo, 1), min(hi, (self.n - 1) // 2) + 1)
+        if not len(self.bins):
+            raise ValueError("no DFT bin falls inside the cadence band")
+        self.twiddle = np.exp(2j * np.pi * self.bins / self.n)
+        self._basis = np.exp(-2j * np.pi * np.outer(np.arange(self.n), self.bins) / self.n)
+        self._states = {}
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        """Centre frequency (Hz) of every tracked bin."""
+        return self.bins / (self.n * self.hop)
+
+    def _push(self, state: _CadenceState, value: float):
+        old = state.ring[state.pos]
+        state.ring[state.pos] = value
+        state.pos = (state.pos + 1) % self.n
+        state.X = (state.X + (value - old)) * self.twiddle
+        state.s1 += value - old
+        state.s2 += value * value - old * old
+        state.since_resync += 1
+        if state.since_resync >= self.n:
+            self._resync(state)
+
+    def _resync(self, state: _CadenceState):
+        samples = np.roll(state.ring, -state.pos)   # oldest first
+        state.X = samples @ self._basis
+        state.s1 = float(samples.sum())
+        state.s2 = float(samples @ samples)
+        state.since_resync = 0
+
+    def update(self, flow, bucket: int, value: float) -> float:
+        """
+        Append the downstream bytes of hop `bucket` for `flow` and return
+        the current cadence score. Skipped hops count as zero bytes.
+        """
+        state = self._states.get(flow)
+        if state is None:
+            state = self._states[flow] = _CadenceState(self.n, len(self.bins), bucket)
+        gap = bucket - state.last_bucket - 1
+        if gap >= self.n:
+            state = self._states[flow] = _CadenceState(self.n, len(self.bins), bucket)
+        else:
+            for _ in range(max(gap, 0)):
+                self._push(state, 0.0)
+        self._push(state, float(value))
+        state.last_bucket = bucket
+        return float(score_from_bins(state.X, state.s1, state.s2, self.n))
+
+    def drop(self, flow):
+        """Forget a flow's history (e.g. after it expires)."""
+        self._states.pop(flow, None)
+
+    def reset(self):
+        self._states.clear()
+
+    def batch_scores(self, flows, buckets, values, query_flows, query_buckets) -> np.ndarray:
+        """
+        Cadence scores for many (flow, bucket) queries at once, matching
+        what `update` would return when fed the same samples in order.
+
+        Args:
+            flows, buckets, values: per-hop samples sorted by (flow, bucket);
+                hops not listed count as zero bytes.
+            query_flows, query_buckets: points at which to evaluate.
+        """
+        flows = np.asarray(flows, np.int64)
+        buckets = np.asarray(buckets, np.int64)
+        query_flows = np.asarray(query_flows, np.int64)
+        query_buckets = np.asarray(query_buckets, np.int64)
+        if not len(flows):
+            return np.zeros(len(query_flows))
+
+        # Lay every flow's series out densely, one segment per flow,
+        # long enough to reach its last sample and its last query
+        uniq, first = np.unique(flows, return_index=True)
+        q_seg = np.searchsorted(uniq, query_flows).clip(max=len(uniq) - 1)
+        known = uniq[q_seg] == query_flows
+        seg_start = buckets[first]
+        seg_end = np.maximum.reduceat(buckets, first)
+        np.maximum.at(seg_end, q_seg[known], query_buckets[known])
+        seg_len = seg_end - seg_start + 1
+        seg_offset = np.concatenate(([0], np.cumsum(seg_len)[:-1]))
+
+        x = np.zeros(int(seg_len.sum()))
+        seg = np.searchsorted(uniq, flows)
+        x[seg_offset[seg] + buckets - seg_start[seg]] = values
+        S1 = np.concatenate(([0.0], np.cumsum(x)))
+        S2 = np.concatenate(([0.0], np.cumsum(x * x)))
+
+        # History of n samples ending at the query, clipped to the flow start
+        end = seg_offset[q_seg] + query_buckets - seg_start[q_seg] + 1
+        end = np.where(known, end.clip(0, len(x)), 0)
+        start = np.where(known, np.maximum(end - self.n, seg_offset[q_seg]), 0)
+
+        # Windowed DFT per bin from prefix sums of x * exp(-2j*pi*k*m/n);
+        # the phase offset of each window does not change |X_k|
+        phase_index = np.arange(len(x)) % self.n
+        X = np.empty((len(end), len(self.bins)), dtype=np.complex128)
+        for j, k in enumerate(self.bins):
+            C = np.concatenate(([0.0], np.cumsum(x * np.exp(-2j * np.pi * k * phase_index / self.n))))
+            X[:, j] = C[end] - C[start]
+        scores = score_from_bins(X, S1[end] - S1[start], S2[end] - S2[start], self.n)
+        return np.where(known, scores, 0.0)
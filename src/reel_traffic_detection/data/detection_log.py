@@ -0,0 +1,236 @@
+"""
+Columnar Detection Log
+----------------------
+Stores video detections as contiguous column arrays instead of lists of
+ultralytics results or per-box dicts: one row per detection (frame index,
+timestamp, class id, confidence, xyxy box) plus one row per frame (frame
+index, timestamp), so frames without detections still count towards
+durations and rates. Frames are appended one at a time; the columns grow
+by doubling, so appending stays amortized O(detections in the frame).
+
+Summaries are vectorized over the columns (`np.bincount` on class ids and
+time bins), so counts, per-class timelines and per-second rates over
+millions of detections take milliseconds:
+
+    class_counts()      detections per class name
+    timeline(1.0)       DataFrame: detections per class per 1 s bin
+    rates(1.0)          the same as detections per second, plus the overall mean
+
+Logs persist to NPZ (lossless, both tables and the class names) or
+Parquet (the detection table, one row per box; needs pyarrow).
+
+Usage:
+    from src.reel_traffic_detection.data.detection_log import DetectionLog
+
+    log = DetectionLog.from_stream(rti_yolo.stream_video("data/MGR.mp4"), rti_yolo.model.names)
+    log.class_counts()                       # {"car": 5120, "bus": 37, ...}
+    log.timeline(bin_seconds=1.0)
+    log.save("detections.npz")
+    log = DetectionLog.load("detections.npz")
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+DETECTION_COLUMNS = {
+    "frame_index": np.int64,
+    "timestamp_ms": np.float64,
+    "class_id": np.int16,
+    "confidence": np.float32,
+    "x1": np.float32,
+    "y1": np.float32,
+    "x2": np.float32,
+    "y2": np.float32,
+}
+FRAME_COLUMNS = {"frame_index": np.int64, "timestamp_ms": np.float64}
+BOX_COLUMNS = ("x1", "y1", "x2", "y2")
+
+
+def _grown(columns: dict, size: int, needed: int) -> dict:
+    """Copies of `columns` with room for at least `needed` rows."""
+    capacity = max(needed, 2 * len(next(iter(columns.values()))), 64)
+    grown = {}
+    for name, array in columns.items():
+        grown[name] = np.empty(capacity, dtype=array.dtype)
+        grown[name][:size] = array[:size]
+    return grown
+
+
+class DetectionLog:
+    def __init__(self, names: dict = None):
+        """
+        Initialize an empty log.
+
+        Args:
+            names: Class id -> class name (e.g. `model.names`).
+        """
+        self.names = {int(k): str(v) for k, v in (names or {}).items()}
+        self._detections = {name: np.empty(0, dtype) for name, dtype in DETECTION_COLUMNS.items()}
+        self._frames = {name: np.empty(0, dtype) for name, dtype in FRAME_COLUMNS.items()}
+        self.n_detections = 0
+        self.n_frames = 0
+
+    def __len__(self) -> int:
+        return self.n_detections
+
+    @classmethod
+    def from_stream(cls, records, names: dict = None) -> "DetectionLog":
+        """Collect an iterable of `FrameDetections` (e.g. `stream_video`)."""
+        log = cls(names)
+        for record in records:
+            log.append(*record[:5])
+        return log
+
+    def append(self, frame_index: int, timestamp_ms: float, class_ids, confidences, boxes):
+        """
+        Add one frame and its detections.
+
+        Args:
+            frame_index: Position of the frame in the video.
+            timestamp_ms: Capture time of the frame.
+            class_ids: (n,) class ids.
+            confidences: (n,) scores.
+            boxes: (n, 4) x1 y1 x2 y2 pixels.
+        """
+        if self.n_frames == len(self._frames["frame_index"]):
+            self._frames = _grown(self._frames, self.n_frames, self.n_frames + 1)
+        self._frames["frame_index"][self.n_frames] = frame_index
+        self._frames["timestamp_ms"][self.n_frames] = timestamp_ms
+        self.n_frames += 1
+
+        n = len(class_ids)
+        if not n:
+            return
+        lo, hi = self.n_detections, self.n_detections + n
+        if hi > len(self._detections["class_id"]):
+            self._detections = _grown(self._detections, lo, hi)
+        columns = self._detections
+        columns["frame_index"][lo:hi] = frame_index
+        columns["timestamp_ms"][lo:hi] = timestamp_ms
+        columns["class_id"][lo:hi] = class_ids
+        columns["confidence"][lo:hi] = confidences
+        boxes = np.asarray(boxes).reshape(n, 4)
+        for i, name in enumerate(BOX_COLUMNS):
+            columns[name][lo:hi] = boxes[:, i]
+        self.n_detections = hi
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one detection column (no copy)."""
+        return self._detections[name][:self.n_detections]
+
+    def boxes(self) -> np.ndarray:
+        """(n, 4) float32 copy of the xyxy boxes."""
+        return np.column_stack([self.column(name) for name in BOX_COLUMNS])
+
+    def frames(self) -> pd.DataFrame:
+        return pd.DataFrame({name: array[:self.n_frames] for name, array in self._frames.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per detection, with a `class_name` column when names are known."""
+        frame = pd.DataFrame({name: self.column(name) for name in DETECTION_COLUMNS})
+        if self.names:
+            frame["class_name"] = frame["class_id"].map(self.names).astype("category")
+        return frame
+
+    def _mask(self, min_confidence: float):
+        if min_confidence is None:
+            return slice(None)
+        return self.column("confidence") >= min_confidence
+
+    def _label(self, class_id: int) -> str:
+        return self.names.get(class_id, str(class_id))
+
+    def class_counts(self, min_confidence: float = None) -> dict:
+        """Detections per class name, most frequent first."""
+        class_ids = self.column("class_id")[self._mask(min_confidence)]
+        if not len(class_ids):
+            return {}
+        counts = np.bincount(class_ids.astype(np.int64))
+        order = np.argsort(-counts, kind="stable")
+        return {self._label(int(i)): int(counts[i]) for i in order if counts[i]}
+
+    def duration_s(self) -> float:
+        """Time covered by the logged frames (first to last frame, plus one frame)."""
+        if not self.n_frames:
+            return 0.0
+        t = self._frames["timestamp_ms"][:self.n_frames]
+        step = np.median(np.diff(t)) if self.n_frames > 1 else 0.0
+        return float(t.max() - t.min() + step) / 1e3
+
+    def timeline(self, bin_seconds: float = 1.0, min_confidence: float = None) -> pd.DataFrame:
+        """
+        Detections per class in consecutive time bins.
+
+        Args:
+            bin_seconds: Bin width.
+            min_confidence: Ignore detections scored below this.
+
+        Returns:
+            DataFrame indexed by bin start (seconds from the first frame),
+            one column per detected class; bins without detections are 0.
+        """
+        if not self.n_frames:
+            return pd.DataFrame(index=pd.Index([], name="t_s", dtype=float))
+        start = self._frames["timestamp_ms"][:self.n_frames].min()
+        end = self._frames["timestamp_ms"][:self.n_frames].max()
+        n_bins = int((end - start) / 1e3 // bin_seconds) + 1
+        mask = self._mask(min_confidence)
+        class_ids = self.column("class_id")[mask].astype(np.intp)
+        # Class ids are small ints: a lookup table beats np.unique's sort
+        classes = np.flatnonzero(np.bincount(class_ids)) if len(class_ids) else class_ids
+        slot = np.zeros(classes.max() + 1 if len(classes) else 0, dtype=np.intp)
+        slot[classes] = np.arange(len(classes))
+        bins = ((self.column("timestamp_ms")[mask] - start) / 1e3 // bin_seconds).astype(np.intp)
+        counts = np.bincount(bins * len(classes) + slot[class_ids],
+                             minlength=n_bins * len(classes))
+        return pd.DataFrame(counts.reshape(n_bins, len(classes)),
+                            index=pd.Index(np.arange(n_bins) * bin_seconds, name="t_s"),
+                            columns=[self._label(int(c)) for c in classes])
+
+    def rates(self, bin_seconds: float = 1.0, min_confidence: float = None) -> dict:
+        """
+        Detections per second.
+
+        Returns:
+            {"per_bin": timeline / bin_seconds, "mean": {class: detections
+            per second over the whole log}}
+        """
+        timeline = self.timeline(bin_seconds, min_confidence)
+        duration = self.duration_s()
+        mean = {name: count / duration if duration else 0.0
+                for name, count in self.class_counts(min_confidence).items()}
+        return {"per_bin": timeline / bin_seconds, "mean": mean}
+
+    def save(self, path: str):
+        """Write `.npz` (both tables and names) or `.parquet` (detection rows)."""
+        if str(path).endswith(".parquet"):
+            self.to_frame().drop(columns="class_name", errors="ignore").to_parquet(path, index=False)
+            return
+        np.savez(path, names=np.array(json.dumps(self.names)),
+                 **{f"det_{k}": self.column(k) for k in DETECTION_COLUMNS},
+                 **{f"frame_{k}": v[:self.n_frames] for k, v in self._frames.items()})
+
+    @classmethod
+    def load(cls, path: str, names: dict = None) -> "DetectionLog":
+        """
+        Read a log written by `save`. Parquet files hold no frame table or
+        names: frames are rebuilt from the detections (frames without any
+        detection are lost) and `names` can be passed in.
+        """
+        if str(path).endswith(".parquet"):
+            table = pd.read_parquet(path)
+            log = cls(names)
+            detections = {k: table[k].to_numpy(dtype=v) for k, v in DETECTION_COLUMNS.items()}
+            frames = table.drop_duplicates("frame_index")
+            frames = {k: frames[k].to_numpy(dtype=v) for k, v in FRAME_COLUMNS.items()}
+        else:
+            with np.load(path) as data:
+                log = cls({int(k): v for k, v in json.loads(str(data["names"])).items()})
+                detections = {k: data[f"det_{k}"] for k in DETECTION_COLUMNS}
+                frames = {k: data[f"frame_{k}"] for k in FRAME_COLUMNS}
+        log._detections, log._frames = detections, frames
+        log.n_detections = len(detections["class_id"])
+        log.n_frames = len(frames["frame_index"])
+        return log
@@ -9,23 +9,216 @@ Usage:
     
     extractor = FeatureExtractor()
     features = extractor.extract_from_pcap("data/sample.pcap")
+
+    # One row per bidirectional 5-tuple
+    flows = extractor.extract_flows("data/sample.pcap")
+
+    # 1 s windows every 250 ms
+    windows = extractor.extract_windows("data/sample.pcap", per_flow=True)
+
+    # Bounded-memory ingestion for multi-GB captures
+    features = extractor.extract_from_pcap("data/large.pcap", streaming=True)
+    print(extractor.last_run_stats["packets_per_sec"])
 """
 
+import math
+import time
 import numpy as np
 import pandas as pd
-from scapy.all import rdpcap, IP, TCP, UDP
+from scapy.all import rdpcap, PcapReader, IP, TCP, UDP
 import logging
 
+from src.reel_traffic_detection.data.direction_features import infer_downstream
+from src.reel_traffic_detection.data.flow_features import FlowIndex, extract_flow_features
+from src.reel_traffic_detection.data.mmap_reader import MappedCapture, probe_capture
+from src.reel_traffic_detection.data.pcap_parser import (
+    PROTO_TCP,
+    PROTO_UDP,
+    SUPPORTED_LINKTYPES,
+    columns_from_packets,
+    iter_pcap_chunks,
+    parse_pcap,
+    probe_pcap,
+)
+from src.reel_traffic_detection.data.window_features import SlidingWindowExtractor
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("FeatureExtractor")
 
 
-class FeatureExtractor:
+class _RunningSummary:
+    """
+    Constant-memory accumulator for the capture summary columns.
+    Produces the same values as the DataFrame aggregation in
+    `FeatureExtractor.extract_from_pcap` without keeping packets around.
+    """
+
     def __init__(self):
+        self.count = 0
+        self.size_sum = 0.0
+        self.size_m2 = 0.0
+        self.size_min = None
+        self.size_max = None
+        self.tcp_count = 0
+        self.udp_count = 0
+        self.first_time = None
+        self.last_time = None
+
+    def update(self, record: dict):
+        size = record["packet_size"]
+        t = float(record["time"])
+
+        # Welford update for the sample variance of packet sizes
+        prev_mean = self.size_sum / self.count if self.count else 0.0
+        self.count += 1
+        self.size_sum += size
+        mean = self.size_sum / self.count
+        self.size_m2 += (size - prev_mean) * (size - mean)
+
+        self.size_min = size if self.size_min is None else min(self.size_min, size)
+        self.size_max = size if self.size_max is None else max(self.size_max, size)
+        self.tcp_count += record["protocol"] == "TCP"
+        self.udp_count += record["protocol"] == "UDP"
+
+        if self.first_time is None:
+            self.first_time = t
+        self.last_time = t
+
+    def update_columns(self, cols):
+        """Fold a `PacketColumns` chunk into the summary in one vectorized step."""
+        n_b = len(cols)
+        if not n_b:
+            return
+        sizes = cols.length.astype(np.float64)
+        mean_b = sizes.mean()
+        m2_b = float(((sizes - mean_b) ** 2).sum())
+
+        # Chan et al. parallel merge of (count, mean, M2)
+        n_a = self.count
+        mean_a = self.size_sum / n_a if n_a else 0.0
+        delta = mean_b - mean_a
+        self.size_m2 += m2_b + delta * delta * n_a * n_b / (n_a + n_b)
+        self.count += n_b
+        self.size_sum += float(sizes.sum())
+
+        lo, hi = int(cols.length.min()), int(cols.length.max())
+        self.size_min = lo if self.size_min is None else min(self.size_min, lo)
+        self.size_max = hi if self.size_max is None else max(self.size_max, hi)
+        self.tcp_count += int(np.count_nonzero(cols.proto == PROTO_TCP))
+        self.udp_count += int(np.count_nonzero(cols.proto == PROTO_UDP))
+
+        if self.first_time is None:
+            self.first_time = float(cols.timestamp[0])
+        self.last_time = float(cols.timestamp[-1])
+
+    def summary(self) -> dict:
+        n = self.count
+        duration = self.last_time - self.first_time if n > 1 else 0
+        return {
+            "avg_packet_size": self.size_sum / n,
+            "std_packet_size": math.sqrt(self.size_m2 / (n - 1)) if n > 1 else np.nan,
+            "min_packet_size": self.size_min,
+            "max_packet_size": self.size_max,
+            # Mean of time.diff().fillna(0) telescopes to (last - first) / n
+            "avg_inter_arrival": (self.last_time - self.first_time) / n,
+            "packet_count": n,
+            "tcp_fraction": self.tcp_count / n,
+            "udp_fraction": self.udp_count / n,
+            "duration": duration,
+        }
+
+
+class FeatureExtractor:
+    ENGINES = ("auto", "fast", "mmap", "scapy")
+
+    def __init__(self, streaming: bool = False, emit_every: int = 100_000,
+                 engine: str = "auto"):
         """
         Initialize feature extractor with configurable params if needed.
+
+        Args:
+            streaming: If True, `extract_from_pcap` reads packets incrementally
+                instead of loading the whole capture with `rdpcap`.
+            emit_every: Number of packets between partial summaries emitted
+                by `extract_stream`.
+            engine: Packet decoding engine. "fast" decodes headers straight
+                from pcap bytes into NumPy columns, "mmap" does the same
+                over a memory mapping of a pcap or pcapng file without
+                copying packet bytes, "scapy" dissects every packet, "auto"
+                uses the fast engine for classic pcap files, mmap for pcapng
+                and scapy otherwise.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"engine must be one of {self.ENGINES}, got {engine!r}")
+        self.streaming = streaming
+        self.emit_every = emit_every
+        self.engine = engine
+        self.last_run_stats = {}
+
+    def _resolve_engine(self, filepath: str) -> str:
+        if self.engine != "auto":
+            return self.engine
+        if probe_pcap(filepath) in SUPPORTED_LINKTYPES:
+            return "fast"
+        if probe_capture(filepath) == "pcapng":
+            return "mmap"
+        return "scapy"
+
+    def _use_fast_engine(self, filepath: str) -> bool:
+        return self._resolve_engine(filepath) != "scapy"
+
+    def _iter_column_chunks(self, filepath: str):
+        """Yield `PacketColumns` blocks from the fast or mmap engine."""
+        if self._resolve_engine(filepath) == "mmap":
+            with MappedCapture(filepath) as capture:
+                yield from capture.iter_columns()
+        else:
+            yield from iter_pcap_chunks(filepath)
+
+    def extract_columns(self, filepath: str):
         """
-        pass
+        Decode all packet headers of a capture into a `PacketColumns` table,
+        falling back to scapy dissection for captures the fast engines
+        cannot read.
+        """
+        engine = self._resolve_engine(filepath)
+        if engine == "fast":
+            return parse_pcap(filepath)
+        if engine == "mmap":
+            with MappedCapture(filepath) as capture:
+                return capture.columns()
+        return columns_from_packets(rdpcap(filepath))
+
+    def extract_flows(self, filepath: str) -> pd.DataFrame:
+        """
+        Extract per-flow features from a PCAP file.
+        Returns a Pandas DataFrame with one row per bidirectional 5-tuple,
+        carrying the same summary columns as `extract_from_pcap`.
+        The whole capture is decoded at once and `p95_iat_down` is exact;
+        for sketched (bounded) per-flow percentiles over large or many
+        captures use `ParallelExtractor(quantiles="kll")`.
+        """
+        start = time.perf_counter()
+        cols = self.extract_columns(filepath)
+        flows = extract_flow_features(cols)
+        self._record_run_stats(filepath, len(cols), start)
+        logger.info(f"Extracted {len(flows)} flows from {filepath}")
+        return flows
+
+    def extract_windows(self, filepath: str, per_flow: bool = False,
+                        window: float = 1.0, hop: float = 0.25) -> pd.DataFrame:
+        """
+        Extract sliding-window features (1 s windows every 250 ms by default).
+        Returns one row per hop, or per (flow, hop) when `per_flow` is set.
+        """
+        start = time.perf_counter()
+        cols = self.extract_columns(filepath)
+        index = FlowIndex(cols)
+        downstream = infer_downstream(cols, index)
+        group = index.flow_of if per_flow else None
+        windows = SlidingWindowExtractor(window=window, hop=hop).transform(cols, group, downstream)
+        self._record_run_stats(filepath, len(cols), start)
+        return windows
 
     def _extract_packet_features(self, packet):
         """
@@ -43,11 +236,97 @@ class FeatureExtractor:
             "time": packet.time,
         }
 
-    def extract_from_pcap(self, filepath: str) -> pd.DataFrame:
+    def _record_run_stats(self, filepath: str, packets: int, start: float):
+        elapsed = time.perf_counter() - start
+        rate = packets / elapsed if elapsed > 0 else 0.0
+        self.last_run_stats = {
+            "packets": packets,
+            "seconds": elapsed,
+            "packets_per_sec": rate,
+        }
+        logger.info(f"Processed {packets} packets from {filepath} "
+                    f"in {elapsed:.2f}s ({rate:,.0f} pkts/s)")
+
+    def iter_packets(self, filepath: str):
+        """
+        Yield packet-level records one at a time, keeping at most one
+        packet in memory. Unparseable packets are skipped.
+        """
+        reader = PcapReader(filepath)
+        try:
+            for pkt in reader:
+                try:
+                    yield self._extract_packet_features(pkt)
+                except Exception:
+                    continue
+        finally:
+            reader.close()
+
+    def extract_stream(self, filepath: str, emit_every: int = None):
+        """
+        Stream a PCAP file and yield running summary rows as packets arrive.
+
+        A one-row DataFrame (same columns as `extract_from_pcap`) is yielded
+        every `emit_every` packets and once more at the end of the capture.
+        Each row summarizes all packets seen so far. Throughput is stored in
+        `last_run_stats` once the capture is exhausted.
+        """
+        emit_every = emit_every or self.emit_every
+        running = _RunningSummary()
+        start = time.perf_counter()
+        emitted = 0
+
+        if self._use_fast_engine(filepath):
+            # Chunks are decoded in bulk, so rows are emitted at chunk granularity
+            for chunk in self._iter_column_chunks(filepath):
+                running.update_columns(chunk)
+                if running.count // emit_every > emitted // emit_every:
+                    emitted = running.count
+                    yield pd.DataFrame([running.summary()])
+        else:
+            for record in self.iter_packets(filepath):
+                running.update(record)
+                if running.count % emit_every == 0:
+                    emitted = running.count
+                    yield pd.DataFrame([running.summary()])
+
+        self._record_run_stats(filepath, running.count, start)
+
+        if running.count == 0:
+            logger.warning("No valid packets parsed!")
+            return
+        if running.count != emitted:
+            yield pd.DataFrame([running.summary()])
+
+    def extract_from_pcap(self, filepath: str, streaming: bool = None) -> pd.DataFrame:
         """
         Extract flow-level features from PCAP file.
         Returns a Pandas DataFrame of aggregated features.
+
+        Args:
+            filepath: Path to the PCAP file.
+            streaming: Override the instance's `streaming` setting. Streaming
+                mode keeps memory bounded regardless of capture size.
         """
+        if streaming is None:
+            streaming = self.streaming
+        if streaming:
+            summary = pd.DataFrame()
+            for summary in self.extract_stream(filepath):
+                pass
+            return summary
+
+        start = time.perf_counter()
+        if self._use_fast_engine(filepath):
+            cols = self.extract_columns(filepath)
+            self._record_run_stats(filepath, len(cols), start)
+            if not len(cols):
+                logger.warning("No valid packets parsed!")
+                return pd.DataFrame()
+            running = _RunningSummary()
+            running.update_columns(cols)
+            return pd.DataFrame([running.summary()])
+
         packets = rdpcap(filepath)
         logger.info(f"Loaded {len(packets)} packets from {filepath}")
 
@@ -60,6 +339,7 @@ class FeatureExtractor:
                 continue
 
         df = pd.DataFrame(packet_records)
+        self._record_run_stats(filepath, len(df), start)
 
         if df.empty:
             logger.warning("No valid packets parsed!")
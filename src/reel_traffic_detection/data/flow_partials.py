@@ -0,0 +1,455 @@
+"""
+Mergeable Per-Flow Partial Aggregates
+-------------------------------------
+`extract_flow_features` needs every packet of a flow at once. For sharded
+extraction (one worker per byte range of a capture) each shard instead
+reduces its packets to a `FlowPartials` table: one row per bidirectional
+flow holding only mergeable state (counts, sums, Chan variance terms,
+per-side inter-arrival sums, handshake votes and the edge rate bins).
+Partials of consecutive time slices merge into the partial of their
+union, and `to_frame` yields the same columns as `extract_flow_features`.
+
+The per-side inter-arrival times behind `p95_iat_down` are kept as two
+flat arrays per side (values, flow row), so building, merging and the
+percentile (`grouped_percentile`) stay vectorized however many flows a
+shard holds. With `quantiles="kll"` only flows with more than
+`sketch_threshold` values on a side move into a KLL sketch (bounded
+memory for long flows, approximate p95); every sketch of one build or
+merge shares one coin-flip RNG.
+
+Rows are keyed by the canonical endpoint pair (side A is the lower
+(address, port)), so the direction of every flow is only decided once
+all evidence has been merged.
+
+Usage:
+    from src.reel_traffic_detection.data.flow_partials import FlowPartials
+
+    parts = [FlowPartials.from_columns(chunk) for chunk in iter_pcap_chunks(path)]
+    flows = FlowPartials.merge(parts).to_frame()
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+
+from src.reel_traffic_detection.data.direction_features import (
+    DIRECTION_COLUMNS,
+    DIRECTION_STATS,
+    LARGE_PACKET_BYTES,
+    QUIC_PORT,
+    SMALL_PACKET_BYTES,
+    burstiness_from_bins,
+    direction_features_from_stats,
+    downstream_iat,
+    grouped_percentile,
+    opener_is_client,
+    IAT_PERCENTILE,
+)
+from src.reel_traffic_detection.data.flow_features import SUMMARY_COLUMNS, FlowIndex
+from src.reel_traffic_detection.data.pcap_parser import PROTO_TCP, PROTO_UDP, format_addresses
+from src.reel_traffic_detection.data.quantile_sketch import (
+    check_quantile_backend,
+    make_quantile_sketch,
+)
+
+
+KEY_FIELDS = ("a_hi", "a_lo", "a_port", "b_hi", "b_lo", "b_port", "proto")
+SIDE_FIELDS = ("pkts", "bytes", "large", "small", "iat_n", "iat_sum", "iat_sq", "first", "last")
+SUM_FIELDS = ("count", "size_sum", "tcp", "udp", "syn_a", "syn_b", "synack_a", "synack_b") + tuple(
+    f"{name}_{side}" for side in "ab" for name in SIDE_FIELDS[:7])
+PARTIAL_FIELDS = KEY_FIELDS + SUM_FIELDS + (
+    "size_m2", "size_min", "size_max", "first_time", "last_time", "opener_a",
+    "first_a", "last_a", "first_b", "last_b",
+    "first_bin", "first_bin_bytes", "last_bin", "last_bin_bytes", "inner_bin_sq",
+)
+
+_TCP_SYN = 0x02
+_TCP_ACK = 0x10
+
+
+class FlowPartials:
+    """
+    Column table of per-flow partial aggregates.
+
+    Attributes:
+        fields: dict mapping each PARTIAL_FIELDS name to a per-flow array.
+        iat_values: per side (A, B), the exact inter-arrival times of the
+            flows without a sketch, in no particular order.
+        iat_flows: per side, the flow row of each `iat_values` entry.
+        sketches: (n_flows, 2) object array with the KLL sketch of side A
+            and side B, or None where the values are kept exactly.
+        rate_bin: width in seconds of the burstiness rate samples.
+        quantiles, sketch_k, sketch_threshold: see `from_columns`.
+    """
+
+    def __init__(self, fields: dict, iat_values, iat_flows, sketches, rate_bin: float = 0.25,
+                 quantiles: str = "exact", sketch_k: int = 200, sketch_threshold: int = None):
+        self.fields = fields
+        self.iat_values = list(iat_values)
+        self.iat_flows = list(iat_flows)
+        self.sketches = sketches
+        self.rate_bin = rate_bin
+        self.quantiles = quantiles
+        self.sketch_k = sketch_k
+        self.sketch_threshold = 3 * sketch_k if sketch_threshold is None else sketch_threshold
+
+    def __len__(self):
+        return len(self.fields["count"])
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    @classmethod
+    def empty(cls, rate_bin: float = 0.25, **config):
+        fields = {name: np.empty(0) for name in PARTIAL_FIELDS}
+        for name in KEY_FIELDS:
+            fields[name] = np.empty(0, np.uint64)
+        return cls(fields, [np.empty(0)] * 2, [np.empty(0, np.int64)] * 2,
+                   np.empty((0, 2), dtype=object), rate_bin, **config)
+
+    def _config(self) -> dict:
+        return {"quantiles": self.quantiles, "sketch_k": self.sketch_k,
+                "sketch_threshold": self.sketch_threshold}
+
+    def _sketch_large_flows(self, rng: random.Random):
+        """
+        With `quantiles="kll"`, fold the exact inter-arrival times of flows
+        that have a sketch, or more than `sketch_threshold` values on a
+        side, into that side's sketch. Only large flows are visited.
+        """
+        if self.quantiles != "kll":
+            return
+        for column in range(2):
+            values, flows = self.iat_values[column], self.iat_flows[column]
+            n_exact = np.bincount(flows, minlength=len(self))
+            sketched = ~np.equal(self.sketches[:, column], None)
+            large = np.flatnonzero((n_exact > 0) & (sketched | (n_exact > self.sketch_threshold)))
+            if not len(large):
+                continue
+            order = np.argsort(flows, kind="stable")
+            values, flows = values[order], flows[order]
+            lo = np.searchsorted(flows, large)
+            hi = np.searchsorted(flows, large, side="right")
+            for flow, start, stop in zip(large, lo, hi):
+                if self.sketches[flow, column] is None:
+                    self.sketches[flow, column] = make_quantile_sketch("kll", self.sketch_k, rng)
+                self.sketches[flow, column].update_many(values[start:stop])
+            moved = np.zeros(len(self), dtype=bool)
+            moved[large] = True
+            keep = ~moved[flows]
+            self.iat_values[column], self.iat_flows[column] = values[keep], flows[keep]
+
+    def iat_percentile(self, column: int, q: float = IAT_PERCENTILE) -> np.ndarray:
+        """Per-flow inter-arrival percentile of side A (0) or B (1)."""
+        out = grouped_percentile(self.iat_values[column], self.iat_flows[column], len(self), q)
+        for flow in np.flatnonzero(~np.equal(self.sketches[:, column], None)):
+            out[flow] = self.sketches[flow, column].quantile(q / 100.0)
+        return out
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_columns(cls, cols, quantiles: str = "exact", sketch_k: int = 200,
+                     rate_bin: float = 0.25, sketch_threshold: int = None) -> "FlowPartials":
+        """
+        Reduce a time slice of packets to per-flow partial aggregates.
+
+        Args:
+            cols: PacketColumns of the slice, in capture order.
+            quantiles: "exact" keeps every inter-arrival time; "kll" keeps
+                them only for flows with at most `sketch_threshold` values
+                per side and sketches the larger ones (approximate p95).
+            sketch_k: KLL accuracy/size parameter.
+            rate_bin: width in seconds of the burstiness rate samples.
+            sketch_threshold: Values per flow side above which "kll"
+                sketches them (default 3 * sketch_k, about what one sketch
+                retains).
+        """
+        check_quantile_backend(quantiles)
+        config = {"quantiles": quantiles, "sketch_k": sketch_k,
+                  "sketch_threshold": sketch_threshold}
+        index = FlowIndex(cols)
+        if not index.n_flows:
+            return cls.empty(rate_bin, **config)
+        order, starts, counts = index.order, index.starts, index.counts
+        n_flows = index.n_flows
+        group = np.repeat(np.arange(n_flows), counts)
+        ends = starts + counts - 1
+
+        times = cols.timestamp[order]
+        sizes = cols.length[order].astype(np.float64)
+        proto = cols.proto[order]
+        flags = cols.tcp_flags[order]
+        a_side = index.a_side[order]
+
+        def total(values):
+            return np.add.reduceat(np.asarray(values, dtype=np.float64), starts)
+
+        first = index.first
+        a_first = index.a_side[first]
+        fields = {
+            "a_hi": np.where(a_first, cols.src[first, 0], cols.dst[first, 0]),
+            "a_lo": np.where(a_first, cols.src[first, 1], cols.dst[first, 1]),
+            "a_port": np.where(a_first, cols.sport[first], cols.dport[first]).astype(np.uint64),
+            "b_hi": np.where(a_first, cols.dst[first, 0], cols.src[first, 0]),
+            "b_lo": np.where(a_first, cols.dst[first, 1], cols.src[first, 1]),
+            "b_port": np.where(a_first, cols.dport[first], cols.sport[first]).astype(np.uint64),
+            "proto": cols.proto[first].astype(np.uint64),
+        }
+
+        mean = total(sizes) / counts
+        dev = sizes - mean[group]
+        is_tcp = proto == PROTO_TCP
+        syn = is_tcp & ((flags & (_TCP_SYN | _TCP_ACK)) == _TCP_SYN)
+        syn_ack = is_tcp & ((flags & (_TCP_SYN | _TCP_ACK)) == (_TCP_SYN | _TCP_ACK))
+        fields.update({
+            "count": counts.astype(np.float64),
+            "size_sum": total(sizes),
+            "size_m2": total(dev * dev),
+            "size_min": np.minimum.reduceat(sizes, starts),
+            "size_max": np.maximum.reduceat(sizes, starts),
+            "tcp": total(is_tcp),
+            "udp": total(proto == PROTO_UDP),
+            "first_time": times[starts],
+            "last_time": times[ends],
+            "opener_a": a_first,
+            "syn_a": total(syn & a_side),
+            "syn_b": total(syn & ~a_side),
+            "synack_a": total(syn_ack & a_side),
+            "synack_b": total(syn_ack & ~a_side),
+        })
+
+        iat_values, iat_flows = [], []
+        for column, (side, mask) in enumerate((("a", a_side), ("b", ~a_side))):
+            iat = downstream_iat(times, mask, group)
+            has_iat = ~np.isnan(iat)
+            iat_values.append(iat[has_iat])
+            iat_flows.append(group[has_iat])
+            iat0 = np.where(has_iat, iat, 0.0)
+            fields.update({
+                f"pkts_{side}": total(mask),
+                f"bytes_{side}": total(np.where(mask, sizes, 0.0)),
+                f"large_{side}": total(mask & (sizes > LARGE_PACKET_BYTES)),
+                f"small_{side}": total(mask & (sizes < SMALL_PACKET_BYTES)),
+                f"iat_n_{side}": total(has_iat),
+                f"iat_sum_{side}": total(iat0),
+                f"iat_sq_{side}": total(iat0 * iat0),
+            })
+            side_times = np.where(mask, times, np.nan)
+            fields[f"first_{side}"] = np.fmin.reduceat(side_times, starts)
+            fields[f"last_{side}"] = np.fmax.reduceat(side_times, starts)
+
+        # Rate bins on the absolute grid: keep the two edge bins apart so
+        # that a neighbouring slice can complete them
+        abs_bin = np.floor(times / rate_bin).astype(np.int64)
+        change = np.ones(len(order), dtype=bool)
+        change[1:] = (group[1:] != group[:-1]) | (abs_bin[1:] != abs_bin[:-1])
+        pair_starts = np.flatnonzero(change)
+        pair_group = group[pair_starts]
+        pair_bytes = np.add.reduceat(sizes, pair_starts)
+        first_pair = np.searchsorted(pair_group, np.arange(n_flows))
+        last_pair = np.append(first_pair[1:], len(pair_starts)) - 1
+        edge_sq = pair_bytes[first_pair] ** 2 + np.where(
+            last_pair > first_pair, pair_bytes[last_pair] ** 2, 0.0)
+        fields.update({
+            "first_bin": abs_bin[pair_starts[first_pair]].astype(np.float64),
+            "first_bin_bytes": pair_bytes[first_pair],
+            "last_bin": abs_bin[pair_starts[last_pair]].astype(np.float64),
+            "last_bin_bytes": pair_bytes[last_pair],
+            "inner_bin_sq": np.bincount(pair_group, weights=pair_bytes ** 2,
+                                        minlength=n_flows) - edge_sq,
+        })
+        partials = cls(fields, iat_values, iat_flows, np.full((n_flows, 2), None, dtype=object),
+                       rate_bin, **config)
+        partials._sketch_large_flows(random.Random())
+        return partials
+
+    # ------------------------------------------------------------------
+    # Merging
+    # ------------------------------------------------------------------
+    @classmethod
+    def merge(cls, parts) -> "FlowPartials":
+        """
+        Combine partials of consecutive, time-ordered slices of the same
+        capture (`parts[i]` precedes `parts[i + 1]`).
+        """
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        rate_bin = parts[0].rate_bin
+        f = {name: np.concatenate([p.fields[name] for p in parts]) for name in PARTIAL_FIELDS}
+        sketches = np.concatenate([p.sketches for p in parts])
+        sizes = [len(p) for p in parts]
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        slice_id = np.repeat(np.arange(len(parts)), sizes)
+
+        # Same key order as FlowIndex; slices stay in time order per flow
+        order = np.lexsort([slice_id] + [f[name] for name in reversed(KEY_FIELDS)])
+        f = {name: values[order] for name, values in f.items()}
+        sketches = sketches[order]
+        changed = np.zeros(len(order), dtype=bool)
+        changed[0] = True
+        for name in KEY_FIELDS:
+            changed[1:] |= f[name][1:] != f[name][:-1]
+        starts = np.flatnonzero(changed)
+        n_flows = len(starts)
+        counts = np.diff(np.append(starts, len(order)))
+        group = np.repeat(np.arange(n_flows), counts)
+        # Merged flow of every input row (in concatenation order)
+        row_flow = np.empty(len(order), dtype=np.int64)
+        row_flow[order] = group
+
+        out = {name: f[name][starts] for name in KEY_FIELDS}
+        for name in SUM_FIELDS:
+            out[name] = np.add.reduceat(f[name], starts)
+
+        # Chan et al. merge of the packet size variance
+        mean = out["size_sum"] / out["count"]
+        row_mean = f["size_sum"] / f["count"]
+        out["size_m2"] = np.add.reduceat(
+            f["size_m2"] + f["count"] * (row_mean - mean[group]) ** 2, starts)
+        out["size_min"] = np.minimum.reduceat(f["size_min"], starts)
+        out["size_max"] = np.maximum.reduceat(f["size_max"], starts)
+        out["first_time"] = np.minimum.reduceat(f["first_time"], starts)
+        out["last_time"] = np.maximum.reduceat(f["last_time"], starts)
+        out["opener_a"] = f["opener_a"][starts]
+
+        # Inter-arrival gaps that straddle two slices
+        rng = random.Random()
+        merged_sketches = np.full((n_flows, 2), None, dtype=object)
+        iat_values, iat_flows = [], []
+        for column, side in enumerate("ab"):
+            last = f[f"last_{side}"]
+            seen = np.where(~np.isnan(last), np.arange(len(order)), -1)
+            prev = np.concatenate(([-1], np.maximum.accumulate(seen)[:-1]))
+            prev_same = (prev >= starts[group]) & ~np.isnan(f[f"first_{side}"])
+            gap = np.where(prev_same, f[f"first_{side}"] - last[np.maximum(prev, 0)], 0.0)
+            out[f"iat_n_{side}"] = out[f"iat_n_{side}"] + np.bincount(
+                group, weights=prev_same, minlength=n_flows)
+            out[f"iat_sum_{side}"] = out[f"iat_sum_{side}"] + np.bincount(
+                group, weights=gap, minlength=n_flows)
+            out[f"iat_sq_{side}"] = out[f"iat_sq_{side}"] + np.bincount(
+                group, weights=gap * gap, minlength=n_flows)
+            out[f"first_{side}"] = np.fmin.reduceat(f[f"first_{side}"], starts)
+            out[f"last_{side}"] = np.fmax.reduceat(last, starts)
+
+            # Exact values follow their rows; gaps join them (order is irrelevant)
+            iat_values.append(np.concatenate([p.iat_values[column] for p in parts]
+                                             + [gap[prev_same]]))
+            iat_flows.append(np.concatenate([row_flow[offset + p.iat_flows[column]]
+                                             for offset, p in zip(offsets, parts)]
+                                            + [group[prev_same]]))
+            for row in np.flatnonzero(~np.equal(sketches[:, column], None)):
+                flow = group[row]
+                if merged_sketches[flow, column] is None:
+                    merged_sketches[flow, column] = make_quantile_sketch("kll", parts[0].sketch_k, rng)
+                merged_sketches[flow, column].merge(sketches[row, column])
+
+        # Edge bins of adjacent slices may be the same bin: sum those first
+        edge_bin = np.concatenate((f["first_bin"], f["last_bin"]))
+        edge_bytes = np.concatenate((f["first_bin_bytes"],
+                                     np.where(f["last_bin"] > f["first_bin"],
+                                              f["last_bin_bytes"], 0.0)))
+        edge_group = np.concatenate((group, group))
+        edge_order = np.lexsort((edge_bin, edge_group))
+        edge_bin, edge_bytes, edge_group = (edge_bin[edge_order], edge_bytes[edge_order],
+                                            edge_group[edge_order])
+        edge_change = np.ones(len(edge_bin), dtype=bool)
+        edge_change[1:] = (edge_group[1:] != edge_group[:-1]) | (edge_bin[1:] != edge_bin[:-1])
+        edge_starts = np.flatnonzero(edge_change)
+        bin_bytes = np.add.reduceat(edge_bytes, edge_starts)
+        bin_group = edge_group[edge_starts]
+        bin_id = edge_bin[edge_starts]
+        first_edge = np.searchsorted(bin_group, np.arange(n_flows))
+        last_edge = np.append(first_edge[1:], len(bin_group)) - 1
+
+        out["first_bin"] = bin_id[first_edge]
+        out["first_bin_bytes"] = bin_bytes[first_edge]
+        out["last_bin"] = bin_id[last_edge]
+        out["last_bin_bytes"] = bin_bytes[last_edge]
+        edge_sq = np.bincount(bin_group, weights=bin_bytes ** 2, minlength=n_flows)
+        kept_sq = bin_bytes[first_edge] ** 2 + np.where(
+            last_edge > first_edge, bin_bytes[last_edge] ** 2, 0.0)
+        out["inner_bin_sq"] = (np.add.reduceat(f["inner_bin_sq"], starts)
+                               + edge_sq - kept_sq)
+        merged = cls(out, iat_values, iat_flows, merged_sketches, rate_bin, **parts[0]._config())
+        merged._sketch_large_flows(rng)
+        return merged
+
+    # ------------------------------------------------------------------
+    # Finalizing
+    # ------------------------------------------------------------------
+    def to_frame(self) -> pd.DataFrame:
+        """Feature table with the columns of `extract_flow_features`."""
+        f = self.fields
+        if not len(self):
+            return pd.DataFrame(columns=["src", "sport", "dst", "dport", "proto", "start_time"]
+                                + SUMMARY_COLUMNS + DIRECTION_COLUMNS)
+        opener_a = f["opener_a"].astype(bool)
+        count = f["count"]
+        span = f["last_time"] - f["first_time"]
+
+        a_addr = np.column_stack((f["a_hi"], f["a_lo"])).astype(np.uint64)
+        b_addr = np.column_stack((f["b_hi"], f["b_lo"])).astype(np.uint64)
+        src = np.where(opener_a[:, None], a_addr, b_addr)
+        dst = np.where(opener_a[:, None], b_addr, a_addr)
+        sport = np.where(opener_a, f["a_port"], f["b_port"]).astype(np.int64)
+        dport = np.where(opener_a, f["b_port"], f["a_port"]).astype(np.int64)
+
+        # Direction from the merged evidence, as infer_downstream
+        sign = np.where(opener_a, 1.0, -1.0)
+        handshake = sign * (f["syn_a"] - f["syn_b"] + f["synack_b"] - f["synack_a"])
+        client = opener_is_client(handshake, sport, dport)
+        down_a = client != opener_a
+
+        def side(name):
+            return np.where(down_a, f[f"{name}_a"], f[f"{name}_b"])
+
+        quic = (f["proto"] == PROTO_UDP) & ((f["a_port"] == QUIC_PORT) | (f["b_port"] == QUIC_PORT))
+        stats = {
+            "down_count": side("pkts"),
+            "down_bytes": side("bytes"),
+            "up_bytes": np.where(down_a, f["bytes_b"], f["bytes_a"]),
+            "down_large": side("large"),
+            "down_small": side("small"),
+            "iat_count": side("iat_n"),
+            "iat_sum": side("iat_sum"),
+            "iat_sq": side("iat_sq"),
+            "tcp_any": f["tcp"],
+            "quic_any": quic.astype(np.float64),
+        }
+        totals = np.column_stack([stats[name] for name in DIRECTION_STATS])
+        p95 = np.where(down_a, self.iat_percentile(0), self.iat_percentile(1))
+
+        n_bins = f["last_bin"] - f["first_bin"] + 1
+        bin_sq = f["inner_bin_sq"] + f["first_bin_bytes"] ** 2 + np.where(
+            f["last_bin"] > f["first_bin"], f["last_bin_bytes"] ** 2, 0.0)
+        burst = burstiness_from_bins(f["size_sum"], bin_sq, n_bins)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.where(count > 1, np.sqrt(f["size_m2"] / (count - 1)), np.nan)
+        columns = {
+            "src": format_addresses(src),
+            "sport": sport,
+            "dst": format_addresses(dst),
+            "dport": dport,
+            "proto": f["proto"].astype(np.int64),
+            "start_time": f["first_time"],
+            "avg_packet_size": f["size_sum"] / count,
+            "std_packet_size": std,
+            "min_packet_size": f["size_min"],
+            "max_packet_size": f["size_max"],
+            "avg_inter_arrival": span / count,
+            "packet_count": count.astype(np.int64),
+            "tcp_fraction": f["tcp"] / count,
+            "udp_fraction": f["udp"] / count,
+            "duration": np.where(count > 1, span, 0.0),
+        }
+        columns.update(direction_features_from_stats(totals, count, n_bins * self.rate_bin,
+                                                     burst, p95))
+        return pd.DataFrame(columns)
+
@@ -0,0 +1,111 @@
+"""
+Live Flow Table
+---------------
+`FlowIndex` numbers flows within one batch of packets. A live capture
+arrives in many small chunks, so flows need ids (and a client/server
+decision) that stay stable from chunk to chunk. `LiveFlowTable` maps the
+canonical 5-tuple of every flow to a persistent id, fixes its direction
+the first time the flow is seen and forgets flows that stay idle.
+
+Usage:
+    from src.reel_traffic_detection.data.live_flows import LiveFlowTable
+
+    table = LiveFlowTable(idle_timeout=60.0)
+    for chunk in iter_pcap_chunks(sys.stdin.buffer):
+        group, downstream = table.assign(chunk)
+        rows = engine.push(chunk, group, downstream)
+"""
+
+import numpy as np
+
+from src.reel_traffic_detection.data.direction_features import infer_downstream
+from src.reel_traffic_detection.data.flow_features import FlowIndex
+from src.reel_traffic_detection.data.pcap_parser import format_address
+
+
+class LiveFlowTable:
+    def __init__(self, idle_timeout: float = 60.0):
+        """
+        Initialize an empty flow table.
+
+        Args:
+            idle_timeout: Seconds (capture time) without packets after which
+                a flow's id is released; a later packet starts a new flow.
+        """
+        self.idle_timeout = idle_timeout
+        self._ids = {}        # canonical key -> flow id
+        self._flows = {}      # flow id -> [key, a_is_client, last_seen]
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._flows)
+
+    def assign(self, cols):
+        """
+        Give every packet of a chunk its persistent flow id and direction.
+
+        Returns:
+            tuple(group, downstream): per-packet flow ids (-1 for non-IP
+            packets) and downstream flags.
+        """
+        index = FlowIndex(cols)
+        group = np.full(len(cols), -1, dtype=np.int64)
+        downstream = np.zeros(len(cols), dtype=bool)
+        if not index.n_flows:
+            return group, downstream
+
+        first = index.first
+        a_first = index.a_side[first]
+        keys = np.column_stack([
+            np.where(a_first, cols.src[first, 0], cols.dst[first, 0]),
+            np.where(a_first, cols.src[first, 1], cols.dst[first, 1]),
+            np.where(a_first, cols.sport[first], cols.dport[first]).astype(np.uint64),
+            np.where(a_first, cols.dst[first, 0], cols.src[first, 0]),
+            np.where(a_first, cols.dst[first, 1], cols.src[first, 1]),
+            np.where(a_first, cols.dport[first], cols.sport[first]).astype(np.uint64),
+            cols.proto[first].astype(np.uint64),
+        ])
+        last_seen = np.maximum.reduceat(cols.timestamp[index.order], index.starts)
+        chunk_down = None
+
+        flow_ids = np.empty(index.n_flows, dtype=np.int64)
+        a_is_client = np.empty(index.n_flows, dtype=bool)
+        for i, key in enumerate(map(tuple, keys.tolist())):
+            flow = self._ids.get(key)
+            if flow is None:
+                if chunk_down is None:
+                    chunk_down = infer_downstream(cols, index)
+                # The opener is the client unless its packet flows downstream
+                opener_client = not chunk_down[first[i]]
+                client_a = bool(a_first[i]) == opener_client
+                flow = self._next_id
+                self._next_id += 1
+                self._ids[key] = flow
+                self._flows[flow] = [key, client_a, last_seen[i]]
+            state = self._flows[flow]
+            state[2] = max(state[2], last_seen[i])
+            flow_ids[i] = flow
+            a_is_client[i] = state[1]
+
+        in_flow = index.flow_of >= 0
+        local = index.flow_of[in_flow]
+        group[in_flow] = flow_ids[local]
+        downstream[in_flow] = index.a_side[in_flow] != a_is_client[local]
+        return group, downstream
+
+    def describe(self, flow: int) -> dict:
+        """Client/server endpoints and protocol of a live flow id."""
+        key, client_a, _ = self._flows[flow]
+        a = (format_address((key[0], key[1])), int(key[2]))
+        b = (format_address((key[3], key[4])), int(key[5]))
+        client, server = (a, b) if client_a else (b, a)
+        return {"client": client[0], "client_port": client[1],
+                "server": server[0], "server_port": server[1], "proto": int(key[6])}
+
+    def expire(self, now: float) -> list:
+        """Release flows idle since before `now - idle_timeout`; return their ids."""
+        stale = [flow for flow, state in self._flows.items()
+                 if now - state[2] > self.idle_timeout]
+        for flow in stale:
+            del self._ids[self._flows.pop(flow)[0]]
+        return stale
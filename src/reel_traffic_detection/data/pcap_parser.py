@@ -0,0 +1,514 @@
+"""
+Fast PCAP Header Parser
+-----------------------
+Decodes only the Ethernet / IPv4 / IPv6 / TCP / UDP header fields needed
+for feature extraction, straight from raw pcap record bytes, into NumPy
+columns. No per-packet Python objects are created: record boundaries are
+indexed once and every header field is then gathered for all packets with
+vectorized indexing.
+
+Usage:
+    from src.reel_traffic_detection.data.pcap_parser import parse_pcap
+
+    cols = parse_pcap("data/sample.pcap")
+    print(len(cols), cols.timestamp[:5], cols.proto[:5])
+
+    # Bounded memory: decode the capture block by block
+    for chunk in iter_pcap_chunks("data/large.pcap"):
+        ...
+
+    # Independent byte ranges aligned to record boundaries (for workers)
+    for start, end in split_pcap("data/large.pcap", chunk_bytes=64 << 20):
+        for chunk in iter_pcap_chunks("data/large.pcap", start=start, end=end):
+            ...
+"""
+
+import ipaddress
+import os
+import struct
+import numpy as np
+import pandas as pd
+
+
+# Classic pcap magic numbers -> (struct byte order, timestamp fraction scale)
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+GLOBAL_HEADER_LEN = 24
+RECORD_HEADER_LEN = 16
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+SUPPORTED_LINKTYPES = {
+    LINKTYPE_NULL, LINKTYPE_ETHERNET, LINKTYPE_RAW, LINKTYPE_LINUX_SLL,
+    LINKTYPE_IPV4, LINKTYPE_IPV6, LINKTYPE_LINUX_SLL2,
+}
+
+PROTO_TCP = 6
+PROTO_UDP = 17
+IPV4_MAPPED_PREFIX = np.uint64(0xFFFF << 32)
+_IPV6_EXT_HEADERS = (0, 43, 60)   # hop-by-hop, routing, destination options
+_IPV6_FRAGMENT = 44
+MAX_RECORD_LEN = 262144      # libpcap's largest snapshot length
+_BOUNDARY_CHAIN = 8          # consecutive sane headers that confirm a boundary
+
+
+class UnsupportedCaptureError(ValueError):
+    """Raised when a file is not a classic pcap with a supported link type."""
+
+
+class PacketColumns:
+    """
+    Columnar packet header table: one NumPy array per field.
+
+    Addresses are stored as (N, 2) uint64 arrays (high, low 64 bits of the
+    IPv6 address); IPv4 addresses use the IPv4-mapped form ::ffff:a.b.c.d
+    so both families share one representation. Non-IP packets have
+    `ip_version == 0` and zero addresses/ports.
+    """
+
+    FIELDS = ("timestamp", "length", "wire_length", "ip_version", "proto",
+              "src", "dst", "sport", "dport", "tcp_flags")
+
+    def __init__(self, timestamp, length, wire_length, ip_version, proto,
+                 src, dst, sport, dport, tcp_flags):
+        self.timestamp = timestamp
+        self.length = length
+        self.wire_length = wire_length
+        self.ip_version = ip_version
+        self.proto = proto
+        self.src = src
+        self.dst = dst
+        self.sport = sport
+        self.dport = dport
+        self.tcp_flags = tcp_flags
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            timestamp=np.empty(0, np.float64),
+            length=np.empty(0, np.int64),
+            wire_length=np.empty(0, np.int64),
+            ip_version=np.empty(0, np.uint8),
+            proto=np.empty(0, np.uint8),
+            src=np.empty((0, 2), np.uint64),
+            dst=np.empty((0, 2), np.uint64),
+            sport=np.empty(0, np.uint16),
+            dport=np.empty(0, np.uint16),
+            tcp_flags=np.empty(0, np.uint8),
+        )
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        return cls(**{f: np.concatenate([getattr(p, f) for p in parts])
+                      for f in cls.FIELDS})
+
+    def take(self, index):
+        """Return a new table holding the rows selected by `index`."""
+        return PacketColumns(**{f: getattr(self, f)[index] for f in self.FIELDS})
+
+    def protocol_labels(self) -> np.ndarray:
+        """Protocol names as used by `FeatureExtractor` ("TCP"/"UDP"/"OTHER")."""
+        labels = np.full(len(self), "OTHER", dtype=object)
+        labels[self.proto == PROTO_TCP] = "TCP"
+        labels[self.proto == PROTO_UDP] = "UDP"
+        return labels
+
+    def to_frame(self) -> pd.DataFrame:
+        """Per-packet DataFrame in the layout of `FeatureExtractor` records."""
+        return pd.DataFrame({
+            "packet_size": self.length,
+            "protocol": self.protocol_labels(),
+            "src": [format_address(a) if v else None
+                    for a, v in zip(self.src, self.ip_version)],
+            "dst": [format_address(a) if v else None
+                    for a, v in zip(self.dst, self.ip_version)],
+            "sport": self.sport,
+            "dport": self.dport,
+            "time": self.timestamp,
+        })
+
+
+def format_address(addr) -> str:
+    """Render an (high, low) uint64 address pair as an IPv4/IPv6 string."""
+    hi, lo = int(addr[0]), int(addr[1])
+    if hi == 0 and (lo >> 32) == 0xFFFF:
+        return str(ipaddress.IPv4Address(lo & 0xFFFFFFFF))
+    return str(ipaddress.IPv6Address((hi << 64) | lo))
+
+
+def format_addresses(addrs) -> list:
+    """Vectorized `format_address` over an (N, 2) address array."""
+    addrs = np.asarray(addrs, dtype=np.uint64).reshape(-1, 2)
+    is_v4 = (addrs[:, 0] == 0) & ((addrs[:, 1] >> np.uint64(32)) == 0xFFFF)
+    v4 = (addrs[:, 1] & np.uint64(0xFFFFFFFF)).astype(np.int64)
+    octets = [((v4 >> shift) & 0xFF).tolist() for shift in (24, 16, 8, 0)]
+    out = [f"{a}.{b}.{c}.{d}" for a, b, c, d in zip(*octets)]
+    for i in np.flatnonzero(~is_v4):
+        out[i] = format_address(addrs[i])
+    return out
+
+
+def read_global_header(header: bytes):
+    """
+    Parse the 24-byte pcap global header.
+
+    Returns:
+        tuple(byte_order, ts_scale, linktype)
+    """
+    if len(header) < GLOBAL_HEADER_LEN or header[:4] not in PCAP_MAGIC:
+        raise UnsupportedCaptureError("not a classic pcap file")
+    byte_order, ts_scale = PCAP_MAGIC[header[:4]]
+    linktype = struct.unpack(byte_order + "I", header[20:24])[0] & 0x0FFFFFFF
+    return byte_order, ts_scale, linktype
+
+
+def probe_pcap(filepath: str):
+    """Return the link type of a classic pcap file, or None if unreadable."""
+    try:
+        with open(filepath, "rb") as f:
+            return read_global_header(f.read(GLOBAL_HEADER_LEN))[2]
+    except (OSError, UnsupportedCaptureError):
+        return None
+
+
+def index_records(buf, start: int, byte_order: str, end: int = None):
+    """
+    Walk record headers in `buf` and return arrays describing every
+    complete record between `start` and `end`.
+
+    Returns:
+        tuple(offsets, ts_sec, ts_frac, caplen, wirelen, next_offset) where
+        offsets point at the packet bytes (after the record header) and
+        next_offset is where the first incomplete record begins.
+    """
+    end = len(buf) if end is None else end
+    caplen_at = struct.Struct(byte_order + "I").unpack_from
+    starts = []
+    pos = start
+    # Only the record lengths are walked in Python; all header fields are
+    # gathered afterwards in one vectorized step.
+    while pos + RECORD_HEADER_LEN <= end:
+        data_end = pos + RECORD_HEADER_LEN + caplen_at(buf, pos + 8)[0]
+        if data_end > end:
+            break
+        starts.append(pos)
+        pos = data_end
+
+    starts = np.array(starts, dtype=np.int64)
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    hdrs = np.ascontiguousarray(raw[starts[:, None] + np.arange(RECORD_HEADER_LEN)])
+    hdrs = hdrs.view(byte_order + "u4").astype(np.int64).reshape(-1, 4)
+    return (starts + RECORD_HEADER_LEN, hdrs[:, 0], hdrs[:, 1],
+            hdrs[:, 2], hdrs[:, 3], pos)
+
+
+def _gather_u8(buf, pos, valid):
+    return np.where(valid, buf[np.where(valid, pos, 0)], 0).astype(np.uint8)
+
+
+def _gather_be(buf, pos, valid, nbytes):
+    """Gather big-endian unsigned integers of `nbytes` at each position."""
+    safe = np.where(valid, pos, 0)
+    raw = np.ascontiguousarray(buf[safe[:, None] + np.arange(nbytes)])
+    out = raw.view(">u%d" % nbytes).ravel().astype(np.uint64)
+    out[~valid] = 0
+    return out
+
+
+def decode_headers(buf, offsets, caplen, linktype: int, byte_order: str = "<"):
+    """
+    Vectorized decode of L2/L3/L4 header fields for records in `buf`.
+
+    Args:
+        buf: uint8 NumPy array (or buffer) holding the records.
+        offsets: start of each packet's bytes within `buf`.
+        caplen: captured length of each packet.
+        linktype: pcap link type shared by all records.
+        byte_order: capture byte order (only used by LINKTYPE_NULL).
+
+    Returns:
+        dict with ip_version, proto, src, dst, sport, dport, tcp_flags arrays.
+    """
+    if linktype not in SUPPORTED_LINKTYPES:
+        raise UnsupportedCaptureError(f"unsupported link type {linktype}")
+    buf = np.frombuffer(buf, dtype=np.uint8) if not isinstance(buf, np.ndarray) else buf
+    n = len(offsets)
+    end = offsets + caplen
+
+    def has(pos, nbytes):
+        return pos + nbytes <= end
+
+    # --- Link layer: locate the network header ---
+    if linktype == LINKTYPE_ETHERNET:
+        ethertype = _gather_be(buf, offsets + 12, has(offsets + 12, 2), 2)
+        vlan = (ethertype == 0x8100) | (ethertype == 0x88A8)
+        inner = _gather_be(buf, offsets + 16, vlan & has(offsets + 16, 2), 2)
+        ethertype = np.where(vlan, inner, ethertype)
+        l3 = offsets + np.where(vlan, 18, 14)
+        is_ip4 = ethertype == 0x0800
+        is_ip6 = ethertype == 0x86DD
+    elif linktype in (LINKTYPE_LINUX_SLL, LINKTYPE_LINUX_SLL2):
+        proto_off = 14 if linktype == LINKTYPE_LINUX_SLL else 0
+        ethertype = _gather_be(buf, offsets + proto_off, has(offsets + proto_off, 2), 2)
+        l3 = offsets + (16 if linktype == LINKTYPE_LINUX_SLL else 20)
+        is_ip4 = ethertype == 0x0800
+        is_ip6 = ethertype == 0x86DD
+    elif linktype == LINKTYPE_NULL:
+        family = _gather_be(buf, offsets, has(offsets, 4), 4).astype(np.uint32)
+        if byte_order == "<":
+            family = family.byteswap()
+        l3 = offsets + 4
+        is_ip4 = family == 2
+        is_ip6 = np.isin(family, (24, 28, 30))
+    else:
+        l3 = offsets
+        version = _gather_u8(buf, l3, has(l3, 1)) >> 4
+        is_ip4 = (version == 4) & (linktype != LINKTYPE_IPV6)
+        is_ip6 = (version == 6) & (linktype != LINKTYPE_IPV4)
+
+    is_ip4 &= has(l3, 20)
+    is_ip6 &= has(l3, 40)
+
+    # --- Network layer ---
+    proto = np.zeros(n, np.uint8)
+    src = np.zeros((n, 2), np.uint64)
+    dst = np.zeros((n, 2), np.uint64)
+    l4 = l3.copy()
+    first_fragment = np.ones(n, dtype=bool)
+
+    ihl = (_gather_u8(buf, l3, is_ip4) & 0x0F).astype(np.int64) * 4
+    proto[is_ip4] = _gather_u8(buf, l3 + 9, is_ip4)[is_ip4]
+    frag = _gather_be(buf, l3 + 6, is_ip4, 2) & 0x1FFF
+    first_fragment &= ~(is_ip4 & (frag != 0))
+    src[is_ip4, 1] = IPV4_MAPPED_PREFIX | _gather_be(buf, l3 + 12, is_ip4, 4)[is_ip4]
+    dst[is_ip4, 1] = IPV4_MAPPED_PREFIX | _gather_be(buf, l3 + 16, is_ip4, 4)[is_ip4]
+    l4[is_ip4] += ihl[is_ip4]
+
+    if is_ip6.any():
+        next_hdr = _gather_u8(buf, l3 + 6, is_ip6)
+        for col, off in ((src, 8), (dst, 24)):
+            col[is_ip6, 0] = _gather_be(buf, l3 + off, is_ip6, 8)[is_ip6]
+            col[is_ip6, 1] = _gather_be(buf, l3 + off + 8, is_ip6, 8)[is_ip6]
+        l4[is_ip6] += 40
+        # Skip a bounded number of extension headers, all packets at once
+        for _ in range(3):
+            ext = is_ip6 & np.isin(next_hdr, _IPV6_EXT_HEADERS) & has(l4, 2)
+            fragment = is_ip6 & (next_hdr == _IPV6_FRAGMENT) & has(l4, 8)
+            if not (ext.any() or fragment.any()):
+                break
+            hop = ext | fragment
+            ext_len = np.where(ext, (_gather_u8(buf, l4 + 1, ext).astype(np.int64) + 1) * 8, 8)
+            frag_off = _gather_be(buf, l4 + 2, fragment, 2) >> 3
+            first_fragment &= ~(fragment & (frag_off != 0))
+            next_hdr = np.where(hop, _gather_u8(buf, l4, hop), next_hdr)
+            l4 = np.where(hop, l4 + ext_len, l4)
+        proto[is_ip6] = next_hdr[is_ip6]
+
+    # --- Transport layer ---
+    is_l4 = ((proto == PROTO_TCP) | (proto == PROTO_UDP)) & first_fragment & has(l4, 4)
+    sport = _gather_be(buf, l4, is_l4, 2).astype(np.uint16)
+    dport = _gather_be(buf, l4 + 2, is_l4, 2).astype(np.uint16)
+    is_tcp_hdr = is_l4 & (proto == PROTO_TCP) & has(l4, 14)
+    tcp_flags = _gather_u8(buf, l4 + 13, is_tcp_hdr)
+
+    ip_version = np.where(is_ip4, 4, np.where(is_ip6, 6, 0)).astype(np.uint8)
+    return {
+        "ip_version": ip_version,
+        "proto": proto,
+        "src": src,
+        "dst": dst,
+        "sport": sport,
+        "dport": dport,
+        "tcp_flags": tcp_flags,
+    }
+
+
+def decode_records(buf, offsets, ts_sec, ts_frac, caplen, wirelen,
+                   linktype: int, byte_order: str, ts_scale: float) -> PacketColumns:
+    """Build a `PacketColumns` table for indexed records in `buf`."""
+    fields = decode_headers(buf, offsets, caplen, linktype, byte_order)
+    return PacketColumns(
+        timestamp=ts_sec.astype(np.float64) + ts_frac.astype(np.float64) * ts_scale,
+        length=caplen.astype(np.int64),
+        wire_length=wirelen.astype(np.int64),
+        **fields,
+    )
+
+
+def _plausible_chain(buf, pos: int, byte_order: str, ts_scale: float, ref_sec: int) -> bool:
+    """
+    True if `pos` starts a run of sane record headers: non-empty lengths
+    within the snapshot limit, fractions below one second and timestamps close to
+    `ref_sec`. The run must be _BOUNDARY_CHAIN records long or reach the
+    end of `buf` exactly.
+    """
+    header = struct.Struct(byte_order + "IIII")
+    frac_limit = round(1.0 / ts_scale)
+    for _ in range(_BOUNDARY_CHAIN):
+        if pos == len(buf):
+            return True
+        if pos + RECORD_HEADER_LEN > len(buf):
+            return False
+        ts_sec, ts_frac, caplen, wirelen = header.unpack_from(buf, pos)
+        if (ts_frac >= frac_limit or not 0 < caplen <= wirelen <= MAX_RECORD_LEN
+                or abs(ts_sec - ref_sec) > 86400):
+            return False
+        pos += RECORD_HEADER_LEN + caplen
+        if pos > len(buf):
+            return False
+    return True
+
+
+def split_pcap(filepath: str, chunk_bytes: int = 64 << 20) -> list:
+    """
+    Cut a classic pcap file into byte ranges of roughly `chunk_bytes` that
+    start and end on record boundaries, so each range can be decoded
+    independently with `iter_pcap_chunks(..., start=, end=)`.
+
+    Boundaries are found by scanning forward from each nominal cut for a
+    chain of plausible record headers; the first range starts right after
+    the global header.
+
+    Returns:
+        List of (start, end) byte offsets covering every record once.
+    """
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        byte_order, ts_scale, _ = read_global_header(f.read(GLOBAL_HEADER_LEN))
+        first = f.read(RECORD_HEADER_LEN)
+        if len(first) < RECORD_HEADER_LEN:
+            return [(GLOBAL_HEADER_LEN, size)]
+        ref_sec = struct.unpack(byte_order + "I", first[:4])[0]
+
+        cuts = [GLOBAL_HEADER_LEN]
+        longest = RECORD_HEADER_LEN + MAX_RECORD_LEN
+        for nominal in range(GLOBAL_HEADER_LEN + chunk_bytes, size, chunk_bytes):
+            if nominal <= cuts[-1]:
+                continue
+            f.seek(nominal)
+            buf = f.read((_BOUNDARY_CHAIN + 1) * longest)
+            # Every candidate needs room for a full chain after it, unless
+            # the buffer already reaches the end of the file
+            scan = len(buf) if nominal + len(buf) >= size else len(buf) - _BOUNDARY_CHAIN * longest
+            for pos in range(scan):
+                if _plausible_chain(buf, pos, byte_order, ts_scale, ref_sec):
+                    cuts.append(nominal + pos)
+                    ref_sec = struct.unpack_from(byte_order + "I", buf, pos)[0]
+                    break
+    return list(zip(cuts, cuts[1:] + [size]))
+
+
+def iter_pcap_chunks(source, block_size: int = 16 << 20, start: int = None, end: int = None):
+    """
+    Decode a classic pcap file or binary stream block by block.
+
+    Memory stays bounded by `block_size` plus one record, so arbitrarily
+    large captures can be processed.
+
+    Args:
+        source: File path (including a named pipe) or binary file-like
+            object, e.g. `sys.stdin.buffer`, positioned at the start of the
+            pcap global header.
+        block_size: Bytes read per block.
+        start, end: Optional byte range to decode (see `split_pcap`);
+            `start` must be a record boundary. Requires a seekable source.
+
+    Yields:
+        PacketColumns for the complete records of each block.
+    """
+    f = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        byte_order, ts_scale, linktype = read_global_header(f.read(GLOBAL_HEADER_LEN))
+        if linktype not in SUPPORTED_LINKTYPES:
+            raise UnsupportedCaptureError(f"unsupported link type {linktype}")
+        if start is not None:
+            f.seek(start)
+        remaining = None if end is None else end - (start or GLOBAL_HEADER_LEN)
+
+        # read1 returns whatever a pipe has buffered instead of waiting
+        # for a full block, so live streams are decoded as they arrive
+        read = getattr(f, "read1", f.read)
+        pending = b""
+        while True:
+            size = block_size if remaining is None else min(block_size, remaining)
+            block = read(size) if size > 0 else b""
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            buf = pending + block if pending else block
+            offsets, ts_sec, ts_frac, caplen, wirelen, next_pos = index_records(buf, 0, byte_order)
+            pending = buf[next_pos:]
+            if len(offsets):
+                yield decode_records(np.frombuffer(buf, dtype=np.uint8), offsets,
+                                     ts_sec, ts_frac, caplen, wirelen,
+                                     linktype, byte_order, ts_scale)
+    finally:
+        if f is not source:
+            f.close()
+
+
+def parse_pcap(filepath: str) -> PacketColumns:
+    """Decode a whole classic pcap file into a single `PacketColumns` table."""
+    return PacketColumns.concat(list(iter_pcap_chunks(filepath)))
+
+
+def columns_from_packets(packets) -> PacketColumns:
+    """
+    Scapy fallback: build `PacketColumns` from dissected packets, for link
+    types or capture formats the fast decoder does not handle.
+    """
+    from scapy.all import raw, IP, IPv6, TCP, UDP
+
+    n = len(packets)
+    cols = PacketColumns.empty()
+    cols.timestamp = np.zeros(n, np.float64)
+    cols.length = np.zeros(n, np.int64)
+    cols.wire_length = np.zeros(n, np.int64)
+    cols.ip_version = np.zeros(n, np.uint8)
+    cols.proto = np.zeros(n, np.uint8)
+    cols.src = np.zeros((n, 2), np.uint64)
+    cols.dst = np.zeros((n, 2), np.uint64)
+    cols.sport = np.zeros(n, np.uint16)
+    cols.dport = np.zeros(n, np.uint16)
+    cols.tcp_flags = np.zeros(n, np.uint8)
+
+    def split(addr):
+        ip = ipaddress.ip_address(addr)
+        value = int(ip) if ip.version == 6 else (0xFFFF << 32) | int(ip)
+        return value >> 64, value & 0xFFFFFFFFFFFFFFFF
+
+    for i, pkt in enumerate(packets):
+        cols.timestamp[i] = float(pkt.time)
+        cols.length[i] = len(raw(pkt))
+        cols.wire_length[i] = getattr(pkt, "wirelen", None) or cols.length[i]
+        layer = pkt.getlayer(IP) or pkt.getlayer(IPv6)
+        if layer is None:
+            continue
+        cols.ip_version[i] = layer.version
+        cols.proto[i] = layer.proto if layer.version == 4 else layer.nh
+        cols.src[i] = split(layer.src)
+        cols.dst[i] = split(layer.dst)
+        l4 = pkt.getlayer(TCP) or pkt.getlayer(UDP)
+        if l4 is not None:
+            cols.proto[i] = PROTO_TCP if pkt.haslayer(TCP) else PROTO_UDP
+            cols.sport[i] = l4.sport
+            cols.dport[i] = l4.dport
+            if pkt.haslayer(TCP):
+                cols.tcp_flags[i] = int(pkt[TCP].flags)
+    return cols
@@ -0,0 +1,231 @@
+"""
+Streaming Quantile Sketches
+---------------------------
+Constant-memory percentile estimation for features such as
+`p95_iat_down`, so long-lived flows and live capture do not have to keep
+every per-packet value around.
+
+`KLLSketch` follows Karnin, Lang & Liberty (2016): values enter a stack of
+compactors; when a level overflows it is sorted and every other item
+(random offset) is promoted to the next level with twice the weight. The
+rank error is about 1.7 / k with O(k) retained items, and two sketches
+merge by concatenating their levels, so per-shard or per-bucket results
+combine without revisiting the data.
+
+`ExactQuantiles` has the same interface but keeps every value; it is the
+default wherever results must match `np.percentile` bit for bit.
+
+Usage:
+    from src.reel_traffic_detection.data.quantile_sketch import KLLSketch
+
+    sketch = KLLSketch(k=200)
+    sketch.update_many(iat_values)
+    p95 = sketch.quantile(0.95)
+
+    merged = KLLSketch.merged([shard_a, shard_b])
+"""
+
+import math
+import random
+import numpy as np
+
+
+class ExactQuantiles:
+    """Reference backend: keeps every value, quantiles as `np.percentile`."""
+
+    def __init__(self):
+        self._chunks = []
+        self.count = 0
+
+    def update(self, value: float):
+        self.update_many(np.array([value], dtype=np.float64))
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._chunks.append(values)
+            self.count += len(values)
+
+    def spawn(self) -> "ExactQuantiles":
+        """Empty sketch with the same configuration."""
+        return ExactQuantiles()
+
+    def merge(self, other: "ExactQuantiles"):
+        self._chunks.extend(other._chunks)
+        self.count += other.count
+        return self
+
+    def values(self) -> np.ndarray:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.empty(0)
+
+    def quantile(self, q: float) -> float:
+        """Value at fraction `q` (0..1); NaN when empty."""
+        if not self.count:
+            return np.nan
+        return float(np.percentile(self.values(), 100.0 * q))
+
+    @property
+    def size(self) -> int:
+        """Number of retained values."""
+        return self.count
+
+    @classmethod
+    def merged(cls, sketches):
+        out = cls()
+        for sketch in sketches:
+            out.merge(sketch)
+        return out
+
+
+class KLLSketch:
+    C = 2.0 / 3.0   # capacity decay per level below the top
+
+    def __init__(self, k: int = 200, seed: int = None, rng: random.Random = None):
+        """
+        Initialize an empty KLL sketch.
+
+        Args:
+            k: Accuracy/size knob. The top compactor holds k items and the
+                sketch retains roughly 3k values; rank error ~ 1.7 / k.
+            seed: Optional seed for the compaction coin flips.
+            rng: Optional `random.Random` for the coin flips, shared by
+                many sketches instead of seeding one per sketch.
+        """
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self._levels = [np.empty(0)]
+        self._pending = []
+        self._rng = rng if rng is not None else random.Random(seed)
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def update(self, value: float):
+        if value == value:   # skip NaN
+            self._pending.append(float(value))
+            self.count += 1
+            if len(self._pending) >= self.k:
+                self._flush_pending()
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self._flush_pending()
+        self.count += len(values)
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+
+    def spawn(self) -> "KLLSketch":
+        """Empty sketch with the same configuration (and coin-flip source)."""
+        return KLLSketch(self.k, rng=self._rng)
+
+    def merge(self, other: "KLLSketch"):
+        """Fold another sketch into this one (in place) and return self."""
+        self._flush_pending()
+        other._flush_pending()
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for h, items in enumerate(other._levels):
+            if len(items):
+                self._levels[h] = np.concatenate((self._levels[h], items))
+        self.count += other.count
+        self._compress()
+        return self
+
+    @classmethod
+    def merged(cls, sketches, k: int = None):
+        sketches = list(sketches)
+        out = cls(k or (sketches[0].k if sketches else 200))
+        for sketch in sketches:
+            out.merge(sketch)
+        return out
+
+    def _flush_pending(self):
+        if self._pending:
+            self._levels[0] = np.concatenate((self._levels[0], self._pending))
+            self._pending = []
+            self._compress()
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * self.C ** depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            items = self._levels[h]
+            if len(items) > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is exact
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.getrandbits(1)::2]
+                self._levels[h] = keep
+                self._levels[h + 1] = np.concatenate((self._levels[h + 1], promoted))
+            h += 1
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    @property
+    def size(self) -> int:
+        """Number of retained values (memory footprint in items)."""
+        return sum(len(items) for items in self._levels) + len(self._pending)
+
+    def _weighted(self):
+        self._flush_pending()
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h)
+                                  for h, items in enumerate(self._levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimated value at fraction `q` (0..1); NaN when empty. While no
+        compaction has happened the result equals `np.percentile`.
+        """
+        if not self.count:
+            return np.nan
+        values, weights = self._weighted()
+        if len(self._levels) == 1:
+            return float(np.percentile(values, 100.0 * q))
+        # Same interpolation as np.percentile, on weighted ranks
+        cum = np.cumsum(weights) - 1.0
+        pos = q * (self.count - 1)
+        hi = min(int(np.searchsorted(cum, pos)), len(values) - 1)
+        lo = max(hi - 1, 0)
+        if hi == lo or pos >= cum[hi]:
+            return float(values[hi])
+        frac = max(pos - cum[lo], 0.0) / (cum[hi] - cum[lo])
+        return float(values[lo] * (1.0 - frac) + values[hi] * frac)
+
+    def rank(self, value: float) -> float:
+        """Estimated fraction of values <= `value`."""
+        if not self.count:
+            return np.nan
+        values, weights = self._weighted()
+        return float(weights[:np.searchsorted(values, value, side="right")].sum() / self.count)
+
+
+QUANTILE_BACKENDS = {"exact": ExactQuantiles, "kll": KLLSketch}
+
+
+def check_quantile_backend(kind: str):
+    if kind not in QUANTILE_BACKENDS:
+        raise ValueError(f"quantiles must be one of {tuple(QUANTILE_BACKENDS)}, got {kind!r}")
+
+
+def make_quantile_sketch(kind: str = "exact", k: int = 200, rng: random.Random = None):
+    """Create an empty sketch of the named backend ("exact" or "kll")."""
+    check_quantile_backend(kind)
+    return KLLSketch(k, rng=rng) if kind == "kll" else ExactQuantiles()
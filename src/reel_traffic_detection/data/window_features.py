@@ -0,0 +1,432 @@
+"""
+Sliding-Window Feature Engine
+-----------------------------
+Computes features over 1 s windows that advance every 250 ms
+(docs/03_feature_engineering.md, section 2) without recomputing each
+overlapping window from scratch.
+
+Packets are binned into hop-sized buckets. Every bucket keeps a small
+vector of additive statistics (packet count, bytes, ...); a window is the
+sum of its `window / hop` most recent buckets. Sliding by one hop adds the
+newest bucket and subtracts the evicted one, so the per-hop cost does not
+depend on how many packets the window holds. Each emitted window also
+carries the flow's `cadence_score` over a longer history (see cadence.py).
+
+Usage:
+    from src.reel_traffic_detection.data.pcap_parser import parse_pcap
+    from src.reel_traffic_detection.data.window_features import SlidingWindowExtractor
+
+    engine = SlidingWindowExtractor(window=1.0, hop=0.25)
+
+    # Offline: every window of a capture in one vectorized pass
+    windows = engine.transform(parse_pcap("data/sample.pcap"))
+
+    # Live: feed chunks as they arrive, rows are emitted as hops close
+    for chunk in chunks:
+        rows = engine.push(chunk)
+    rows = engine.flush()
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.reel_traffic_detection.data.cadence import CadenceTracker
+from src.reel_traffic_detection.data.direction_features import (
+    DIRECTION_COLUMNS,
+    DIRECTION_STATS,
+    burstiness_from_bins,
+    direction_contributions,
+    direction_features_from_stats,
+    downstream_iat,
+    grouped_percentile,
+    infer_downstream,
+    IAT_PERCENTILE,
+)
+from src.reel_traffic_detection.data.flow_features import SUMMARY_COLUMNS, FlowIndex
+from src.reel_traffic_detection.data.pcap_parser import PROTO_TCP, PROTO_UDP
+from src.reel_traffic_detection.data.quantile_sketch import make_quantile_sketch
+
+
+BASE_STATS = ("count", "bytes", "bytes_sq", "tcp", "udp")
+ADDITIVE_STATS = BASE_STATS + DIRECTION_STATS
+WINDOW_KEY_COLUMNS = ["flow", "window_start", "window_end"]
+FEATURE_COLUMNS = SUMMARY_COLUMNS + DIRECTION_COLUMNS + ["cadence_score"]
+WINDOW_COLUMNS = WINDOW_KEY_COLUMNS + FEATURE_COLUMNS
+
+_COUNT, _BYTES, _BYTES_SQ, _TCP, _UDP = range(len(BASE_STATS))
+_N_BASE = len(BASE_STATS)
+_DOWN_BYTES = _N_BASE + DIRECTION_STATS.index("down_bytes")
+
+
+def packet_contributions(cols, downstream, iat) -> np.ndarray:
+    """Per-packet additive statistics, shape (N, len(ADDITIVE_STATS))."""
+    sizes = cols.length.astype(np.float64)
+    contrib = np.empty((len(cols), len(ADDITIVE_STATS)), dtype=np.float64)
+    contrib[:, _COUNT] = 1.0
+    contrib[:, _BYTES] = sizes
+    contrib[:, _BYTES_SQ] = sizes * sizes
+    contrib[:, _TCP] = cols.proto == PROTO_TCP
+    contrib[:, _UDP] = cols.proto == PROTO_UDP
+    contrib[:, _N_BASE:] = direction_contributions(cols, downstream, iat)
+    return contrib
+
+
+def features_from_stats(totals, size_min, size_max, first, last,
+                        seconds, burstiness, p95_iat) -> dict:
+    """
+    Turn aggregated window statistics into the feature columns.
+    All arguments are per-window arrays; `totals` has one column per
+    entry of ADDITIVE_STATS.
+    """
+    n = totals[:, _COUNT]
+    span = last - first
+    features = direction_features_from_stats(totals[:, _N_BASE:], n, seconds,
+                                             burstiness, p95_iat)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = totals[:, _BYTES] / n
+        m2 = np.maximum(totals[:, _BYTES_SQ] - totals[:, _BYTES] * mean, 0.0)
+        std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+        features.update({
+            "avg_packet_size": mean,
+            "std_packet_size": std,
+            "min_packet_size": size_min,
+            "max_packet_size": size_max,
+            "avg_inter_arrival": span / n,
+            "packet_count": n.astype(np.int64),
+            "tcp_fraction": totals[:, _TCP] / n,
+            "udp_fraction": totals[:, _UDP] / n,
+            "duration": np.where(n > 1, span, 0.0),
+        })
+    return features
+
+
+class _WindowState:
+    """Ring of per-bucket statistics for one flow (or the whole stream)."""
+
+    __slots__ = ("bucket", "add", "mins", "maxs", "firsts", "lasts", "total",
+                 "iats", "last_down", "last_seen")
+
+    def __init__(self, n_buckets: int, bucket: int, new_sketch):
+        self.bucket = bucket   # newest (still open) bucket id
+        self.add = np.zeros((n_buckets, len(ADDITIVE_STATS)))
+        self.mins = np.full(n_buckets, np.inf)
+        self.maxs = np.full(n_buckets, -np.inf)
+        self.firsts = np.full(n_buckets, np.inf)
+        self.lasts = np.full(n_buckets, -np.inf)
+        self.total = np.zeros(len(ADDITIVE_STATS))
+        self.iats = [new_sketch() for _ in range(n_buckets)]
+        self.last_down = np.nan
+        self.last_seen = -np.inf
+
+    def bucket_bytes(self) -> np.ndarray:
+        return self.add[:, _BYTES]
+
+    def clear_slot(self, slot: int, new_sketch):
+        self.total -= self.add[slot]
+        self.add[slot] = 0.0
+        self.mins[slot] = np.inf
+        self.maxs[slot] = -np.inf
+        self.firsts[slot] = np.inf
+        self.lasts[slot] = -np.inf
+        self.iats[slot] = new_sketch()
+
+
+class SlidingWindowExtractor:
+    def __init__(self, window: float = 1.0, hop: float = 0.25, idle_timeout: float = 60.0,
+                 cadence_history: float = 16.0, quantiles: str = "exact",
+                 sketch_k: int = 200):
+        """
+        Initialize the sliding-window engine.
+
+        Args:
+            window: Window length in seconds.
+            hop: Hop between consecutive windows in seconds. `window` must
+                be a whole multiple of `hop`.
+            idle_timeout: Seconds without packets after which a flow's
+                state is dropped; downstream inter-arrival gaps longer than
+                this are not counted.
+            cadence_history: Seconds of downstream bytes behind each
+                window's `cadence_score`; a whole multiple of `hop`.
+            quantiles: Percentile backend of the live engine (`push`):
+                "exact" keeps every inter-arrival time of the open window,
+                "kll" keeps one mergeable KLL sketch per bucket so memory
+                stays bounded however busy a flow is. `transform` always
+                computes exact percentiles.
+            sketch_k: KLL accuracy/size parameter (rank error ~ 1.7 / k).
+        """
+        n_buckets = window / hop
+        if hop <= 0 or abs(n_buckets - round(n_buckets)) > 1e-9 or round(n_buckets) < 1:
+            raise ValueError("window must be a positive whole multiple of hop")
+        self.window = window
+        self.hop = hop
+        self.n_buckets = int(round(n_buckets))
+        self.idle_timeout = idle_timeout
+        self.cadence = CadenceTracker(cadence_history, hop)
+        make_quantile_sketch(quantiles, sketch_k)   # validate early
+        self.quantiles = quantiles
+        self.sketch_k = sketch_k
+        self._states = {}
+        self._pending = []
+
+    # ------------------------------------------------------------------
+    # Shared helpers
+    # ------------------------------------------------------------------
+    def _new_sketch(self):
+        return make_quantile_sketch(self.quantiles, self.sketch_k)
+
+    def _bucket_ids(self, timestamps) -> np.ndarray:
+        return np.floor(timestamps / self.hop).astype(np.int64)
+
+    def _prepare(self, cols, group, downstream):
+        """Resolve group ids and downstream flags for a chunk of packets."""
+        if downstream is None:
+            downstream = infer_downstream(cols, FlowIndex(cols))
+        group = np.zeros(len(cols), np.int64) if group is None else np.asarray(group, np.int64)
+        return group, np.asarray(downstream, dtype=bool)
+
+    def _aggregate_pairs(self, cols, group, downstream, prev_down=None):
+        """
+        Reduce packets to one statistics row per (group, bucket) pair.
+        Pairs are returned sorted by (group, bucket), together with the
+        downstream inter-arrival times of each pair.
+
+        Args:
+            prev_down: Optional callable mapping a group id to the time of
+                its last downstream packet seen in earlier chunks.
+        """
+        keep = np.flatnonzero(group >= 0)
+        order = keep[np.lexsort((cols.timestamp[keep], group[keep]))]
+        cols = cols.take(order)
+        group, down = group[order], downstream[order]
+        times = cols.timestamp
+        bucket = self._bucket_ids(times)
+
+        iat = downstream_iat(times, down, group, self.idle_timeout)
+        if prev_down is not None and len(order):
+            # Chain each group's first downstream packet to earlier chunks
+            d_idx = np.flatnonzero(down)
+            if len(d_idx):
+                d_idx = d_idx[np.append(True, group[d_idx[1:]] != group[d_idx[:-1]])]
+            for i in d_idx:
+                gap = times[i] - prev_down(int(group[i]))
+                if gap <= self.idle_timeout:
+                    iat[i] = gap
+
+        if not len(order):
+            empty = np.empty(0)
+            return (np.empty(0, np.int64), np.empty(0, np.int64),
+                    np.empty((0, len(ADDITIVE_STATS))), empty, empty, empty, empty, [])
+
+        contrib = packet_contributions(cols, down, iat)
+        sizes = cols.length.astype(np.float64)
+        # Packets are time-ordered within each group, so buckets are contiguous
+        changed = np.ones(len(order), dtype=bool)
+        changed[1:] = (group[1:] != group[:-1]) | (bucket[1:] != bucket[:-1])
+        starts = np.flatnonzero(changed)
+        ends = np.append(starts[1:], len(order)) - 1
+        iat_split = np.split(iat, starts[1:])
+        return (
+            group[starts],
+            bucket[starts],
+            np.add.reduceat(contrib, starts, axis=0),
+            np.minimum.reduceat(sizes, starts),
+            np.maximum.reduceat(sizes, starts),
+            times[starts],
+            times[ends],
+            [v[~np.isnan(v)] for v in iat_split],
+        )
+
+    def _rows(self, flows, end_buckets, totals, size_min, size_max, first, last,
+              burstiness, p95_iat, cadence) -> pd.DataFrame:
+        window_end = (np.asarray(end_buckets, dtype=np.float64) + 1) * self.hop
+        features = features_from_stats(np.asarray(totals).reshape(-1, len(ADDITIVE_STATS)),
+                                       np.asarray(size_min), np.asarray(size_max),
+                                       np.asarray(first), np.asarray(last), self.window,
+                                       np.asarray(burstiness), np.asarray(p95_iat))
+        features["cadence_score"] = np.asarray(cadence, dtype=np.float64)
+        features["flow"] = np.asarray(flows, dtype=np.int64)
+        features["window_start"] = window_end - self.window
+        features["window_end"] = window_end
+        return pd.DataFrame(features, columns=WINDOW_COLUMNS)
+
+    # ------------------------------------------------------------------
+    # Offline: all windows at once
+    # ------------------------------------------------------------------
+    def transform(self, cols, group=None, downstream=None) -> pd.DataFrame:
+        """
+        Compute every non-empty window of a capture in one vectorized pass.
+
+        Args:
+            cols: PacketColumns for the capture.
+            group: Optional per-packet flow id (e.g. `FlowIndex.flow_of`);
+                packets with a negative id are ignored. Without it the
+                whole capture is treated as one stream.
+            downstream: Optional per-packet direction flags; inferred from
+                the capture's flows when omitted.
+
+        Returns:
+            DataFrame with WINDOW_COLUMNS, one row per (flow, hop) whose
+            window contains at least one packet.
+        """
+        group, downstream = self._prepare(cols, group, downstream)
+        (p_group, p_bucket, p_add, p_min, p_max,
+         p_first, p_last, p_iats) = self._aggregate_pairs(cols, group, downstream)
+        if not len(p_group):
+            return pd.DataFrame(columns=WINDOW_COLUMNS)
+
+        # Pair keys are sorted; windows ending at bucket e cover e-k+1 .. e
+        k = self.n_buckets
+        rel = p_bucket - p_bucket.min()
+        span = int(rel.max()) + k
+        pair_key = p_group * span + rel
+        win_key = np.unique((pair_key[:, None] + np.arange(k)).ravel())
+
+        totals = np.zeros((len(win_key), len(ADDITIVE_STATS)))
+        size_min = np.full(len(win_key), np.inf)
+        size_max = np.full(len(win_key), -np.inf)
+        first = np.full(len(win_key), np.inf)
+        last = np.full(len(win_key), -np.inf)
+        bin_sq = np.zeros(len(win_key))
+        for offset in range(k):
+            target = win_key - offset
+            idx = np.minimum(np.searchsorted(pair_key, target), len(pair_key) - 1)
+            hit = pair_key[idx] == target
+            # The same group must own the pair (keys of other groups never
+            # collide because span leaves k spare buckets per group)
+            idx = idx[hit]
+            totals[hit] += p_add[idx]
+            bin_sq[hit] += p_add[idx, _BYTES] ** 2
+            size_min[hit] = np.minimum(size_min[hit], p_min[idx])
+            size_max[hit] = np.maximum(size_max[hit], p_max[idx])
+            first[hit] = np.minimum(first[hit], p_first[idx])
+            last[hit] = np.maximum(last[hit], p_last[idx])
+        burstiness = burstiness_from_bins(totals[:, _BYTES], bin_sq, k)
+
+        # Each pair's inter-arrival times belong to the k windows covering it
+        iat_counts = np.array([len(v) for v in p_iats])
+        iat_values = np.concatenate(p_iats) if len(p_iats) else np.empty(0)
+        iat_pair_key = np.repeat(pair_key, iat_counts)
+        iat_win = np.searchsorted(win_key, (iat_pair_key[:, None] + np.arange(k)).ravel())
+        p95 = grouped_percentile(np.repeat(iat_values, k), iat_win, len(win_key),
+                                 IAT_PERCENTILE)
+
+        flows = win_key // span
+        end_buckets = win_key % span + p_bucket.min()
+        cadence = self.cadence.batch_scores(p_group, p_bucket, p_add[:, _DOWN_BYTES],
+                                            flows, end_buckets)
+        return self._rows(flows, end_buckets, totals, size_min, size_max, first, last,
+                          burstiness, p95, cadence)
+
+    # ------------------------------------------------------------------
+    # Live: incremental push / flush
+    # ------------------------------------------------------------------
+    def _close_until(self, flow, state: _WindowState, bucket: int):
+        """Emit windows ending at state.bucket .. bucket-1 and slide forward."""
+        k = self.n_buckets
+        e = state.bucket
+        while e < bucket:
+            if state.total[_COUNT] > 0:
+                bucket_bytes = state.bucket_bytes()
+                iats = self._new_sketch()
+                for slot in state.iats:
+                    iats.merge(slot)
+                self._pending.append((
+                    flow, e, state.total.copy(), state.mins.min(), state.maxs.max(),
+                    state.firsts.min(), state.lasts.max(),
+                    burstiness_from_bins(bucket_bytes.sum(), (bucket_bytes ** 2).sum(), k),
+                    iats.quantile(IAT_PERCENTILE / 100.0),
+                    self.cadence.update(flow, e, state.add[e % k, _DOWN_BYTES]),
+                ))
+            e += 1
+            state.clear_slot(e % k, self._new_sketch)
+            if state.total[_COUNT] <= 0:
+                # Nothing left in the window: jump straight to the target
+                state.add[:] = 0.0
+                state.total[:] = 0.0
+                e = bucket
+        state.bucket = bucket
+
+    def _drain(self) -> pd.DataFrame:
+        if not self._pending:
+            return pd.DataFrame(columns=WINDOW_COLUMNS)
+        columns = list(zip(*self._pending))
+        self._pending = []
+        columns[2] = np.vstack(columns[2])
+        rows = self._rows(*columns)
+        return rows.sort_values(["window_end", "flow"], kind="stable").reset_index(drop=True)
+
+    def _last_down(self, flow: int) -> float:
+        state = self._states.get(flow)
+        return state.last_down if state is not None else np.nan
+
+    def push(self, cols, group=None, downstream=None) -> pd.DataFrame:
+        """
+        Feed a chunk of time-ordered packets and return the windows that
+        were completed by it.
+
+        Hops are closed by a watermark at the newest timestamp seen, so a
+        flow that goes quiet still gets its trailing windows emitted. Flows
+        idle for longer than `idle_timeout` are forgotten.
+        """
+        if not len(cols):
+            return self._drain()
+        group, downstream = self._prepare(cols, group, downstream)
+        (p_group, p_bucket, p_add, p_min, p_max,
+         p_first, p_last, p_iats) = self._aggregate_pairs(cols, group, downstream,
+                                                          self._last_down)
+
+        k = self.n_buckets
+        for i in np.argsort(p_bucket, kind="stable"):
+            flow, b = int(p_group[i]), int(p_bucket[i])
+            state = self._states.get(flow)
+            if state is None:
+                state = self._states[flow] = _WindowState(k, b, self._new_sketch)
+            elif b > state.bucket:
+                self._close_until(flow, state, b)
+            elif b <= state.bucket - k:
+                continue   # too late for any open window
+            slot = b % k
+            state.add[slot] += p_add[i]
+            state.total += p_add[i]
+            state.mins[slot] = min(state.mins[slot], p_min[i])
+            state.maxs[slot] = max(state.maxs[slot], p_max[i])
+            state.firsts[slot] = min(state.firsts[slot], p_first[i])
+            state.lasts[slot] = max(state.lasts[slot], p_last[i])
+            state.last_seen = max(state.last_seen, p_last[i])
+            if len(p_iats[i]):
+                state.iats[slot].update_many(p_iats[i])
+
+        self._remember_last_down(cols, group, downstream)
+        self._advance(cols.timestamp.max())
+        return self._drain()
+
+    def _remember_last_down(self, cols, group, downstream):
+        idx = np.flatnonzero(downstream & (group >= 0))
+        if not len(idx):
+            return
+        g, t = group[idx], cols.timestamp[idx]
+        order = np.lexsort((t, g))
+        g, t = g[order], t[order]
+        is_last = np.append(g[1:] != g[:-1], True)
+        for flow, latest in zip(g[is_last].tolist(), t[is_last].tolist()):
+            state = self._states.get(flow)
+            if state is not None and not state.last_down >= latest:
+                state.last_down = latest
+
+    def _advance(self, now: float):
+        watermark = int(self._bucket_ids(now))
+        for flow in list(self._states):
+            state = self._states[flow]
+            if state.bucket < watermark:
+                self._close_until(flow, state, watermark)
+            if state.total[_COUNT] <= 0 and now - state.last_seen > self.idle_timeout:
+                del self._states[flow]
+                self.cadence.drop(flow)
+
+    def flush(self) -> pd.DataFrame:
+        """Close every open window (end of capture) and return the rows."""
+        for flow in list(self._states):
+            state = self._states.pop(flow)
+            self._close_until(flow, state, state.bucket + self.n_buckets)
+            self.cadence.drop(flow)
+        return self._drain()
@@ -0,0 +1,278 @@
+"""
+Model Bundles
+-------------
+One versioned artifact holding everything inference needs: the fitted
+classifier, the preprocessor/scaler, the training-time feature order,
+class labels and free-form metadata. It replaces the separate
+`trained_model.pkl` + `scaler.pkl`/`preprocessor.pkl` pickles.
+
+File layout (all offsets 64-byte aligned):
+
+    b"RTDBNDL\\0"  uint64 header length  JSON header  | array | ... | model pickle | preprocessor pickle
+
+The header records the format version, metadata and, for every section,
+its offset, dtype, shape and SHA-256. Arrays are raw little-endian
+buffers, so `ModelBundle.load` maps the file read-only and hands out
+NumPy views into the mapping: forked or independently started workers
+share the same page-cache pages instead of each holding a private copy.
+Tree ensembles are stored pre-compiled (see compiled_forest.py) as such
+arrays. The sklearn objects themselves live in trailing pickle sections
+that are unpickled on first access, so the compiled backend never
+unpickles the estimator.
+
+Usage:
+    from src.reel_traffic_detection.models.bundle import ModelBundle, save_bundle
+
+    save_bundle("models/model.rtdb", model, preprocessor, metadata={"dataset": "v3"})
+    bundle = ModelBundle.load("models/model.rtdb")
+    rti = RealTimeInferenceML.from_bundle("models/model.rtdb")
+
+    # Command line: bundle existing pickles
+    python -m src.reel_traffic_detection.models.bundle \\
+        --model models/trained_model.pkl --scaler models/scaler.pkl -o models/model.rtdb
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import struct
+import time
+
+import joblib
+import numpy as np
+import sklearn
+
+MAGIC = b"RTDBNDL\0"
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct("<8sQ")
+
+
+class BundleError(ValueError):
+    """Raised for files that are not bundles, newer formats or corrupt sections."""
+
+
+def _digest(buffer) -> str:
+    return hashlib.sha256(buffer).hexdigest()
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def _compile(model):
+    from src.reel_traffic_detection.models.compiled_forest import compile_model
+
+    try:
+        return compile_model(model)
+    except ValueError:
+        return None          # not a tree ensemble; the sklearn backend still works
+
+
+def save_bundle(path: str, model, preprocessor, metadata: dict = None) -> dict:
+    """
+    Write a model bundle.
+
+    Args:
+        path: Destination file.
+        model: Fitted sklearn classifier.
+        preprocessor: Fitted `Preprocessor` or sklearn scaler (or None).
+        metadata: Extra JSON-serializable fields (dataset, metrics, ...).
+
+    Returns:
+        The written header.
+    """
+    scaler = getattr(preprocessor, "scaler", preprocessor)
+    names = getattr(scaler, "feature_names_in_", None)
+    arrays, compiled_meta = {}, None
+    compiled = _compile(model)
+    if compiled is not None:
+        state, compiled_meta = compiled.state()
+        arrays.update({f"compiled.{k}": v for k, v in state.items()})
+
+    pickles = {}
+    for name, obj in (("model", model), ("preprocessor", preprocessor)):
+        buffer = io.BytesIO()
+        joblib.dump(obj, buffer)
+        pickles[f"pickle.{name}"] = buffer.getvalue()
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sklearn_version": sklearn.__version__,
+        "model_class": type(model).__name__,
+        "preprocessor_class": type(preprocessor).__name__,
+        "feature_names": None if names is None else [str(n) for n in names],
+        "classes": np.asarray(getattr(model, "classes_", [])).tolist(),
+        "compiled": compiled_meta,
+        "metadata": metadata or {},
+        "sections": {},
+    }
+
+    # Section offsets are relative to the first aligned byte after the header
+    blobs, offset = [], 0
+    for name, array in arrays.items():
+        data = np.ascontiguousarray(array)
+        data = data.astype(data.dtype.newbyteorder("<"), copy=False)
+        header["sections"][name] = {"offset": offset, "nbytes": data.nbytes,
+                                    "dtype": data.dtype.str, "shape": list(data.shape),
+                                    "sha256": _digest(data.tobytes())}
+        blobs.append(data.tobytes())
+        offset += data.nbytes + _pad(data.nbytes)
+    for name, pickled in pickles.items():
+        header["sections"][name] = {"offset": offset, "nbytes": len(pickled),
+                                    "sha256": _digest(pickled)}
+        blobs.append(pickled)
+        offset += len(pickled) + _pad(len(pickled))
+
+    encoded = json.dumps(header).encode()
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        f.write(b"\0" * _pad(_PREFIX.size + len(encoded)))
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * _pad(len(blob)))
+    return header
+
+
+class ModelBundle:
+    def __init__(self, header: dict, buffer, base: int, close=None):
+        self.header = header
+        self._buffer = buffer
+        self._base = base
+        self._close = close
+        self._objects = {}
+
+    @classmethod
+    def load(cls, path: str, verify: bool = True, use_mmap: bool = True) -> "ModelBundle":
+        """
+        Open a bundle.
+
+        Args:
+            path: Bundle file.
+            verify: Check the SHA-256 of every section (reads the whole
+                file once; skip for trusted, already verified files).
+            use_mmap: Map the file read-only and serve arrays as views
+                into the mapping (shared between processes). Otherwise the
+                file is read into private memory.
+        """
+        with open(path, "rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size or prefix[:8] != MAGIC:
+                raise BundleError(f"{path} is not a model bundle")
+            if use_mmap:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                close = buffer.close
+            else:
+                buffer = prefix + f.read()
+                close = None
+        _, length = _PREFIX.unpack_from(buffer, 0)
+        try:
+            header = json.loads(bytes(buffer[_PREFIX.size:_PREFIX.size + length]))
+        except ValueError as exc:
+            raise BundleError(f"{path}: unreadable bundle header") from exc
+        if header.get("format_version", 0) > FORMAT_VERSION:
+            raise BundleError(f"{path}: bundle format {header['format_version']} is newer "
+                              f"than the supported version {FORMAT_VERSION}")
+        base = _PREFIX.size + length + _pad(_PREFIX.size + length)
+        bundle = cls(header, buffer, base, close)
+        if verify:
+            bundle.verify()
+        return bundle
+
+    def _section(self, name: str) -> memoryview:
+        info = self.header["sections"][name]
+        start = self._base + info["offset"]
+        if start + info["nbytes"] > len(self._buffer):
+            raise BundleError(f"bundle section {name!r} is truncated")
+        return memoryview(self._buffer)[start:start + info["nbytes"]]
+
+    def verify(self):
+        """Raise `BundleError` unless every section matches its checksum."""
+        for name, info in self.header["sections"].items():
+            with self._section(name) as view:
+                if _digest(view) != info["sha256"]:
+                    raise BundleError(f"checksum mismatch in bundle section {name!r}")
+
+    def array(self, name: str) -> np.ndarray:
+        """Read-only array view of a section (zero-copy when mapped)."""
+        info = self.header["sections"][name]
+        view = np.frombuffer(self._section(name), dtype=np.dtype(info["dtype"]))
+        return view.reshape(info["shape"])
+
+    @property
+    def feature_names(self):
+        return self.header["feature_names"]
+
+    @property
+    def metadata(self) -> dict:
+        return self.header["metadata"]
+
+    def compiled_model(self):
+        """The pre-compiled tree ensemble over the bundle's arrays, or None."""
+        from src.reel_traffic_detection.models.compiled_forest import CompiledEnsemble
+
+        meta = self.header["compiled"]
+        if meta is None:
+            return None
+        arrays = {name.split(".", 1)[1]: self.array(name)
+                  for name in self.header["sections"] if name.startswith("compiled.")}
+        return CompiledEnsemble(**arrays, **meta)
+
+    def _unpickle(self, name: str):
+        if name not in self._objects:
+            with self._section(f"pickle.{name}") as view:
+                self._objects[name] = joblib.load(io.BytesIO(view.tobytes()))
+        return self._objects[name]
+
+    @property
+    def model(self):
+        """The fitted sklearn classifier (unpickled on first access)."""
+        return self._unpickle("model")
+
+    @property
+    def preprocessor(self):
+        """The fitted preprocessor/scaler (unpickled on first access)."""
+        return self._unpickle("preprocessor")
+
+    def close(self):
+        """
+        Unmap the file. While arrays from `array`/`compiled_model` are still
+        alive the mapping stays open and is released with them.
+        """
+        if self._close is not None:
+            try:
+                self._close()
+            except BufferError:
+                pass
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bundle a model and its preprocessor")
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl",
+                        help="scaler.pkl or preprocessor.pkl")
+    parser.add_argument("-o", "--output", default="models/model.rtdb")
+    parser.add_argument("--meta", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra metadata field (repeatable)")
+    args = parser.parse_args(argv)
+
+    metadata = dict(item.split("=", 1) for item in args.meta)
+    header = save_bundle(args.output, joblib.load(args.model), joblib.load(args.scaler), metadata)
+    compiled = "with" if header["compiled"] else "without"
+    print(f"💾 {args.output}: {header['model_class']} + {header['preprocessor_class']}, "
+          f"{len(header['feature_names'] or [])} features, {compiled} compiled trees")
+
+
+if __name__ == "__main__":
+    main()
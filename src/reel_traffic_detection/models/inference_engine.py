@@ -0,0 +1,84 @@
+"""
+Shared Inference Engine
+-----------------------
+Serves one loaded `RealTimeInferenceML` to many threads. Instead of one
+model copy per collector thread, every thread submits work to a single
+engine whose thread pool calls the shared model.
+
+`RealTimeInferenceML` is safe to share: `predict_sample` standardizes into
+a per-thread scratch row, latency histograms are sharded per thread (no
+lock on the hot path), and the prediction cache guards its LRU with its
+own lock. Throughput beyond one thread comes from the parts of a call that
+release the GIL: sklearn's tree traversal (Cython, nogil) and NumPy
+kernels on large enough arrays. Python-level overhead per call stays
+serialized, so single-row calls scale far less than batches; see
+benchmarks/bench_engine_scaling.py.
+
+Usage:
+    from src.reel_traffic_detection.models.inference_engine import InferenceEngine
+
+    with InferenceEngine(RealTimeInferenceML.from_bundle("models/model.rtdb"), threads=4) as engine:
+        label, confidence = engine.submit(sample).result()
+        labels, confidences = engine.predict_many(X)
+"""
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+
+class InferenceEngine:
+    def __init__(self, inference, threads: int = None, chunk_size: int = 1024):
+        """
+        Initialize the engine and its thread pool.
+
+        Args:
+            inference: A `RealTimeInferenceML`, shared by all threads.
+            threads: Pool size (default: the number of CPUs).
+            chunk_size: Rows per task in `predict_many`.
+        """
+        self.inference = inference
+        self.threads = threads or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        if getattr(inference.model, "n_jobs", None) not in (None, 1):
+            # The pool supplies the parallelism; nested joblib pools would oversubscribe
+            inference.model.n_jobs = 1
+        self._pool = ThreadPoolExecutor(max_workers=self.threads,
+                                        thread_name_prefix="inference-engine")
+
+    def submit(self, sample) -> Future:
+        """Score one sample (see `predict_sample`) on the pool."""
+        return self._pool.submit(self.inference.predict_sample, sample)
+
+    def map(self, samples):
+        """Score an iterable of samples; yields (label, confidence) in order."""
+        return self._pool.map(self.inference.predict_sample, samples)
+
+    def predict_many(self, features) -> tuple:
+        """
+        Score an (N, n_features) array (or DataFrame) in parallel chunks.
+
+        Returns:
+            tuple(labels, confidences): int64 and float64 arrays of length N.
+        """
+        n = len(features)
+        if n == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        parts = [features[lo:lo + self.chunk_size] for lo in range(0, n, self.chunk_size)]
+        results = list(self._pool.map(self.inference.predict_batch, parts))
+        return (np.concatenate([labels for labels, _ in results]),
+                np.concatenate([confidences for _, confidences in results]))
+
+    def stats(self, reset: bool = False) -> dict:
+        """Per-stage latency merged over all pool threads."""
+        return self.inference.latency_snapshot(reset=reset)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,228 @@
+"""
+ONNX Export and Runtime
+-----------------------
+Packages the scaler and the classifier as one ONNX graph for deployment
+(docs/07_deployment.md) and runs it with onnxruntime on CPU.
+
+`export_onnx` fuses the fitted `Preprocessor` (or bare `StandardScaler`)
+and the classifier into a single graph with one float32 input of the
+training-time features and a probability output. The feature names and
+class labels are stored in the model metadata, so `OnnxClassifier` can
+align DataFrame columns without the original pickles. After writing the
+graph, `compare_backends` checks it against the sklearn pipeline and
+reports label agreement, probability error, single-row latency and batch
+throughput for both runtimes.
+
+skl2onnx (export) and onnxruntime (inference) are optional dependencies
+(`pip install -r requirements-onnx.txt` or the `onnx` extra) and are only
+imported when used.
+
+Usage:
+    python -m src.reel_traffic_detection.models.onnx_export \\
+        --model models/trained_model.pkl --scaler models/scaler.pkl \\
+        --output models/model.onnx --report models/onnx_report.json
+
+    rti = RealTimeInferenceML("models/model.onnx", backend="onnx", intra_op_threads=1)
+"""
+
+import argparse
+import json
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+INPUT_NAME = "features"
+
+
+def sklearn_pipeline(model, preprocessor) -> Pipeline:
+    """The fitted preprocessing + classifier chain as one sklearn Pipeline."""
+    steps = []
+    scaler = preprocessor
+    if hasattr(preprocessor, "scaler"):          # a `Preprocessor`
+        if not preprocessor.fitted:
+            raise ValueError("Preprocessor must be fitted before export")
+        scaler = preprocessor.scaler
+        # Preprocessor.transform fills missing values with 0 before scaling
+        imputer = SimpleImputer(strategy="constant", fill_value=0.0, keep_empty_features=True)
+        steps.append(("fill_missing", imputer.fit(np.zeros((1, scaler.n_features_in_)))))
+    if scaler is not None:
+        steps.append(("scaler", scaler))
+    steps.append(("model", model))
+    return Pipeline(steps)
+
+
+def export_onnx(model, preprocessor, output: str, target_opset: int = None) -> str:
+    """
+    Convert the fitted scaler + classifier into one ONNX graph.
+
+    Args:
+        model: Fitted sklearn classifier.
+        preprocessor: Fitted `Preprocessor`, sklearn scaler, or None.
+        output: Destination .onnx path.
+        target_opset: Optional ONNX opset (default: skl2onnx's latest).
+
+    Returns:
+        The output path.
+    """
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    pipeline = sklearn_pipeline(model, preprocessor)
+    n_features = pipeline.n_features_in_
+    onnx_model = convert_sklearn(
+        pipeline,
+        initial_types=[(INPUT_NAME, FloatTensorType([None, n_features]))],
+        options={id(model): {"zipmap": False}},
+        target_opset=target_opset,
+    )
+    names = getattr(getattr(preprocessor, "scaler", preprocessor), "feature_names_in_", None)
+    metadata = {
+        "feature_names": json.dumps(None if names is None else [str(n) for n in names]),
+        "classes": json.dumps(np.asarray(model.classes_).tolist()),
+    }
+    for key, value in metadata.items():
+        entry = onnx_model.metadata_props.add()
+        entry.key, entry.value = key, value
+    with open(output, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    return output
+
+
+class OnnxClassifier:
+    def __init__(self, path: str, intra_op_threads: int = 1):
+        """
+        Load an exported graph into an onnxruntime CPU session.
+
+        Args:
+            path: .onnx file written by `export_onnx`.
+            intra_op_threads: Threads onnxruntime may use inside one
+                operator (0 lets onnxruntime decide). One thread gives the
+                lowest single-row latency.
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        meta = self.session.get_modelmeta().custom_metadata_map
+        names = json.loads(meta.get("feature_names", "null"))
+        self.feature_names_in_ = None if names is None else np.asarray(names, dtype=object)
+        self.n_features_in_ = self.session.get_inputs()[0].shape[1]
+        self.classes_ = np.asarray(json.loads(meta.get("classes", "[0, 1]")))
+        self._input = self.session.get_inputs()[0].name
+        outputs = [o.name for o in self.session.get_outputs()]
+        self._proba = "probabilities" if "probabilities" in outputs else outputs[-1]
+
+    def input_transformer(self):
+        """
+        Pass-through stand-in for the scaler, which lives inside the graph.
+        It carries the feature names so callers can align DataFrames.
+        """
+        names = self.feature_names_in_
+        columns = list(names) if names is not None else range(self.n_features_in_)
+        return FunctionTransformer(validate=False).fit(pd.DataFrame(columns=columns, dtype=float))
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.session.run([self._proba], {self._input: X})[0]
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _timings(predict_proba, X, repeat: int) -> dict:
+    single = []
+    for i in range(repeat):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        predict_proba(row)
+        single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    predict_proba(X)
+    batch = time.perf_counter() - start
+    return {"single_row_median_us": float(np.median(single)) * 1e6,
+            "single_row_p99_us": float(np.percentile(single, 99)) * 1e6,
+            "batch_rows_per_sec": len(X) / batch if batch > 0 else float("inf")}
+
+
+def compare_backends(pipeline: Pipeline, runtime: OnnxClassifier, X, repeat: int = 200) -> dict:
+    """
+    Parity and speed of an exported graph against its sklearn pipeline.
+
+    Args:
+        pipeline: The sklearn pipeline that was exported.
+        runtime: The loaded ONNX graph.
+        X: (n, n_features) raw (unscaled) feature rows.
+        repeat: Single-row calls timed per runtime.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if hasattr(pipeline[-1], "n_jobs"):
+        pipeline[-1].n_jobs = 1      # compare single-threaded runtimes
+    with warnings.catch_warnings():
+        # Both runtimes get the same ndarray rows, in training column order
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        expected = pipeline.predict_proba(X)
+        sklearn_timings = _timings(pipeline.predict_proba, X, repeat)
+    actual = runtime.predict_proba(X)
+    return {
+        "rows": len(X),
+        "label_agreement": float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))),
+        "max_abs_proba_diff": float(np.max(np.abs(expected - actual))),
+        "sklearn": sklearn_timings,
+        "onnxruntime": _timings(runtime.predict_proba, X, repeat),
+    }
+
+
+def sample_inputs(preprocessor, rows: int, seed: int = 0) -> np.ndarray:
+    """Synthetic raw feature rows spread like the scaler's training data."""
+    scaler = getattr(preprocessor, "scaler", preprocessor)
+    rng = np.random.default_rng(seed)
+    z = rng.normal(size=(rows, scaler.n_features_in_))
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    return z * (1.0 if scale is None else scale) + (0.0 if mean is None else mean)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export scaler + classifier to ONNX")
+    parser.add_argument("--model", default="models/trained_model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--output", default="models/model.onnx")
+    parser.add_argument("--report", default=None, help="optional JSON report path")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows for the parity check")
+    parser.add_argument("--threads", type=int, default=1, help="onnxruntime intra-op threads")
+    parser.add_argument("--min-agreement", type=float, default=0.999)
+    args = parser.parse_args(argv)
+
+    model, preprocessor = joblib.load(args.model), joblib.load(args.scaler)
+    export_onnx(model, preprocessor, args.output)
+    report = compare_backends(sklearn_pipeline(model, preprocessor),
+                              OnnxClassifier(args.output, intra_op_threads=args.threads),
+                              sample_inputs(preprocessor, args.rows))
+    report["output"] = args.output
+
+    print(f"📦 exported {args.output}")
+    print(f"🔎 parity on {report['rows']:,} rows: label agreement "
+          f"{report['label_agreement']:.4%}, max |Δp| {report['max_abs_proba_diff']:.2e}")
+    for runtime in ("sklearn", "onnxruntime"):
+        t = report[runtime]
+        print(f"⏱️ {runtime:<12} single row {t['single_row_median_us']:9,.1f} µs "
+              f"(p99 {t['single_row_p99_us']:,.1f}), batch {t['batch_rows_per_sec']:12,.0f} rows/s")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["label_agreement"] < args.min_agreement:
+        raise SystemExit(f"❌ parity check failed: agreement {report['label_agreement']:.4%} "
+                         f"< {args.min_agreement:.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Prediction Cache
+----------------
+A bounded LRU in front of the classifier. Consecutive windows of one
+steady flow produce nearly identical feature vectors; rounding the
+standardized vector to a grid of `step` standard deviations maps them to
+the same key, so the label and confidence are served without calling the
+model again.
+
+Keys are built from the vector *after* scaling, so one `step` means the
+same relative precision for every feature (a packet count and an
+inter-arrival time in seconds are quantized alike). Vectors that differ by
+less than `step` can still fall into neighbouring cells; they simply miss.
+A coarser step raises the hit rate at the cost of serving a cached answer
+for a window near a decision threshold; `step=1e-3` keeps that error
+negligible for tree models trained on standardized features.
+
+Usage:
+    rti = RealTimeInferenceML("models/trained_model.pkl", "models/scaler.pkl")
+    rti.enable_cache(max_entries=4096, step=1e-3)
+    rti.predict_sample(sample)
+    rti.cache.stats()      # {"hits": ..., "misses": ..., "evictions": ..., "hit_rate": ...}
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 4096, step: float = 1e-3):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Entries kept; the least recently used is evicted.
+            step: Quantization grid in standardized units (feature stds).
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        self.max_entries = max_entries
+        self.step = step
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self, X: np.ndarray) -> list:
+        """One hashable key per row of the standardized (n, n_features) `X`."""
+        # + 0.0 folds -0.0 into 0.0 so both round to the same key
+        grid = np.round(np.asarray(X, dtype=np.float64) / self.step) + 0.0
+        return [row.tobytes() for row in np.atleast_2d(grid)]
+
+    def predict(self, X: np.ndarray, predict_proba) -> tuple:
+        """
+        Labels and confidences for the rows of `X`, calling `predict_proba`
+        once, on one row per distinct key that missed (if any).
+
+        Args:
+            X: (n, n_features) standardized rows.
+            predict_proba: The model's probability function.
+
+        Returns:
+            tuple(labels, confidences): int64 and float64 arrays of length n.
+        """
+        keys = self.keys(X)
+        labels = np.empty(len(keys), dtype=np.int64)
+        confidences = np.empty(len(keys), dtype=np.float64)
+        missed = {}                  # key -> rows; duplicates in one batch are scored once
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    missed.setdefault(key, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                labels[i], confidences[i] = entry
+            n_missed = sum(len(rows) for rows in missed.values())
+            self.hits += len(keys) - n_missed
+            self.misses += n_missed
+        if not missed:
+            return labels, confidences
+
+        first = [rows[0] for rows in missed.values()]
+        probs = np.asarray(predict_proba(X[first] if len(first) < len(keys) else X))
+        with self._lock:
+            for (key, rows), p in zip(missed.items(), probs):
+                label = int(np.argmax(p))
+                entry = (label, float(p[label]))
+                labels[rows], confidences[rows] = entry
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return labels, confidences
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        """Drop all entries (e.g. after swapping the model); keeps the counters."""
+        with self._lock:
+            self._entries.clear()
@@ -22,11 +22,13 @@ Usage:
 """
 
 import joblib
+import threading
 import time
 import numpy as np
 import pandas as pd
 #from src.data.preprocessor import Preprocessor
 from src.reel_traffic_detection.data.preprocess import Preprocessor
+from src.reel_traffic_detection.utils.latency import LatencyStats
 
 # src/model/realtime_inference.py
 
@@ -40,49 +42,154 @@ This module provides two modes of inference:
 
 2. RealTimeInferenceYOLO
    - Detects vehicles/traffic in video streams using a pretrained YOLO model.
-"""
-
-import joblib
-import time
-import numpy as np
-import pandas as pd
-from pathlib import Path
 
-# For YOLO
-from ultralytics import YOLO
-import cv2
-
-# Import your preprocessor
-from src.reel_traffic_detection.data.preprocess import Preprocessor
+Backends are imported on first use: the compiled and ONNX runtimes when
+RealTimeInferenceML selects them, ultralytics/torch and OpenCV only when
+RealTimeInferenceYOLO is used. ML-only consumers never load the video
+stack (guarded by benchmarks/bench_startup.py and the tests).
+"""
 
 
 # ================================
 # 1. Packet Feature ML Inference
 # ================================
 class RealTimeInferenceML:
-    def __init__(self, model_path: str, scaler_path: str = None):
+    BACKENDS = ("sklearn", "compiled", "onnx")
+    STAGES = ("align", "scale", "model", "total")
+    cache = None
+    _latency_lock = threading.Lock()
+
+    def __init__(self, model_path: str, scaler_path: str = None, backend: str = "sklearn",
+                 intra_op_threads: int = 1):
         """
         Initialize inference pipeline.
         
         Args:
-            model_path: Path to trained ML model (pickle or Hugging Face).
-            scaler_path: Optional path to saved preprocessor/scaler.
+            model_path: Path to trained ML model (pickle or Hugging Face),
+                or to an .onnx graph for the "onnx" backend.
+            scaler_path: Optional path to saved preprocessor/scaler. Not
+                used by the "onnx" backend, whose graph contains the scaler.
+            backend: "sklearn" evaluates the loaded estimator; "compiled"
+                flattens a tree ensemble into NumPy node arrays (see
+                compiled_forest.py) for low single-row latency; "onnx" runs
+                a graph from onnx_export.py with onnxruntime on CPU.
+            intra_op_threads: onnxruntime intra-op threads ("onnx" only).
         """
-        # Always load model (will raise error if missing)
-        self.model = joblib.load(model_path)
-
-        # Load preprocessor if provided, else fallback
-        if scaler_path:
-            self.preprocessor = joblib.load(scaler_path)
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {self.BACKENDS}")
+        self.backend = backend
+        # Per-stage latency histograms (fixed memory) of every prediction call
+        self.latency = LatencyStats(self.STAGES)
+        if backend == "onnx":
+            from src.reel_traffic_detection.models.onnx_export import OnnxClassifier
+
+            self.model = OnnxClassifier(model_path, intra_op_threads=intra_op_threads)
+            # The scaler is part of the graph; only column alignment remains
+            self.preprocessor = self.model.input_transformer()
         else:
-            self.preprocessor = Preprocessor()
+            # Always load model (will raise error if missing)
+            self.model = joblib.load(model_path)
+            if backend == "compiled":
+                from src.reel_traffic_detection.models.compiled_forest import compile_model
+
+                self.model = compile_model(self.model)
 
-        self.latencies = []
+            # Load preprocessor if provided, else fallback
+            if scaler_path:
+                self.preprocessor = joblib.load(scaler_path)
+            else:
+                self.preprocessor = Preprocessor()
 
+        self._prepare_fast_path()
+
+    @classmethod
+    def from_bundle(cls, path: str, backend: str = "compiled", verify: bool = True):
+        """
+        Load a model bundle (see bundle.py) in one step.
+
+        Args:
+            path: Bundle file.
+            backend: "compiled" serves the pre-compiled tree arrays straight
+                from the memory-mapped file (falls back to sklearn for
+                models that are not tree ensembles); "sklearn" unpickles
+                the original estimator.
+            verify: Check section checksums while loading.
+        """
+        from src.reel_traffic_detection.models.bundle import ModelBundle
+
+        if backend not in ("sklearn", "compiled"):
+            raise ValueError(f"Bundles support the 'sklearn' and 'compiled' backends, not {backend!r}")
+        bundle = ModelBundle.load(path, verify=verify)
+        self = cls.__new__(cls)
+        self.latency = LatencyStats(cls.STAGES)
+        self.bundle = bundle
+        self.model = bundle.compiled_model() if backend == "compiled" else None
+        self.backend = backend if self.model is not None else "sklearn"
+        if self.model is None:
+            self.model = bundle.model
+        self.preprocessor = bundle.preprocessor
+        self._prepare_fast_path()
+        return self
+
+    def _prepare_fast_path(self):
+        """
+        Resolve the feature order and scaler statistics once, for
+        `predict_sample`. The fast path stays disabled while the
+        preprocessor is unfitted.
+        """
+        scaler = getattr(self.preprocessor, "scaler", self.preprocessor)
+        n = getattr(scaler, "n_features_in_", None)
+        # A Preprocessor (which wraps a scaler) fills missing values with 0
+        self._fill_missing = scaler is not self.preprocessor
+        self._scratch = threading.local()
+        if not isinstance(n, int):
+            self.feature_names = None
+            self._mean = self._scale = self._n_features = None
+            return
+        names = getattr(scaler, "feature_names_in_", None)
+        self.feature_names = list(names) if names is not None else None
+        mean = getattr(scaler, "mean_", None) if getattr(scaler, "with_mean", True) else None
+        scale = getattr(scaler, "scale_", None)
+        self._mean = np.zeros(n) if mean is None else np.asarray(mean, dtype=np.float64)
+        self._scale = np.ones(n) if scale is None else np.asarray(scale, dtype=np.float64)
+        self._n_features = n
+
+    def _row(self) -> np.ndarray:
+        """This thread's reusable (1, n_features) buffer for `predict_sample`."""
+        row = getattr(self._scratch, "row", None)
+        if row is None:
+            row = self._scratch.row = np.empty((1, self._n_features), dtype=np.float64)
+        return row
+
+
+    def _expected_features(self):
+        """Training-time feature order, or None when the scaler has no names."""
+        if hasattr(self, "feature_names"):     # resolved by _prepare_fast_path
+            return self.feature_names
+        names = getattr(self.preprocessor, "feature_names_in_", None)
+        return list(names) if names is not None else None
+
+    def _align(self, features):
+        """Drop the label and order columns as seen at training time."""
+        names = self._expected_features()
+        if isinstance(features, np.ndarray):
+            return pd.DataFrame(features, columns=names) if names is not None else features
+        # Auto-clean features before transform
+        if "label" in features.columns:
+            features = features.drop(columns=["label"])
+        if names is not None:
+            # Keep only expected features, in training order
+            features = features[[col for col in names if col in features.columns]]
+        return features
+
+    def _transform(self, features):
+        X = self.preprocessor.transform(features)
+        # A fitted Preprocessor returns (X, y); a bare scaler returns X
+        return X[0] if isinstance(X, tuple) else X
 
     def predict(self, features: pd.DataFrame):
         """
-        Perform inference on a batch of features.
+        Perform inference on the first row of `features`.
         Auto-aligns features with training-time feature names.
     
         Args:
@@ -91,29 +198,144 @@ class RealTimeInferenceML:
         Returns:
             tuple(pred_label, confidence_score)
         """
-        start = time.time()
-        # Auto-clean features before transform
-        if "label" in features.columns:
-            features = features.drop(columns=["label"])
+        labels, confidences = self.predict_batch(features[:1])
+        return int(labels[0]), float(confidences[0])
 
-        if hasattr(self.preprocessor, "feature_names_in_"):
-            expected_features = list(self.preprocessor.feature_names_in_)
-            # Keep only expected features
-            features = features[[col for col in expected_features if col in features.columns]]
+    def predict_batch(self, features, chunk_size: int = None):
+        """
+        Vectorized inference for every row of `features`.
 
-        X = self.preprocessor.transform(features)
+        Args:
+            features: N-row DataFrame, or an (N, n_features) ndarray whose
+                columns follow the training-time feature order.
+            chunk_size: Optional rows per model call, bounding the memory
+                of very large inputs.
+
+        Returns:
+            tuple(labels, confidences): int64 and float64 arrays of length N
+            (0 = non-reel, 1 = reel/video).
+        """
+        start = time.perf_counter_ns()
+        # Arrays skip the DataFrame round trip when the scaler stats are known
+        fused = isinstance(features, np.ndarray) and getattr(self, "_n_features", None) is not None
+        features = features if fused else self._align(features)
+        aligned = time.perf_counter_ns()
+        n = len(features)
+        step = chunk_size or max(n, 1)
+        labels = np.empty(n, dtype=np.int64)
+        confidences = np.empty(n, dtype=np.float64)
+        scale_ns = model_ns = 0
+        for lo in range(0, n, step):
+            t0 = time.perf_counter_ns()
+            part = features[lo:lo + step]
+            X = self._standardize(part) if fused else self._transform(part)
+            t1 = time.perf_counter_ns()
+            if self.cache is not None:
+                labels[lo:lo + step], confidences[lo:lo + step] = self.cache.predict(
+                    np.asarray(X), self.model.predict_proba)
+            else:
+                probs = np.asarray(self.model.predict_proba(X))
+                labels[lo:lo + step] = np.argmax(probs, axis=1)
+                confidences[lo:lo + step] = np.max(probs, axis=1)
+            scale_ns += t1 - t0
+            model_ns += time.perf_counter_ns() - t1
+
+        self.latency.record(align=aligned - start, scale=scale_ns, model=model_ns,
+                            total=time.perf_counter_ns() - start)
+        return labels, confidences
+
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        """The scaler's (x - mean) / scale on a float64 copy of `X`."""
+        X = np.array(X, dtype=np.float64)
+        if self._fill_missing:
+            np.nan_to_num(X, copy=False, nan=0.0)
+        X -= self._mean
+        X /= self._scale
+        return X
+
+    def predict_sample(self, sample):
+        """
+        Low-latency inference for one sample, without DataFrames. Safe to
+        call from several threads: each reuses its own scratch row.
+
+        Args:
+            sample: 1-D vector (e.g. a reused float32 buffer) in
+                `feature_names` order, or a dict keyed by feature name
+                (only when the scaler was fitted with feature names).
 
-        probs = self.model.predict_proba(X)[0]
-        label = int(np.argmax(probs))  # 0 = non-reel, 1 = reel/video
-        confidence = float(np.max(probs))
+        Returns:
+            tuple(pred_label, confidence_score)
+        """
+        start = time.perf_counter_ns()
+        if self._n_features is None:
+            raise RuntimeError("predict_sample needs a fitted scaler")
+        row = self._row()
+        if isinstance(sample, dict):
+            if self.feature_names is None:
+                raise ValueError("dict samples need a scaler fitted with feature names")
+            for i, name in enumerate(self.feature_names):
+                row[0, i] = sample[name]
+        else:
+            row[0] = sample
+        aligned = time.perf_counter_ns()
+        if self._fill_missing:
+            np.nan_to_num(row, copy=False, nan=0.0)
+        # Fused in-place standardization: (x - mean) / scale
+        np.subtract(row, self._mean, out=row)
+        np.divide(row, self._scale, out=row)
+        scaled = time.perf_counter_ns()
+
+        if self.cache is not None:
+            labels, confidences = self.cache.predict(row, self.model.predict_proba)
+            label, confidence = int(labels[0]), float(confidences[0])
+        else:
+            probs = self.model.predict_proba(row)[0]
+            label = int(np.argmax(probs))  # 0 = non-reel, 1 = reel/video
+            confidence = float(probs[label])
 
-        latency = time.time() - start
-        self.latencies.append(latency)
+        done = time.perf_counter_ns()
+        self.latency.record(align=aligned - start, scale=scaled - aligned,
+                            model=done - scaled, total=done - start)
         return label, confidence
 
+    def enable_cache(self, max_entries: int = 4096, step: float = 1e-3):
+        """
+        Serve repeated (quantized) feature vectors from an LRU cache
+        instead of the model; see prediction_cache.py.
+
+        Args:
+            max_entries: Cache capacity; 0 disables the cache.
+            step: Quantization grid in standardized units.
+
+        Returns:
+            The `PredictionCache`, or None when disabled.
+        """
+        if max_entries and getattr(self, "backend", "sklearn") == "onnx":
+            # The graph holds the scaler, so inputs are never standardized here
+            raise ValueError("The prediction cache needs the sklearn or compiled backend")
+        from src.reel_traffic_detection.models.prediction_cache import PredictionCache
+
+        self.cache = PredictionCache(max_entries, step) if max_entries else None
+        return self.cache
+
+    def __getattr__(self, name):
+        # Only reached for instances built without __init__ (e.g. cls.__new__):
+        # create their latency stats once, under a lock, so threads cannot race
+        if name != "latency":
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        with RealTimeInferenceML._latency_lock:
+            if "latency" not in self.__dict__:
+                self.__dict__["latency"] = LatencyStats(self.STAGES)
+        return self.__dict__["latency"]
+
+    def latency_snapshot(self, reset: bool = False) -> dict:
+        """Per-stage p50/p95/p99/max in ms; `reset=True` starts a new window."""
+        return self.latency.snapshot(reset=reset)
 
     def average_latency(self):
-        return np.mean(self.latencies) if self.latencies else 0.0
+        """Mean seconds per prediction call (from the histogram; O(1))."""
+        return self.latency.mean_ms("total") / 1e3
 
 
 # ================================
@@ -126,17 +348,68 @@ class RealTimeInferenceYOLO:
         Args:
             model_name: pretrained YOLO model (e.g., 'yolov8n.pt', 'yolov8s.pt')
         """
+        from ultralytics import YOLO
+
         self.model = YOLO(model_name)
 
-    def run_on_video(self, video_path: str, save_output: bool = False):
+    def stream_video(self, video_path: str, output_path: str = None, display: bool = False,
+                     queue_size: int = 8, batch_size: int = 1, max_wait_ms: float = None,
+                     gate=None):
+        """
+        Headless, constant-memory detection over a video or live source.
+        Args:
+            video_path: Path to video file (or any cv2.VideoCapture source)
+            output_path: Optional annotated .mp4 to write (opt-in)
+            display: Show annotated frames in a window (opt-in)
+            queue_size, batch_size, max_wait_ms, gate: see `run_on_video`
+        Yields:
+            FrameDetections (frame_index, timestamp_ms, class_ids,
+            confidences, boxes) per frame; nothing else is retained
+        """
+        from src.reel_traffic_detection.models.video_pipeline import VideoPipeline
+
+        pipeline = VideoPipeline(self.model, queue_size, batch_size, max_wait_ms, gate)
+        return pipeline.stream(video_path, output_path=output_path, display=display)
+
+    def run_on_video(self, video_path: str, save_output: bool = False, display: bool = False,
+                     pipelined: bool = True, queue_size: int = 8, batch_size: int = 1,
+                     max_wait_ms: float = None, gate=None):
         """
         Run YOLO inference on a video file.
         Args:
             video_path: Path to video file
             save_output: If True, saves annotated video
+            display: Show annotated frames in a window ("q" stops)
+            pipelined: Decode, infer and annotate/encode in concurrent
+                stages (see video_pipeline.py); False runs the serial loop
+            queue_size: Frames buffered between pipeline stages
+            batch_size: Frames per YOLO call (pipelined only)
+            max_wait_ms: Flush a partial batch after this long, for live
+                sources (pipelined only)
+            gate: Optional `SceneChangeGate` (scene_change.py); frames
+                without a scene change reuse the last detections
+                (pipelined only)
         Returns:
-            results: list of detection outputs
+            results: list of detection outputs (each holds its frame; use
+                `stream_video` for long videos)
         """
+        if pipelined:
+            from src.reel_traffic_detection.models.video_pipeline import VideoPipeline
+
+            pipeline = VideoPipeline(self.model, queue_size, batch_size, max_wait_ms, gate)
+            results, detection_counts = pipeline.run(
+                video_path, output_path="output_detected.mp4" if save_output else None,
+                display=display)
+            self._print_summary(detection_counts)
+            return results
+
+        if batch_size != 1 or gate is not None:
+            raise ValueError("Batching and frame skipping need pipelined=True")
+        import cv2
+
+        from src.reel_traffic_detection.data.detection_log import DetectionLog
+        from src.reel_traffic_detection.models.video_pipeline import FrameDetections
+
         cap = cv2.VideoCapture(video_path)
         results = []
         out = None
@@ -147,8 +420,8 @@ class RealTimeInferenceYOLO:
                                   cap.get(cv2.CAP_PROP_FPS),
                                   (int(cap.get(3)), int(cap.get(4))))
 
-        # Dictionary to count detections
-        detection_counts = {}
+        # Columnar log; counts are one bincount at the end
+        log = DetectionLog(self.model.names)
 
         while cap.isOpened():
             ret, frame = cap.read()
@@ -158,12 +431,11 @@ class RealTimeInferenceYOLO:
             # Run YOLO prediction
             preds = self.model(frame)[0]
             results.append(preds)
+            log.append(*FrameDetections.from_results(len(results) - 1,
+                                                     cap.get(cv2.CAP_PROP_POS_MSEC), preds)[:5])
 
-            # Count detections
-            for box in preds.boxes:
-                cls_id = int(box.cls[0])
-                cls_name = self.model.names[cls_id]
-                detection_counts[cls_name] = detection_counts.get(cls_name, 0) + 1
+            if not (save_output or display):
+                continue
 
             # Draw results on frame
             annotated = preds.plot()
@@ -172,22 +444,26 @@ class RealTimeInferenceYOLO:
                 out.write(annotated)
 
             # (Optional: display live)
-            cv2.imshow("Traffic Detection", annotated)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            if display:
+                cv2.imshow("Traffic Detection", annotated)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
 
         cap.release()
         if out:
             out.release()
-        cv2.destroyAllWindows()
+        if display:
+            cv2.destroyAllWindows()
 
-        # Print summary
+        self._print_summary(log.class_counts())
+        return results
+
+    @staticmethod
+    def _print_summary(detection_counts: dict):
         print("\n📊 Detection Summary:")
         for cls_name, count in detection_counts.items():
             print(f"  {cls_name}: {count}")
 
-        return results
-
 
 # ================================
 # Quick Test
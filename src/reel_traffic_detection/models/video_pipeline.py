@@ -0,0 +1,296 @@
+"""
+Pipelined Video Inference
+-------------------------
+Runs decode, YOLO inference and annotate/encode as concurrent stages so
+the CPU decodes the next frames while the model works on the current one.
+
+    decode thread --[bounded queue]--> inference thread --[bounded queue]--> caller thread
+    cap.read()                          model(batch)                          plot / write / imshow
+
+With `batch_size > 1` the inference stage collects up to that many
+decoded frames and scores them with one YOLO call, amortizing the
+per-call pre/post-processing; results are fanned back out one per frame.
+For live sources `max_wait_ms` bounds how long the first frame of a batch
+waits for the rest: a partial batch is flushed at the deadline. (Files
+decode faster than inference, so batches there are always full.)
+
+Each stage has one thread and the queues are FIFO, so frames leave in the
+order they were decoded. The queues are bounded (`queue_size` frames):
+when inference falls behind, the decoder blocks instead of buffering the
+whole video in memory. The last stage runs in the calling thread because
+`cv2.imshow` must be driven from the thread that owns the window. If a
+stage fails, or the viewer presses "q", the other stages are stopped and
+the error is re-raised in the caller.
+
+`stream` is the constant-memory, headless API: a generator of compact
+`FrameDetections` records (class ids, confidences and boxes as small
+NumPy arrays, plus frame index and timestamp). Nothing else is kept, and
+frames are only annotated when an output file or a display window is
+requested, so hour-long videos run in bounded memory. `run` collects the
+full ultralytics results instead, for short clips.
+
+An optional `SceneChangeGate` (scene_change.py) decides in the decode
+thread which frames the detector sees; the others carry the previous
+detections forward (`FrameDetections.inferred` is False) and only
+keyframes count towards a batch.
+
+Usage:
+    from src.reel_traffic_detection.models.video_pipeline import VideoPipeline
+
+    pipeline = VideoPipeline(yolo_model, queue_size=8, batch_size=4, max_wait_ms=50)
+    for detections in pipeline.stream("data/MGR.mp4"):
+        print(detections.frame_index, detections.class_ids, detections.boxes)
+    results, counts = pipeline.run("data/MGR.mp4", output_path="output_detected.mp4")
+"""
+
+import queue
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+_END = object()
+_TIMEOUT = object()
+
+
+def _numpy(values, dtype) -> np.ndarray:
+    values = values.cpu().numpy() if hasattr(values, "cpu") else values    # torch tensors
+    return np.asarray(values, dtype=dtype)
+
+
+class FrameDetections(NamedTuple):
+    """Detections of one frame, without the frame itself (a few hundred bytes)."""
+
+    frame_index: int
+    timestamp_ms: float
+    class_ids: np.ndarray         # (n,) int16
+    confidences: np.ndarray       # (n,) float32
+    boxes: np.ndarray             # (n, 4) float32, x1 y1 x2 y2 in pixels
+    inferred: bool = True         # False: carried forward from the last detector call
+
+    @classmethod
+    def from_results(cls, frame_index: int, timestamp_ms: float, preds,
+                     inferred: bool = True) -> "FrameDetections":
+        boxes = preds.boxes
+        return cls(frame_index, float(timestamp_ms), _numpy(boxes.cls, np.int16),
+                   _numpy(boxes.conf, np.float32),
+                   _numpy(boxes.xyxy, np.float32).reshape(-1, 4), inferred)
+
+
+class _Stopped(Exception):
+    """Raised inside a stage thread once the pipeline is shutting down."""
+
+
+class VideoPipeline:
+    def __init__(self, model, queue_size: int = 8, batch_size: int = 1,
+                 max_wait_ms: float = None, gate=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            model: An ultralytics YOLO model (callable on a BGR frame or a
+                list of frames).
+            queue_size: Frames buffered between consecutive stages.
+            batch_size: Frames scored per model call.
+            max_wait_ms: Longest the first frame of a batch waits for the
+                batch to fill (None: wait until full or end of video).
+            gate: Optional `SceneChangeGate`; frames it rejects reuse the
+                previous detections instead of calling the model. It is
+                reset at the start of every video, so its first frame is
+                always a keyframe and `stats()` covers the latest video.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.model = model
+        self.gate = gate
+        self.queue_size = max(queue_size, batch_size)
+        self.batch_size = batch_size
+        self.max_wait = None if max_wait_ms is None else max_wait_ms / 1e3
+
+    def _put(self, q: queue.Queue, item, stop: threading.Event):
+        # Poll so a blocked producer notices when the consumer has gone away
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise _Stopped
+
+    def _get(self, q: queue.Queue, stop: threading.Event, deadline: float = None):
+        while not stop.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return _TIMEOUT
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                continue
+        raise _Stopped
+
+    def _batches(self, decoded: queue.Queue, stop: threading.Event):
+        """
+        Yield lists of decoded (frame, timestamp, run) items holding up to
+        `batch_size` frames to run the model on, until the end of the video.
+        """
+        while (item := self._get(decoded, stop)) is not _END:
+            batch = [item]
+            if not item[2]:
+                yield batch                  # carried forward; no model call to wait for
+                continue
+            deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+            keyframes = 1
+            while keyframes < self.batch_size:
+                item = self._get(decoded, stop, deadline)
+                if item is _TIMEOUT:
+                    break
+                if item is _END:
+                    yield batch
+                    return
+                batch.append(item)
+                keyframes += item[2]
+            yield batch
+
+    def _stage(self, work, errors: list, stop: threading.Event):
+        def run():
+            try:
+                work()
+            except _Stopped:
+                pass
+            except BaseException as exc:             # surfaced in the calling thread
+                errors.append(exc)
+                stop.set()
+        return threading.Thread(target=run, daemon=True)
+
+    def _inferred(self, video_path: str):
+        """
+        Run the decode and inference stages; yield (frame_index,
+        timestamp_ms, results, frame) in frame order. `frame` is None when
+        the results belong to this frame, or the frame itself when the gate
+        skipped it and `results` were carried forward. Closing the
+        generator stops both stages.
+        """
+        import cv2
+
+        if self.gate is not None:
+            self.gate.reset()               # no keyframe (and no detections) carried across videos
+        cap = cv2.VideoCapture(video_path)
+        decoded = queue.Queue(maxsize=self.queue_size)
+        inferred = queue.Queue(maxsize=self.queue_size)
+        stop, errors = threading.Event(), []
+
+        def decode():
+            while cap.isOpened():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                run = self.gate is None or self.gate.should_infer(frame)
+                self._put(decoded, (frame, cap.get(cv2.CAP_PROP_POS_MSEC), run), stop)
+            self._put(decoded, _END, stop)
+
+        def infer():
+            last = None
+            for batch in self._batches(decoded, stop):
+                frames = [frame for frame, _, run in batch if run]
+                # One call per batch; results come back in frame order
+                preds = iter(self.model(frames if len(frames) > 1 else frames[0], verbose=False)
+                             if frames else ())
+                for frame, timestamp, run in batch:
+                    if run:
+                        last = next(preds)
+                        self._put(inferred, (timestamp, last, None), stop)
+                    else:
+                        self._put(inferred, (timestamp, last, frame), stop)
+            self._put(inferred, _END, stop)
+
+        stages = [self._stage(decode, errors, stop), self._stage(infer, errors, stop)]
+        for stage in stages:
+            stage.start()
+        try:
+            index = 0
+            while (item := self._get(inferred, stop)) is not _END:
+                yield (index, *item)
+                index += 1
+        except _Stopped:
+            pass
+        finally:
+            stop.set()
+            for stage in stages:
+                stage.join()
+            cap.release()
+        if errors:
+            raise errors[0]
+
+    def _annotated(self, video_path: str, output_path: str = None, display: bool = False):
+        """`_inferred`, plus the opt-in annotate / encode / display stage."""
+        import cv2
+
+        out = None
+        if output_path:
+            cap = cv2.VideoCapture(video_path)
+            out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'),
+                                  cap.get(cv2.CAP_PROP_FPS), (int(cap.get(3)), int(cap.get(4))))
+            cap.release()
+        frames = self._inferred(video_path)
+        try:
+            for item in frames:
+                if out is not None or display:
+                    _, _, preds, carried = item
+                    # Carried-forward boxes are drawn on the skipped frame itself
+                    annotated = preds.plot() if carried is None else preds.plot(img=carried)
+                    if out is not None:
+                        out.write(annotated)
+                    if display:
+                        cv2.imshow("Traffic Detection", annotated)
+                        if cv2.waitKey(1) & 0xFF == ord('q'):
+                            break
+                yield item
+        finally:
+            frames.close()
+            if out:
+                out.release()
+            if display:
+                cv2.destroyAllWindows()
+
+    def stream(self, video_path: str, output_path: str = None, display: bool = False):
+        """
+        Detect objects frame by frame in constant memory.
+
+        Args:
+            video_path: Video file (or anything cv2.VideoCapture opens).
+            output_path: Optional path for the annotated .mp4 (frames are
+                only annotated when this or `display` is set).
+            display: Show annotated frames in a window ("q" stops).
+
+        Yields:
+            One `FrameDetections` per frame; the YOLO results and the frame
+            are dropped as soon as the record is built.
+        """
+        for index, timestamp, preds, carried in self._annotated(video_path, output_path, display):
+            yield FrameDetections.from_results(index, timestamp, preds, inferred=carried is None)
+
+    def run(self, video_path: str, output_path: str = None, display: bool = False,
+            keep_results: bool = True):
+        """
+        Detect objects in every frame of a video.
+
+        Args:
+            video_path: Video file (or anything cv2.VideoCapture opens).
+            output_path: Optional path for the annotated .mp4.
+            display: Show annotated frames in a window ("q" stops).
+            keep_results: Return the per-frame YOLO results. Each holds its
+                frame, so memory grows with the video; see `stream`.
+
+        Returns:
+            tuple(results, detection_counts): per-frame results (empty when
+            `keep_results` is False) and detections per class name.
+        """
+        from src.reel_traffic_detection.data.detection_log import DetectionLog
+
+        results, log = [], DetectionLog(self.model.names)
+        for index, timestamp, preds, _ in self._annotated(video_path, output_path, display):
+            if keep_results:
+                results.append(preds)
+            log.append(*FrameDetections.from_results(index, timestamp, preds)[:5])
+        return results, log.class_counts()
@@ -6,9 +6,11 @@ synthetic traffic generation, and timing.
 """
 
 import os
+import ipaddress
 import joblib
 import json
 import random
+import struct
 import time
 import numpy as np
 import pandas as pd
@@ -97,6 +99,75 @@ def generate_synthetic_traffic(n_samples=100, video_ratio=0.5):
     return pd.DataFrame(data)
 
 
+def generate_synthetic_pcap(path: str, n_packets=10000, n_flows=10,
+                            video_ratio=0.5, duration=30.0, seed=42):
+    """
+    Write a synthetic Ethernet/IPv4 pcap mixing reel-like and feed-like flows.
+
+    Reel flows pull large downstream segments in bursts every ~4 s (over TCP
+    or QUIC/UDP 443); feed flows exchange small, irregular packets.
+
+    Args:
+        path (str): output pcap path
+        n_packets (int): total number of packets
+        n_flows (int): number of concurrent client/server flows
+        video_ratio (float): proportion of reel/video flows
+        duration (float): capture length in seconds
+        seed (int): random seed
+
+    Returns:
+        Pandas DataFrame with one row per flow (endpoints + label)
+    """
+    rng = np.random.default_rng(seed)
+    is_video = rng.random(n_flows) < video_ratio
+    proto = np.where(is_video & (rng.random(n_flows) < 0.5), 17, 6)
+    client_ip = 0x0A000000 + 2 + np.arange(n_flows)          # 10.0.x.x
+    server_ip = 0x1F0D0000 + rng.integers(1, 255, n_flows)   # 31.13.0.x
+    client_port = 40000 + np.arange(n_flows) % 20000
+    server_port = np.where(is_video | (rng.random(n_flows) < 0.8), 443, 80)
+
+    flow = rng.integers(0, n_flows, n_packets)
+    video = is_video[flow]
+    # Reels: 1 s download burst at the start of every 4 s segment
+    t = np.where(video,
+                 np.floor(rng.random(n_packets) * duration / 4) * 4 + rng.random(n_packets),
+                 rng.random(n_packets) * duration)
+    down = rng.random(n_packets) < np.where(video, 0.9, 0.5)
+    payload = np.where(video & down, rng.integers(1200, 1461, n_packets),
+                       np.where(video, rng.integers(0, 40, n_packets),
+                                rng.integers(20, 600, n_packets)))
+
+    order = np.argsort(t, kind="stable")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        eth = b"\x02\x00\x00\x00\x00\x01\x02\x00\x00\x00\x00\x02\x08\x00"
+        for i in order:
+            fl = flow[i]
+            src, dst = (server_ip[fl], client_ip[fl]) if down[i] else (client_ip[fl], server_ip[fl])
+            sport, dport = ((server_port[fl], client_port[fl]) if down[i]
+                            else (client_port[fl], server_port[fl]))
+            if proto[fl] == 6:
+                l4 = struct.pack("!HHIIBBHHH", sport, dport, 0, 0, 0x50, 0x18, 65535, 0, 0)
+            else:
+                l4 = struct.pack("!HHHH", sport, dport, 8 + payload[i], 0)
+            total = 20 + len(l4) + payload[i]
+            ip = struct.pack("!BBHHHBBHII", 0x45, 0, total, 0, 0, 64, proto[fl], 0, src, dst)
+            frame = eth + ip + l4 + bytes(int(payload[i]))
+            sec = int(t[i])
+            f.write(struct.pack("<IIII", sec, int((t[i] - sec) * 1e6), len(frame), len(frame)))
+            f.write(frame)
+
+    return pd.DataFrame({
+        "client_ip": [str(ipaddress.IPv4Address(int(a))) for a in client_ip],
+        "server_ip": [str(ipaddress.IPv4Address(int(a))) for a in server_ip],
+        "client_port": client_port,
+        "server_port": server_port,
+        "proto": proto,
+        "traffic_type": is_video.astype(int),
+    })
+
+
 def measure_latency(func, *args, **kwargs):
     """
     Measure execution time of a function.
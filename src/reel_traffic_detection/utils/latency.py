@@ -0,0 +1,204 @@
+"""
+Latency Histograms
+------------------
+Fixed-memory latency recording for long-running processes. A
+`LatencyHistogram` counts nanosecond durations in HDR-style log-linear
+buckets: every power-of-two range is split into 2^(significant_bits - 1)
+linear sub-buckets, so any quantile is reported within about
+2^-(significant_bits - 1) relative error (1.6% by default) and memory stays
+a few thousand counters however many samples are recorded. Min, max,
+count and mean are tracked exactly.
+
+`LatencyStats` keeps one histogram per named stage (e.g. alignment,
+scaling, model, total) and exports everything through `snapshot()`.
+Recording is sharded: every thread writes to its own set of histograms
+under its own lock, which only `snapshot()` and `reset()` ever contend
+for, and `snapshot()` merges the shards. Passing `reset=True` starts a
+new window, so a reporter can poll interval statistics without unbounded
+state: every shard is merged and cleared under its lock in one step, so
+each sample is counted in exactly one window.
+
+Usage:
+    from src.reel_traffic_detection.utils.latency import LatencyStats
+
+    stats = LatencyStats(("model", "total"))
+    t0 = time.perf_counter_ns()
+    ...
+    stats.record(model=t1 - t0, total=time.perf_counter_ns() - t0)
+    stats.snapshot()["total"]["p99_ms"]
+"""
+
+import threading
+from itertools import accumulate
+
+NS_PER_MS = 1e6
+
+
+class LatencyHistogram:
+    def __init__(self, significant_bits: int = 7, highest_ns: int = 60 * 10**9):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            significant_bits: Bits of precision kept per value; relative
+                bucket width is 2^-(significant_bits - 1).
+            highest_ns: Largest distinguishable duration; longer ones land
+                in the last bucket (`max` stays exact).
+        """
+        self.bits = significant_bits
+        self.sub_count = 1 << significant_bits
+        self.half = self.sub_count >> 1
+        self.highest_ns = highest_ns
+        self.counts = [0] * (self._index(highest_ns) + 1)
+        self.reset()
+
+    def reset(self):
+        self.counts[:] = [0] * len(self.counts)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def _index(self, ns: int) -> int:
+        if ns < self.sub_count:
+            return ns
+        shift = ns.bit_length() - self.bits
+        return shift * self.half + (ns >> shift)
+
+    def _bounds(self, index: int) -> tuple:
+        """[low, high) nanoseconds covered by a bucket."""
+        if index < self.sub_count:
+            return index, index + 1
+        shift = index // self.half - 1
+        sub = index - shift * self.half
+        return sub << shift, (sub + 1) << shift
+
+    def record(self, ns: int):
+        ns = max(int(ns), 0)
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.counts[min(self._index(ns), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram with the same layout into this one."""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Histograms with different layouts cannot be merged")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        if other.min_ns is not None:
+            self.min_ns = other.min_ns if self.min_ns is None else min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def quantiles(self, qs) -> list:
+        """Nanosecond values at quantiles `qs` (0..1, ascending), bucket midpoints."""
+        count = self.count
+        if not count:
+            return [0.0] * len(qs)
+        cumulative = list(accumulate(self.counts))
+        out, index = [], 0
+        for q in qs:
+            rank = max(1, -(-q * count // 1))             # ceil, at least one sample
+            while cumulative[index] < rank:
+                index += 1
+            low, high = self._bounds(index)
+            if index == len(self.counts) - 1:
+                value = self.max_ns                  # overflow bucket: no upper bound
+            else:
+                value = (low + high - 1) / 2 if high - low > 1 else low
+            out.append(min(max(value, self.min_ns), self.max_ns))
+        return out
+
+    def snapshot(self) -> dict:
+        p50, p95, p99 = self.quantiles((0.50, 0.95, 0.99))
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / NS_PER_MS if self.count else 0.0,
+            "min_ms": (self.min_ns or 0) / NS_PER_MS,
+            "p50_ms": p50 / NS_PER_MS,
+            "p95_ms": p95 / NS_PER_MS,
+            "p99_ms": p99 / NS_PER_MS,
+            "max_ms": self.max_ns / NS_PER_MS,
+        }
+
+
+class LatencyStats:
+    def __init__(self, stages, significant_bits: int = 7):
+        """
+        One `LatencyHistogram` per named stage, sharded per thread.
+
+        Args:
+            stages: Stage names, e.g. ("align", "scale", "model", "total").
+            significant_bits: Precision of every histogram.
+        """
+        self.stages = tuple(stages)
+        self.bits = significant_bits
+        self._shards = []                      # (thread, lock, histograms) per recording thread
+        self._retired = (threading.Lock(), self._new_shard())   # threads that have exited
+        self._local = threading.local()
+        self._lock = threading.Lock()          # guards the shard list
+
+    def _new_shard(self) -> dict:
+        return {stage: LatencyHistogram(self.bits) for stage in self.stages}
+
+    def _shard(self) -> tuple:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = (threading.Lock(), self._new_shard())
+            with self._lock:
+                # Fold exited threads in, so thread churn keeps memory bounded
+                for entry in [entry for entry in self._shards if not entry[0].is_alive()]:
+                    for stage, histogram in entry[2].items():
+                        self._retired[1][stage].merge(histogram)
+                    self._shards.remove(entry)
+                self._shards.append((threading.current_thread(), *shard))
+            self._local.shard = shard
+        return shard
+
+    def _all_shards(self) -> list:
+        """(lock, histograms) of every shard; call with `_lock` held."""
+        return [self._retired] + [(lock, shard) for _, lock, shard in self._shards]
+
+    def record(self, **durations_ns):
+        """Record one duration (nanoseconds) for each given stage."""
+        lock, shard = self._shard()
+        with lock:                             # uncontended unless a snapshot is running
+            for stage, ns in durations_ns.items():
+                shard[stage].record(ns)
+
+    def mean_ms(self, stage: str) -> float:
+        count = total = 0
+        with self._lock:
+            for lock, shard in self._all_shards():
+                with lock:
+                    count += shard[stage].count
+                    total += shard[stage].total_ns
+        return total / count / NS_PER_MS if count else 0.0
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """
+        Per-stage count, mean, min, p50/p95/p99 and max in milliseconds,
+        merged over all threads. With `reset=True` every shard is cleared
+        in the same step it is merged, so consecutive snapshots cover
+        consecutive windows and no sample is lost between them.
+        """
+        merged = self._new_shard()
+        with self._lock:
+            for lock, shard in self._all_shards():
+                with lock:
+                    for stage, histogram in shard.items():
+                        merged[stage].merge(histogram)
+                        if reset:
+                            histogram.reset()
+        return {stage: h.snapshot() for stage, h in merged.items()}
+
+    def reset(self):
+        with self._lock:
+            for lock, shard in self._all_shards():
+                with lock:
+                    for histogram in shard.values():
+                        histogram.reset()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from reel_traffic_detection.data.cadence import CadenceTracker, score_from_bins
+
+pytestmark = pytest.mark.unit
+
+
+def _segment_series(n_hops, period_hops=16, burst_hops=4, seed=0):
+    """Downstream bytes per hop for a player fetching a segment every period."""
+    rng = np.random.default_rng(seed)
+    on = (np.arange(n_hops) % period_hops) < burst_hops
+    return np.where(on, 150_000.0, 500.0) + rng.uniform(0, 200, n_hops)
+
+
+def _feed(tracker, values, flow=0):
+    return np.array([tracker.update(flow, b, v) for b, v in enumerate(values)])
+
+
+def test_periodic_scores_above_noise():
+    tracker = CadenceTracker(history=16.0, hop=0.25)
+    periodic = _feed(tracker, _segment_series(200))[-1]
+    noise = _feed(tracker, np.random.default_rng(1).exponential(40_000, 200), flow=1)[-1]
+    assert 0.0 <= noise < 0.3 < periodic <= 1.0
+
+
+def test_matches_fft_of_history():
+    tracker = CadenceTracker(history=16.0, hop=0.25)
+    values = np.random.default_rng(2).exponential(1000, 150)
+    scores = _feed(tracker, values)
+
+    n = tracker.n
+    history = values[-n:]
+    spectrum = np.fft.fft(history)
+    expected = score_from_bins(spectrum[tracker.bins], history.sum(), history @ history, n)
+    assert scores[-1] == pytest.approx(float(expected), rel=1e-9)
+    assert np.all((tracker.frequencies >= 0.2) & (tracker.frequencies <= 0.6))
+
+
+def test_batch_matches_incremental_with_gaps():
+    rng = np.random.default_rng(3)
+    flows, buckets, values = [], [], []
+    for flow in (4, 9):
+        b = np.sort(rng.choice(400, 180, replace=False))
+        flows += [flow] * len(b)
+        buckets += b.tolist()
+        values += rng.exponential(1000, len(b)).tolist()
+    flows, buckets, values = map(np.asarray, (flows, buckets, values))
+
+    tracker = CadenceTracker(history=12.0, hop=0.25)
+    live = np.array([tracker.update(f, b, v) for f, b, v in zip(flows, buckets, values)])
+    batch = tracker.batch_scores(flows, buckets, values, flows, buckets)
+    np.testing.assert_allclose(batch, live, atol=1e-9)
+
+
+def test_rejects_history_off_hop_grid():
+    with pytest.raises(ValueError):
+        CadenceTracker(history=10.1, hop=0.25)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import (ExtraTreesClassifier, GradientBoostingClassifier,
+                              RandomForestClassifier)
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from reel_traffic_detection.models.compiled_forest import compile_model
+from reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(800, 5))
+    binary = (X[:, 0] + X[:, 1] ** 2 + rng.normal(scale=0.5, size=len(X)) > 1).astype(int)
+    three = np.digitize(X[:, 0] + rng.normal(scale=0.3, size=len(X)), [-0.5, 0.5])
+    test = rng.normal(size=(1500, 5))
+    return X, binary, three, test
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestClassifier(n_estimators=30, random_state=0),
+    ExtraTreesClassifier(n_estimators=20, max_depth=6, random_state=0),
+])
+@pytest.mark.parametrize("target", ["binary", "three"])
+def test_forest_matches_sklearn_exactly(data, model, target):
+    X, binary, three, test = data
+    model.fit(X, binary if target == "binary" else three)
+    test = test.copy()
+    test[::9, 2] = np.nan          # missing values follow missing_go_to_left
+    compiled = compile_model(model)
+    np.testing.assert_array_equal(compiled.predict_proba(test), model.predict_proba(test))
+    np.testing.assert_array_equal(compiled.predict(test), model.predict(test))
+
+
+@pytest.mark.parametrize("init", [None, "zero"])
+@pytest.mark.parametrize("target", ["binary", "three"])
+def test_gradient_boosting_matches_sklearn_exactly(data, target, init):
+    X, binary, three, test = data
+    model = GradientBoostingClassifier(n_estimators=40, init=init, random_state=0)
+    model.fit(X, binary if target == "binary" else three)
+    compiled = compile_model(model)
+    compiled.chunk_size = 256
+    np.testing.assert_array_equal(compiled.decision_function(test).squeeze(),
+                                  model.decision_function(test))
+    np.testing.assert_array_equal(compiled.predict_proba(test), model.predict_proba(test))
+
+
+def test_rejects_unsupported_models(data):
+    X, binary, _, test = data
+    with pytest.raises(ValueError):
+        compile_model(LogisticRegression().fit(X, binary))
+    with pytest.raises(ValueError):
+        compile_model(GradientBoostingClassifier(loss="exponential", n_estimators=3).fit(X, binary))
+    compiled = compile_model(RandomForestClassifier(n_estimators=3).fit(X, binary))
+    with pytest.raises(ValueError):
+        compiled.predict_proba(test[:, :3])
+
+
+def test_realtime_inference_compiled_backend(data, mocker):
+    X, binary, _, test = data
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(scaler.transform(X), binary)
+    reference = RealTimeInferenceML.__new__(RealTimeInferenceML)
+    reference.model, reference.preprocessor = model, scaler
+
+    mocker.patch("joblib.load", side_effect=[model, scaler])
+    rti = RealTimeInferenceML("model.pkl", "scaler.pkl", backend="compiled")
+    assert rti.backend == "compiled" and rti.model is not model
+
+    labels, confs = rti.predict_batch(test)
+    expected = reference.predict_batch(test)
+    np.testing.assert_array_equal(labels, expected[0])
+    np.testing.assert_array_equal(confs, expected[1])
+    assert rti.predict_sample(test[0]) == (labels[0], confs[0])
+
+    with pytest.raises(ValueError):
+        RealTimeInferenceML("model.pkl", backend="tensorrt")
@@ -0,0 +1,19 @@
+import pytest
+from scapy.all import rdpcap, wrpcapng
+from reel_traffic_detection.app import demo_service
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+def test_pcapng_exits_with_one_line_message(tmp_path, mocker):
+    pcap, pcapng = tmp_path / "capture.pcap", tmp_path / "capture.pcapng"
+    generate_synthetic_pcap(str(pcap), n_packets=50, n_flows=2, duration=1)
+    wrpcapng(str(pcapng), rdpcap(str(pcap)))
+    mocker.patch.object(demo_service, "RealTimeInferenceML")
+
+    with pytest.raises(SystemExit) as exit_info:
+        demo_service.main(["--pcap", str(pcapng)])
+    message = str(exit_info.value.code)
+    assert "\n" not in message
+    assert "pcapng is not supported" in message and "editcap -F pcap" in message
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from reel_traffic_detection.data.detection_log import DetectionLog
+
+pytestmark = pytest.mark.unit
+
+NAMES = {0: "car", 1: "bus", 2: "truck"}
+
+
+def _frames(n_frames=100, fps=25.0, seed=0):
+    """FrameDetections-like tuples; every 7th frame is empty."""
+    rng = np.random.default_rng(seed)
+    for i in range(n_frames):
+        n = 0 if i % 7 == 0 else int(rng.integers(1, 5))
+        yield (i, i * 1000 / fps, rng.integers(0, 2, n).astype(np.int16),
+               rng.random(n).astype(np.float32), rng.random((n, 4)).astype(np.float32) * 100)
+
+
+def _python_counts(records, min_confidence=0.0):
+    counts = {}
+    for _, _, class_ids, confidences, _ in records:
+        for cls_id, conf in zip(class_ids, confidences):
+            if conf >= min_confidence:
+                name = NAMES[int(cls_id)]
+                counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def test_columns_match_appended_records():
+    records = list(_frames())
+    log = DetectionLog.from_stream(records, NAMES)
+    assert log.n_frames == 100
+    assert len(log) == sum(len(r[2]) for r in records)
+    np.testing.assert_array_equal(log.column("class_id"), np.concatenate([r[2] for r in records]))
+    np.testing.assert_array_equal(log.boxes(), np.concatenate([r[4] for r in records]))
+    frame = log.to_frame()
+    assert set(frame["class_name"]) == {"car", "bus"}
+    assert (frame["frame_index"] % 7 != 0).all()
+
+
+def test_vectorized_counts_match_python_loop():
+    records = list(_frames(seed=1))
+    log = DetectionLog.from_stream(records, NAMES)
+    assert log.class_counts() == _python_counts(records)
+    assert log.class_counts(min_confidence=0.5) == _python_counts(records, 0.5)
+    assert DetectionLog(NAMES).class_counts() == {}
+
+
+def test_timeline_and_rates():
+    log = DetectionLog(NAMES)
+    log.append(0, 0.0, [0, 0, 1], [0.9, 0.8, 0.7], np.zeros((3, 4)))
+    log.append(1, 500.0, [], [], np.zeros((0, 4)))
+    log.append(2, 1000.0, [0], [0.9], np.zeros((1, 4)))
+    log.append(3, 2500.0, [1], [0.2], np.zeros((1, 4)))
+
+    timeline = log.timeline(bin_seconds=1.0)
+    assert list(timeline.index) == [0.0, 1.0, 2.0]
+    assert timeline["car"].tolist() == [2, 1, 0] and timeline["bus"].tolist() == [1, 0, 1]
+    assert log.timeline(1.0, min_confidence=0.5)["bus"].tolist() == [1, 0, 0]
+
+    rates = log.rates(bin_seconds=0.5)
+    assert rates["per_bin"]["car"].iloc[0] == 4.0
+    assert log.duration_s() == pytest.approx(3.0)
+    assert rates["mean"]["car"] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("suffix", [".npz", ".parquet"])
+def test_save_load_round_trip(tmp_path, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    log = DetectionLog.from_stream(_frames(), NAMES)
+    path = str(tmp_path / f"detections{suffix}")
+    log.save(path)
+    loaded = DetectionLog.load(path, names=NAMES)
+    pd.testing.assert_frame_equal(loaded.to_frame(), log.to_frame())
+    assert loaded.class_counts() == log.class_counts()
+    if suffix == ".npz":
+        assert loaded.n_frames == log.n_frames and loaded.names == NAMES
+    loaded.append(100, 4000.0, [2], [0.5], np.ones((1, 4)))      # still appendable
+    assert loaded.class_counts()["truck"] == 1
@@ -120,3 +120,63 @@ def test_feature_extractor_time_anomalies(mock_time_anomaly_rdpcap):
     # Packet count should match
     assert df["packet_count"].iloc[0] == 4
 
+
+
+# --- Streaming ingestion ---
+class FakePcapReader:
+    def __init__(self, packets):
+        self._packets = packets
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self._packets)
+
+    def close(self):
+        self.closed = True
+
+
+def _mixed_packets():
+    return [
+        FakePacket(size=100 + 37 * i, proto="TCP" if i % 3 else "UDP", time=0.5 * i)
+        for i in range(25)
+    ]
+
+
+def test_streaming_matches_batch(monkeypatch):
+    monkeypatch.setattr(
+        "reel_traffic_detection.data.feature_extractor.rdpcap",
+        lambda x: _mixed_packets()
+    )
+    monkeypatch.setattr(
+        "reel_traffic_detection.data.feature_extractor.PcapReader",
+        lambda x: FakePcapReader(_mixed_packets())
+    )
+    extractor = FeatureExtractor()
+    batch = extractor.extract_from_pcap("dummy.pcap")
+    stream = extractor.extract_from_pcap("dummy.pcap", streaming=True)
+
+    assert list(stream.columns) == list(batch.columns)
+    pd.testing.assert_frame_equal(stream, batch, check_dtype=False)
+    assert extractor.last_run_stats["packets"] == 25
+    assert extractor.last_run_stats["packets_per_sec"] > 0
+
+
+def test_extract_stream_emits_partial_rows(monkeypatch):
+    monkeypatch.setattr(
+        "reel_traffic_detection.data.feature_extractor.PcapReader",
+        lambda x: FakePcapReader(_mixed_packets())
+    )
+    extractor = FeatureExtractor(streaming=True, emit_every=10)
+    rows = list(extractor.extract_stream("dummy.pcap"))
+
+    assert [r["packet_count"].iloc[0] for r in rows] == [10, 20, 25]
+
+
+def test_streaming_empty_pcap(monkeypatch):
+    monkeypatch.setattr(
+        "reel_traffic_detection.data.feature_extractor.PcapReader",
+        lambda x: FakePcapReader([])
+    )
+    df = FeatureExtractor(streaming=True).extract_from_pcap("dummy.pcap")
+    assert isinstance(df, pd.DataFrame)
+    assert df.empty
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scapy.all import Ether, IP, TCP, UDP, Raw, wrpcap
+from reel_traffic_detection.data.feature_extractor import FeatureExtractor
+from reel_traffic_detection.data.flow_features import FlowIndex, extract_flow_features
+from reel_traffic_detection.data.pcap_parser import parse_pcap
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def two_flow_pcap(tmp_path):
+    # Interleaved reel download (client 10.0.0.1) and DNS lookups (10.0.0.2)
+    packets = []
+    for i in range(6):
+        packets.append(Ether() / IP(src="10.0.0.1", dst="31.13.0.5") / TCP(sport=40000, dport=443))
+        packets.append(Ether() / IP(src="31.13.0.5", dst="10.0.0.1") / TCP(sport=443, dport=40000) / Raw(b"v" * 1200))
+        packets.append(Ether() / IP(src="10.0.0.2", dst="8.8.8.8") / UDP(sport=5353, dport=53))
+    for i, pkt in enumerate(packets):
+        pkt.time = 100 + 0.1 * i
+    path = tmp_path / "two_flows.pcap"
+    wrpcap(str(path), packets)
+    return str(path)
+
+
+def test_bidirectional_flows(two_flow_pcap):
+    cols = parse_pcap(two_flow_pcap)
+    index = FlowIndex(cols)
+    assert index.n_flows == 2
+    flows = extract_flow_features(cols, index).set_index("sport")
+
+    reel = flows.loc[40000]
+    assert reel["src"] == "10.0.0.1" and reel["dst"] == "31.13.0.5"
+    assert reel["packet_count"] == 12
+    assert reel["tcp_fraction"] == 1.0
+    # The opening packet is upstream, so downstream packets are not forward
+    assert index.forward[index.flow_of == index.flow_of[0]].sum() == 6
+
+    dns = flows.loc[5353]
+    assert dns["packet_count"] == 6
+    assert dns["udp_fraction"] == 1.0
+
+
+def test_flow_summary_matches_single_flow_capture(two_flow_pcap, tmp_path):
+    from scapy.all import rdpcap
+    dns_only = tmp_path / "dns.pcap"
+    wrpcap(str(dns_only), [p for p in rdpcap(two_flow_pcap) if p.haslayer(UDP)])
+
+    flows = FeatureExtractor().extract_flows(two_flow_pcap)
+    dns_flow = flows[flows["proto"] == 17].reset_index(drop=True)
+    whole = FeatureExtractor().extract_from_pcap(str(dns_only))
+    pd.testing.assert_frame_equal(dns_flow[whole.columns], whole, check_dtype=False)
+
+
+def test_many_flows(tmp_path):
+    path = tmp_path / "many.pcap"
+    truth = generate_synthetic_pcap(str(path), n_packets=20000, n_flows=500)
+    cols = parse_pcap(str(path))
+    flows = extract_flow_features(cols)
+    assert len(flows) == len(truth)
+    assert set(flows["src"]) | set(flows["dst"]) >= set(truth["client_ip"])
+    assert flows["packet_count"].sum() == 20000
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scapy.all import Ether, IP, TCP, Raw, wrpcap
+from reel_traffic_detection.data.flow_features import extract_flow_features
+from reel_traffic_detection.data.flow_partials import FlowPartials
+from reel_traffic_detection.data.pcap_parser import iter_pcap_chunks, parse_pcap
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def capture(tmp_path_factory):
+    path = tmp_path_factory.mktemp("partials") / "capture.pcap"
+    generate_synthetic_pcap(str(path), n_packets=8000, n_flows=12, duration=20)
+    return str(path)
+
+
+def test_single_slice_matches_batch(capture):
+    cols = parse_pcap(capture)
+    pd.testing.assert_frame_equal(FlowPartials.from_columns(cols).to_frame(),
+                                  extract_flow_features(cols), check_dtype=False)
+
+
+@pytest.mark.parametrize("block_size", [16 << 10, 100_000])
+def test_merged_slices_match_batch(capture, block_size):
+    parts = [FlowPartials.from_columns(chunk)
+             for chunk in iter_pcap_chunks(capture, block_size=block_size)]
+    assert len(parts) > 3
+    merged = FlowPartials.merge(parts)
+    # Merging is associative: merge pairs first, then the pairs
+    nested = FlowPartials.merge([FlowPartials.merge(parts[i:i + 2])
+                                 for i in range(0, len(parts), 2)])
+    expected = extract_flow_features(parse_pcap(capture))
+    pd.testing.assert_frame_equal(merged.to_frame(), expected, check_dtype=False)
+    pd.testing.assert_frame_equal(nested.to_frame(), expected, check_dtype=False)
+
+
+def test_direction_decided_after_merge(tmp_path):
+    # The SYN/ACK sits in the second slice and must still flip the direction
+    packets = [
+        Ether() / IP(src="10.0.0.9", dst="10.0.0.1") / TCP(sport=8080, dport=80) / Raw(b"u" * 50),
+        Ether() / IP(src="10.0.0.1", dst="10.0.0.9") / TCP(sport=80, dport=8080) / Raw(b"d" * 900),
+        Ether() / IP(src="10.0.0.1", dst="10.0.0.9") / TCP(sport=80, dport=8080, flags="SA"),
+        Ether() / IP(src="10.0.0.1", dst="10.0.0.9") / TCP(sport=80, dport=8080) / Raw(b"d" * 900),
+    ]
+    for i, pkt in enumerate(packets):
+        pkt.time = 100 + 0.3 * i
+    path = tmp_path / "handshake.pcap"
+    wrpcap(str(path), packets)
+    cols = parse_pcap(str(path))
+
+    merged = FlowPartials.merge([FlowPartials.from_columns(cols.take(slice(0, 2))),
+                                 FlowPartials.from_columns(cols.take(slice(2, 4)))]).to_frame()
+    expected = extract_flow_features(cols)
+    pd.testing.assert_frame_equal(merged, expected, check_dtype=False)
+    assert merged.loc[0, "down_bytes"] == expected.loc[0, "down_bytes"]
+
+
+def test_kll_partials_stay_close(capture):
+    def merged(**kwargs):
+        return FlowPartials.merge([FlowPartials.from_columns(chunk, **kwargs)
+                                   for chunk in iter_pcap_chunks(capture, block_size=16 << 10)])
+
+    sketched, exact = merged(quantiles="kll", sketch_k=32), merged()
+    np.testing.assert_allclose(sketched.to_frame()["mean_iat_down"],
+                               exact.to_frame()["mean_iat_down"])
+    assert np.equal(exact.sketches, None).all()
+    large = ~np.equal(sketched.sketches, None)
+    assert large.any()
+    for flow, column in zip(*np.nonzero(large)):
+        kll = sketched.sketches[flow, column]
+        reference = exact.iat_values[column][exact.iat_flows[column] == flow]
+        assert kll.count == len(reference) > sketched.sketch_threshold
+        rank = (reference <= kll.quantile(0.95)).mean()
+        assert abs(rank - 0.95) < 2.5 / 32
+    # Flows under the threshold keep exact values
+    for column in range(2):
+        small = ~large[:, column]
+        np.testing.assert_array_equal(sketched.iat_percentile(column)[small],
+                                      exact.iat_percentile(column)[small])
+
+    unsketched = merged(quantiles="kll", sketch_threshold=10 ** 9)
+    assert np.equal(unsketched.sketches, None).all()
+    pd.testing.assert_frame_equal(unsketched.to_frame(), exact.to_frame())
@@ -38,3 +38,13 @@ def test_measure_latency():
     result, latency = helpers.measure_latency(dummy_fn, 5)
     assert result == 10
     assert latency >= 0
+
+# --- Synthetic pcap ---
+def test_generate_synthetic_pcap(tmp_path):
+    from reel_traffic_detection.data.pcap_parser import parse_pcap
+    path = tmp_path / "synthetic.pcap"
+    flows = helpers.generate_synthetic_pcap(str(path), n_packets=500, n_flows=4)
+    cols = parse_pcap(str(path))
+    assert len(cols) == 500
+    assert len(flows) == 4
+    assert (cols.timestamp[1:] >= cols.timestamp[:-1]).all()
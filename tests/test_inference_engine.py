@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from reel_traffic_detection.models.inference_engine import InferenceEngine
+from reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+pytestmark = pytest.mark.unit
+
+
+def _shared_inference(seed=0):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(500, 4)), columns=[f"f{i}" for i in range(4)])
+    y = (X["f0"] - X["f2"] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=10, n_jobs=-1, random_state=seed)
+    rti = RealTimeInferenceML.__new__(RealTimeInferenceML)
+    rti.model = model.fit(scaler.transform(X), y)
+    rti.preprocessor = scaler
+    rti._prepare_fast_path()
+    return rti, X.to_numpy()
+
+
+def test_concurrent_samples_match_sequential():
+    rti, X = _shared_inference()
+    expected = [rti.predict_sample(row) for row in X]
+    rti.latency.reset()
+
+    with InferenceEngine(rti, threads=8) as engine:
+        assert rti.model.n_jobs == 1
+        futures = [engine.submit(row) for row in X]
+        assert [f.result() for f in futures] == expected
+        assert list(engine.map(X)) == expected
+        stats = engine.stats()
+    assert stats["total"]["count"] == 2 * len(X)
+
+
+def test_predict_many_matches_predict_batch():
+    rti, X = _shared_inference()
+    labels, confidences = rti.predict_batch(X)
+    with InferenceEngine(rti, threads=4, chunk_size=37) as engine:
+        got = engine.predict_many(X)
+        empty = engine.predict_many(X[:0])
+    np.testing.assert_array_equal(got[0], labels)
+    np.testing.assert_allclose(got[1], confidences)
+    assert len(empty[0]) == len(empty[1]) == 0
+
+
+def test_shared_cache_under_threads():
+    rti, X = _shared_inference()
+    expected = [rti.predict_sample(row) for row in X[:50]]
+    cache = rti.enable_cache(max_entries=16)
+    with InferenceEngine(rti, threads=8) as engine:
+        results = list(engine.map(np.tile(X[:50], (10, 1))))
+    assert results == expected * 10
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 500 and len(cache) <= 16
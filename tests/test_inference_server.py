@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import numpy as np
+import pytest
+from reel_traffic_detection.app.inference_server import MicroBatcher, ServerOverloaded, serve
+
+pytestmark = pytest.mark.unit
+
+
+class SumModel:
+    """Stand-in for RealTimeInferenceML: video when the features sum > 0."""
+
+    feature_names = ["a", "b"]
+
+    def __init__(self, gate: threading.Event = None):
+        self.batch_sizes = []
+        self.gate = gate
+
+    def predict_batch(self, X):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batch_sizes.append(len(X))
+        labels = (X.sum(axis=1) > 0).astype(np.int64)
+        return labels, np.where(labels == 1, 0.9, 0.8)
+
+
+def test_concurrent_requests_share_batches():
+    model = SumModel()
+
+    async def scenario():
+        async with MicroBatcher(model, max_batch=16, max_wait_ms=20) as batcher:
+            inputs = [{"a": float(i - 20), "b": 0.5} for i in range(40)]
+            results = await asyncio.gather(*(batcher.predict(x) for x in inputs))
+            return results, batcher.stats, batcher.latency.snapshot()
+
+    results, stats, latency = asyncio.run(scenario())
+    assert [label for label, _ in results] == [int(i - 20 + 0.5 > 0) for i in range(40)]
+    assert max(model.batch_sizes) == 16 and sum(model.batch_sizes) == 40
+    assert stats["batches"] == len(model.batch_sizes) < 40
+    assert latency["request"]["count"] == 40 and latency["batch"]["count"] == stats["batches"]
+
+
+def test_malformed_request_fails_alone():
+    model = SumModel()
+
+    async def scenario():
+        async with MicroBatcher(model, max_batch=16, max_wait_ms=20) as batcher:
+            return await asyncio.gather(
+                batcher.predict([1.0, 1.0]), batcher.predict([1.0, 1.0, 1.0]),
+                batcher.predict({"a": 1.0, "b": float("nan")}), batcher.predict({"a": 1.0, "b": 2.0}),
+                return_exceptions=True)
+
+    valid, too_long, not_finite, named = asyncio.run(scenario())
+    assert valid == (1, 0.9) and named == (1, 0.9)
+    assert isinstance(too_long, ValueError) and isinstance(not_finite, ValueError)
+    assert model.batch_sizes == [2]
+
+
+def test_lone_request_flushes_at_deadline():
+    async def scenario():
+        async with MicroBatcher(SumModel(), max_batch=64, max_wait_ms=5) as batcher:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await batcher.predict([1.0, 1.0])
+            return result, loop.time() - start
+
+    (label, confidence), waited = asyncio.run(scenario())
+    assert (label, confidence) == (1, 0.9)
+    assert waited < 1.0
+
+
+def test_full_queue_sheds_load():
+    gate = threading.Event()
+    model = SumModel(gate)
+
+    async def scenario():
+        async with MicroBatcher(model, max_batch=1, max_wait_ms=0, max_queue=2) as batcher:
+            first = asyncio.create_task(batcher.predict([1.0, 0.0]))
+            await asyncio.sleep(0.05)               # taken by the (blocked) batch loop
+            queued = [asyncio.create_task(batcher.predict([1.0, 0.0])) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(ServerOverloaded):
+                await batcher.predict([1.0, 0.0])
+            gate.set()
+            await asyncio.gather(first, *queued)
+            return batcher.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["shed"] == 1 and stats["batched_requests"] == 3
+
+
+def test_tcp_round_trip():
+    async def scenario():
+        async with MicroBatcher(SumModel(), max_wait_ms=5) as batcher:
+            server = await serve(batcher, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            lines = [{"id": 1, "features": {"a": 2.0, "b": 1.0}},
+                     {"id": 2, "features": {"a": -2.0, "b": 1.0}},
+                     {"id": 3, "features": {"a": 1.0}}]
+            for line in lines:
+                writer.write(json.dumps(line).encode() + b"\n")
+            writer.write_eof()
+            replies = [json.loads(line) async for line in reader]
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return {reply["id"]: reply for reply in replies}
+
+    replies = asyncio.run(scenario())
+    assert replies[1]["label"] == "VIDEO" and replies[1]["latency_ms"] >= 0
+    assert replies[2]["prediction"] == 0
+    assert replies[3]["error"].startswith("bad request")
+
+
+def test_model_failure_gets_error_reply():
+    class BrokenModel(SumModel):
+        def predict_batch(self, X):
+            raise RuntimeError("model crashed")
+
+    async def scenario():
+        async with MicroBatcher(BrokenModel(), max_wait_ms=5) as batcher:
+            server = await serve(batcher, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(json.dumps({"id": 1, "features": [1.0, 1.0]}).encode() + b"\n")
+            writer.write_eof()
+            replies = [json.loads(line) async for line in reader]
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return replies
+
+    (reply,) = asyncio.run(scenario())
+    assert reply == {"id": 1, "error": "RuntimeError: model crashed"}
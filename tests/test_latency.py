@@ -0,0 +1,113 @@
+import threading
+import numpy as np
+import pytest
+from reel_traffic_detection.utils.latency import LatencyHistogram, LatencyStats
+
+pytestmark = pytest.mark.unit
+
+
+def test_quantiles_within_bucket_error():
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(mean=13, sigma=1.5, size=50_000).astype(np.int64)  # ~0.4 ms
+    histogram = LatencyHistogram()
+    for ns in samples.tolist():
+        histogram.record(ns)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == len(samples)
+    assert snapshot["max_ms"] == samples.max() / 1e6
+    assert snapshot["min_ms"] == samples.min() / 1e6
+    assert snapshot["mean_ms"] == pytest.approx(samples.mean() / 1e6)
+    for q in ("50", "95", "99"):
+        exact = np.percentile(samples, float(q), method="inverted_cdf") / 1e6
+        assert snapshot[f"p{q}_ms"] == pytest.approx(exact, rel=0.02)
+
+
+def test_memory_is_fixed_and_extremes_clamp():
+    histogram = LatencyHistogram(highest_ns=10**9)
+    buckets = len(histogram.counts)
+    for ns in (0, 1, 127, 128, 10**6, 5 * 10**9):
+        histogram.record(ns)
+    assert len(histogram.counts) == buckets < 2048
+    assert histogram.snapshot()["max_ms"] == 5000.0
+    assert histogram.quantiles([0.0, 1.0]) == [0, 5 * 10**9]
+
+
+def test_merge_matches_single_histogram():
+    values = list(range(1, 10_000, 7))
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, ns in enumerate(values):
+        whole.record(ns)
+        (left if i % 2 else right).record(ns)
+    left.merge(right)
+    assert left.snapshot() == whole.snapshot()
+
+
+def test_stats_snapshot_reset_windows_and_threads():
+    stats = LatencyStats(("model", "total"))
+
+    def work():
+        for _ in range(1000):
+            stats.record(model=1000, total=2000)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    first = stats.snapshot(reset=True)
+    assert first["total"]["count"] == 4000
+    assert first["model"]["p99_ms"] == pytest.approx(0.001, rel=0.02)
+    assert stats.snapshot()["total"]["count"] == 0
+
+
+def test_inference_records_per_stage_latency():
+    from reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+    import pandas as pd
+    from sklearn.dummy import DummyClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X = pd.DataFrame({"a": [0.0, 1.0, 2.0, 3.0], "b": [1.0, 0.0, 1.0, 0.0]})
+    rti = RealTimeInferenceML.__new__(RealTimeInferenceML)
+    rti.model = DummyClassifier(strategy="most_frequent").fit(X, [0, 1, 1, 1])
+    rti.preprocessor = StandardScaler().fit(X)
+    rti._prepare_fast_path()
+
+    rti.predict_batch(X)
+    rti.predict_sample({"a": 1.0, "b": 0.0})
+    snapshot = rti.latency_snapshot(reset=True)
+    assert set(snapshot) == {"align", "scale", "model", "total"}
+    assert snapshot["total"]["count"] == 2
+    assert snapshot["total"]["p99_ms"] >= snapshot["model"]["min_ms"]
+    assert rti.latency_snapshot()["total"]["count"] == 0
+
+
+def test_exited_threads_are_folded_not_lost():
+    stats = LatencyStats(("total",))
+    for _ in range(20):
+        t = threading.Thread(target=stats.record, kwargs={"total": 5000})
+        t.start()
+        t.join()
+    stats.record(total=5000)
+    assert len(stats._shards) <= 2
+    assert stats.snapshot()["total"]["count"] == 21
+
+
+def test_reset_windows_lose_no_samples():
+    stats = LatencyStats(("total",))
+
+    def recorder():
+        for _ in range(20000):
+            stats.record(total=5000)
+
+    threads = [threading.Thread(target=recorder) for _ in range(4)]
+    for t in threads:
+        t.start()
+    windows = []
+    while any(t.is_alive() for t in threads):
+        windows.append(stats.snapshot(reset=True)["total"]["count"])
+    for t in threads:
+        t.join()
+    windows.append(stats.snapshot(reset=True)["total"]["count"])
+    assert sum(windows) == 80000
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scapy.all import rdpcap, wrpcapng
+from reel_traffic_detection.data.feature_extractor import FeatureExtractor
+from reel_traffic_detection.data.mmap_reader import MappedCapture, probe_capture, read_capture
+from reel_traffic_detection.data.pcap_parser import PacketColumns, parse_pcap
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def captures(tmp_path_factory):
+    root = tmp_path_factory.mktemp("mmap")
+    pcap = root / "capture.pcap"
+    generate_synthetic_pcap(str(pcap), n_packets=2000, n_flows=6)
+    pcapng = root / "capture.pcapng"
+    wrpcapng(str(pcapng), rdpcap(str(pcap)))
+    return str(pcap), str(pcapng)
+
+
+def _assert_same_columns(actual, expected):
+    assert len(actual) == len(expected)
+    for name in PacketColumns.FIELDS:
+        if name == "timestamp":
+            np.testing.assert_allclose(actual.timestamp, expected.timestamp, atol=1e-6)
+        else:
+            np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+
+
+def test_pcap_and_pcapng_decode_like_fast_parser(captures):
+    pcap, pcapng = captures
+    expected = parse_pcap(pcap)
+    assert probe_capture(pcap) == "pcap" and probe_capture(pcapng) == "pcapng"
+    _assert_same_columns(read_capture(pcap), expected)
+    _assert_same_columns(read_capture(pcapng), expected)
+
+
+def test_records_and_packets_view_the_mapping(captures):
+    pcap, pcapng = captures
+    packets = rdpcap(pcap)
+    with MappedCapture(pcapng) as capture:
+        assert capture.records.dtype.names == ("offset", "timestamp", "caplen", "wirelen", "interface")
+        view = capture.packet(3)
+        assert isinstance(view, memoryview)
+        assert bytes(view) == bytes(packets[3])
+        view.release()
+        batches = list(capture.iter_columns(batch=700))
+    assert [len(b) for b in batches] == [700, 700, 600]
+
+
+def test_rejects_unknown_format(tmp_path):
+    path = tmp_path / "junk.bin"
+    path.write_bytes(b"not a capture at all")
+    with pytest.raises(ValueError):   # UnsupportedCaptureError
+        MappedCapture(str(path))
+
+
+def test_extractor_mmap_engine(captures):
+    pcap, pcapng = captures
+    expected = FeatureExtractor(engine="fast").extract_from_pcap(pcap)
+    for path in (pcap, pcapng):
+        features = FeatureExtractor(engine="mmap").extract_from_pcap(path)
+        pd.testing.assert_frame_equal(features, expected, check_dtype=False, atol=1e-5)
+    # pcapng is routed to the mmap engine automatically, in streaming mode too
+    streamed = FeatureExtractor(streaming=True).extract_from_pcap(pcapng)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False, atol=1e-5)
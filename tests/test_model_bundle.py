@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from reel_traffic_detection.data.preprocess import Preprocessor
+from reel_traffic_detection.models.bundle import FORMAT_VERSION, ModelBundle, save_bundle
+from reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+pytestmark = pytest.mark.unit
+
+FEATURES = ["avg_packet_size", "std_packet_size", "packet_count"]
+
+
+@pytest.fixture(scope="module")
+def trained():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(loc=[600, 150, 80], scale=[200, 50, 30], size=(500, 3)),
+                         columns=FEATURES)
+    frame["label"] = (frame["avg_packet_size"] > 650).astype(int)
+    preprocessor = Preprocessor().fit(frame, label_column="label")
+    X, y = preprocessor.transform(frame, label_column="label")
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    return frame, preprocessor, model
+
+
+def test_round_trip_with_mapped_compiled_trees(trained, tmp_path):
+    frame, preprocessor, model = trained
+    path = str(tmp_path / "model.rtdb")
+    header = save_bundle(path, model, preprocessor, metadata={"dataset": "synthetic"})
+    assert header["format_version"] == FORMAT_VERSION
+
+    with ModelBundle.load(path) as bundle:
+        assert bundle.feature_names == FEATURES
+        assert bundle.metadata == {"dataset": "synthetic"}
+        threshold = bundle.array("compiled.threshold")
+        assert not threshold.flags.writeable and not threshold.flags.owndata
+        compiled = bundle.compiled_model()
+        X, _ = preprocessor.transform(frame, label_column="label")
+        np.testing.assert_array_equal(compiled.predict_proba(X), model.predict_proba(X))
+        np.testing.assert_array_equal(bundle.model.predict(X), model.predict(X))
+        del threshold, compiled
+
+
+@pytest.mark.parametrize("backend", ["compiled", "sklearn"])
+def test_realtime_inference_from_bundle(trained, tmp_path, backend):
+    frame, preprocessor, model = trained
+    path = str(tmp_path / "model.rtdb")
+    save_bundle(path, model, preprocessor)
+
+    rti = RealTimeInferenceML.from_bundle(path, backend=backend)
+    assert rti.backend == backend
+    labels, confs = rti.predict_batch(frame)
+    X, _ = preprocessor.transform(frame, label_column="label")
+    np.testing.assert_array_equal(labels, model.predict_proba(X).argmax(axis=1))
+    assert rti.predict_sample(frame.iloc[0][FEATURES].to_dict()) == (labels[0], confs[0])
+
+
+def test_non_tree_models_fall_back_to_sklearn(trained, tmp_path):
+    frame, preprocessor, _ = trained
+    X, y = preprocessor.transform(frame, label_column="label")
+    path = str(tmp_path / "linear.rtdb")
+    save_bundle(path, LogisticRegression().fit(X, y), preprocessor)
+    rti = RealTimeInferenceML.from_bundle(path)
+    assert rti.backend == "sklearn"
+    assert len(rti.predict_batch(frame)[0]) == len(frame)
+
+
+def test_rejects_corrupt_and_foreign_files(trained, tmp_path):
+    _, preprocessor, model = trained
+    path = tmp_path / "model.rtdb"
+    save_bundle(str(path), model, preprocessor)
+    data = bytearray(path.read_bytes())
+    data[-100] ^= 0xFF                      # inside the preprocessor pickle
+    corrupt = tmp_path / "corrupt.rtdb"
+    corrupt.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="checksum"):    # BundleError
+        ModelBundle.load(str(corrupt))
+    ModelBundle.load(str(corrupt), verify=False).close()   # explicit opt-out
+
+    foreign = tmp_path / "model.pkl"
+    foreign.write_bytes(b"\x80\x04not a bundle")
+    with pytest.raises(ValueError):
+        ModelBundle.load(str(foreign))
+
+
+def test_bundle_scores_window_features_with_extra_columns(tmp_path):
+    from reel_traffic_detection.data.pcap_parser import parse_pcap
+    from reel_traffic_detection.data.window_features import SlidingWindowExtractor
+    from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+    capture = str(tmp_path / "capture.pcap")
+    generate_synthetic_pcap(capture, n_packets=3000, n_flows=6, duration=10)
+    windows = SlidingWindowExtractor().transform(parse_pcap(capture))
+    # Trained on a subset of the window columns, in a different order
+    features = ["packet_count", "avg_packet_size", "duration"]
+    train = windows[features].assign(label=(windows["avg_packet_size"] > 500).astype(int))
+    preprocessor = Preprocessor().fit(train, label_column="label")
+    X, y = preprocessor.transform(train, label_column="label")
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    path = str(tmp_path / "model.rtdb")
+    save_bundle(path, model, preprocessor)
+
+    rti = RealTimeInferenceML.from_bundle(path)
+    assert rti.feature_names == features
+    labels, _ = rti.predict_batch(windows)
+    np.testing.assert_array_equal(labels, model.predict_proba(X).argmax(axis=1))
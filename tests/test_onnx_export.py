@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+pytest.importorskip("skl2onnx")
+pytest.importorskip("onnxruntime")
+
+from reel_traffic_detection.data.preprocess import Preprocessor
+from reel_traffic_detection.models.onnx_export import (OnnxClassifier, compare_backends,
+                                                       export_onnx, sklearn_pipeline)
+from reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+pytestmark = pytest.mark.unit
+
+FEATURES = ["avg_packet_size", "std_packet_size", "avg_inter_arrival", "packet_count"]
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(loc=[600, 150, 0.02, 80], scale=[200, 50, 0.01, 30],
+                                size=(600, 4)), columns=FEATURES)
+    X["label"] = ((X["avg_packet_size"] > 600) & (X["packet_count"] > 70)).astype(int)
+    return X
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    lambda: GradientBoostingClassifier(n_estimators=30, random_state=0),
+])
+def test_fused_graph_matches_sklearn_pipeline(frame, tmp_path, make_model):
+    preprocessor = Preprocessor().fit(frame, label_column="label")
+    X, y = preprocessor.transform(frame, label_column="label")
+    model = make_model().fit(X, y)
+
+    path = export_onnx(model, preprocessor, str(tmp_path / "model.onnx"))
+    runtime = OnnxClassifier(path)
+    assert list(runtime.feature_names_in_) == FEATURES
+    np.testing.assert_array_equal(runtime.classes_, [0, 1])
+
+    raw = frame[FEATURES].to_numpy()
+    report = compare_backends(sklearn_pipeline(model, preprocessor), runtime, raw, repeat=5)
+    assert report["label_agreement"] >= 0.99
+    assert report["max_abs_proba_diff"] < 1e-4
+    assert report["onnxruntime"]["single_row_median_us"] > 0
+
+
+def test_realtime_inference_onnx_backend(frame, tmp_path):
+    preprocessor = Preprocessor().fit(frame, label_column="label")
+    X, y = preprocessor.transform(frame, label_column="label")
+    model = RandomForestClassifier(n_estimators=15, max_depth=5, random_state=0).fit(X, y)
+    path = export_onnx(model, preprocessor, str(tmp_path / "model.onnx"))
+
+    rti = RealTimeInferenceML(path, backend="onnx", intra_op_threads=2)
+    # Columns are aligned by name; the label column is dropped
+    labels, confs = rti.predict_batch(frame[FEATURES[::-1] + ["label"]])
+    expected = model.predict_proba(X)
+    assert np.mean(labels == expected.argmax(axis=1)) >= 0.99
+    np.testing.assert_allclose(confs, expected.max(axis=1), atol=1e-4)
+
+    assert rti.predict(frame.iloc[[3]]) == (labels[3], pytest.approx(confs[3]))
+    sample = frame.iloc[3][FEATURES].to_dict()
+    assert rti.predict_sample(sample)[0] == labels[3]
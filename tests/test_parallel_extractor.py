@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from reel_traffic_detection.data.flow_features import extract_flow_features
+from reel_traffic_detection.data.parallel_extractor import ParallelExtractor
+from reel_traffic_detection.data.pcap_parser import parse_pcap
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def captures(tmp_path_factory):
+    root = tmp_path_factory.mktemp("parallel")
+    paths = []
+    for seed in range(3):
+        path = root / f"capture{seed}.pcap"
+        generate_synthetic_pcap(str(path), n_packets=3000, n_flows=6, seed=seed)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sharded_run_matches_single_process(captures, tmp_path, workers):
+    driver = ParallelExtractor(workers=workers, chunk_bytes=256 << 10, quantiles="exact")
+    assert len(driver.plan(captures)) > len(captures)
+
+    output = tmp_path / "flows.csv"
+    flows = driver.run(captures, str(output))
+
+    expected = pd.concat([extract_flow_features(parse_pcap(p)).assign(source=p)
+                          for p in captures], ignore_index=True)
+    expected = expected[["source"] + [c for c in expected.columns if c != "source"]]
+    pd.testing.assert_frame_equal(flows, expected, check_dtype=False)
+    assert len(pd.read_csv(output)) == len(flows)
+
+    stats = driver.last_run_stats
+    assert stats["files"] == 3 and stats["packets"] == 9000
+    assert sum(w["packets"] for w in stats["workers"].values()) == 9000
+    assert all(w["packets_per_sec"] > 0 for w in stats["workers"].values())
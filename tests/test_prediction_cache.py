@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from reel_traffic_detection.models.prediction_cache import PredictionCache
+
+pytestmark = pytest.mark.unit
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        p = 1 / (1 + np.exp(-X.sum(axis=1)))
+        return np.column_stack([1 - p, p])
+
+
+def test_near_identical_vectors_hit():
+    model, cache = CountingModel(), PredictionCache(max_entries=8, step=0.01)
+    X = np.array([[0.5, -1.0], [0.5001, -1.0002], [2.0, 2.0]])
+    labels, confs = cache.predict(X, model.predict_proba)
+    assert model.rows == 2                     # rows 0 and 1 share one key
+    assert labels[0] == labels[1] and confs[0] == confs[1]
+    again, again_confs = cache.predict(X, model.predict_proba)
+    assert model.rows == 2
+    np.testing.assert_array_equal(again, labels)
+    np.testing.assert_array_equal(again_confs, confs)
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 3)
+
+
+def test_results_match_uncached_model():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    model, cache = CountingModel(), PredictionCache(max_entries=1000, step=1e-9)
+    labels, confs = cache.predict(X, model.predict_proba)
+    probs = CountingModel().predict_proba(X)
+    np.testing.assert_array_equal(labels, probs.argmax(axis=1))
+    np.testing.assert_allclose(confs, probs.max(axis=1))
+
+
+def test_lru_eviction_and_counters():
+    model, cache = CountingModel(), PredictionCache(max_entries=2, step=1.0)
+    for value in (0.0, 5.0, 0.0, 9.0):         # 0.0 is refreshed, so 5.0 is evicted
+        cache.predict(np.array([[value]]), model.predict_proba)
+    assert len(cache) == 2
+    cache.predict(np.array([[0.0]]), model.predict_proba)
+    cache.predict(np.array([[5.0]]), model.predict_proba)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 4, 2)
+    assert stats["hit_rate"] == pytest.approx(2 / 6)
+
+
+def test_negative_zero_shares_key():
+    cache = PredictionCache(step=0.1)
+    assert cache.keys(np.array([[-0.01, 1.0]])) == cache.keys(np.array([[0.0, 1.0]]))
+
+
+def test_inference_uses_cache():
+    from sklearn.dummy import DummyClassifier
+    from sklearn.preprocessing import StandardScaler
+    import pandas as pd
+    from reel_traffic_detection.models.realtime_inference import RealTimeInferenceML
+
+    X = pd.DataFrame({"a": [0.0, 1.0, 2.0, 3.0], "b": [1.0, 0.0, 1.0, 0.0]})
+    rti = RealTimeInferenceML.__new__(RealTimeInferenceML)
+    rti.model = DummyClassifier(strategy="prior").fit(X, [0, 1, 1, 1])
+    rti.preprocessor = StandardScaler().fit(X)
+    rti._prepare_fast_path()
+    expected = rti.predict_batch(X)
+
+    cache = rti.enable_cache(max_entries=16)
+    np.testing.assert_array_equal(rti.predict_batch(X)[0], expected[0])
+    assert rti.predict_sample({"a": 1.0, "b": 0.0}) == (int(expected[0][1]), expected[1][1])
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 4
+    assert rti.enable_cache(0) is None and rti.cache is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from reel_traffic_detection.data.quantile_sketch import (
+    ExactQuantiles,
+    KLLSketch,
+    make_quantile_sketch,
+)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(0).exponential(0.02, 200_000)
+
+
+def test_small_sketch_is_exact():
+    x = np.random.default_rng(1).normal(size=150)
+    sketch = KLLSketch(k=200)
+    sketch.update_many(x)
+    assert sketch.quantile(0.95) == pytest.approx(np.percentile(x, 95))
+
+
+@pytest.mark.parametrize("q", [0.5, 0.95, 0.99])
+def test_rank_error_within_bound(values, q):
+    sketch = KLLSketch(k=200, seed=7)
+    for chunk in np.array_split(values, 500):
+        sketch.update_many(chunk)
+    true_rank = (values <= sketch.quantile(q)).mean()
+    assert abs(true_rank - q) < 1.7 / 200
+    assert sketch.size < 4 * 200
+    assert sketch.count == len(values)
+
+
+def test_merge_of_shards(values):
+    shards = []
+    for i, part in enumerate(np.array_split(values, 8)):
+        shard = KLLSketch(k=200, seed=i)
+        for v in part[:2000]:
+            shard.update(v)
+        shard.update_many(part[2000:])
+        shards.append(shard)
+    merged = KLLSketch.merged(shards)
+    assert merged.count == len(values)
+    assert abs((values <= merged.quantile(0.95)).mean() - 0.95) < 1.7 / 200
+    assert merged.rank(merged.quantile(0.5)) == pytest.approx(0.5, abs=0.01)
+
+
+def test_exact_backend_matches_numpy(values):
+    a, b = ExactQuantiles(), ExactQuantiles()
+    a.update_many(values[:1000])
+    b.update_many(np.append(values[1000:2000], np.nan))
+    merged = ExactQuantiles.merged([a, b])
+    assert merged.count == 2000
+    assert merged.quantile(0.95) == np.percentile(values[:2000], 95)
+    assert np.isnan(ExactQuantiles().quantile(0.5))
+
+
+def test_factory_rejects_unknown_backend():
+    assert isinstance(make_quantile_sketch("kll", k=64), KLLSketch)
+    with pytest.raises(ValueError):
+        make_quantile_sketch("tdigest")
@@ -52,3 +52,129 @@ def test_run_inference(mocker):
     assert isinstance(label, int)
     assert isinstance(conf, float)
 
+
+
+def _fitted_inference(n_features=4, seed=0):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(400, n_features)),
+                     columns=[f"f{i}" for i in range(n_features)])
+    y = (X["f0"] + X["f1"] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=10, random_state=seed).fit(scaler.transform(X), y)
+
+    rti = RealTimeInferenceML.__new__(RealTimeInferenceML)
+    rti.model = model
+    rti.preprocessor = scaler
+    rti._prepare_fast_path()
+    return rti, X.assign(label=y)
+
+
+def test_predict_batch_matches_per_row_predict():
+    import numpy as np
+
+    rti, frame = _fitted_inference()
+    labels, confs = rti.predict_batch(frame)
+    assert labels.shape == confs.shape == (len(frame),)
+    assert labels.dtype == np.int64
+
+    for i in range(0, len(frame), 37):
+        label, conf = rti.predict(frame.iloc[[i]])
+        assert label == labels[i]
+        assert conf == pytest.approx(confs[i])
+
+    # Chunking, column order and ndarray input do not change the result
+    chunked = rti.predict_batch(frame[frame.columns[::-1]], chunk_size=64)
+    from_array = rti.predict_batch(frame.drop(columns="label").to_numpy())
+    for other in (chunked, from_array):
+        np.testing.assert_array_equal(other[0], labels)
+        np.testing.assert_allclose(other[1], confs)
+
+
+def test_predict_batch_empty_input():
+    rti, frame = _fitted_inference()
+    labels, confs = rti.predict_batch(frame.iloc[:0], chunk_size=10)
+    assert len(labels) == len(confs) == 0
+
+
+def test_predict_sample_matches_dataframe_path():
+    import numpy as np
+
+    rti, frame = _fitted_inference()
+    assert rti.feature_names == ["f0", "f1", "f2", "f3"]
+    features = frame.drop(columns="label")
+    buffer = np.empty(features.shape[1], dtype=np.float32)
+    for i in range(0, len(frame), 23):
+        expected = rti.predict(frame.iloc[[i]])
+        buffer[:] = features.iloc[i].to_numpy()
+        by_vector = rti.predict_sample(features.iloc[i].to_numpy())
+        by_dict = rti.predict_sample(features.iloc[i].to_dict())
+        assert by_vector == by_dict == expected
+        assert rti.predict_sample(buffer)[0] == expected[0]
+
+
+def test_predict_sample_needs_fitted_scaler(mocker):
+    from sklearn.preprocessing import StandardScaler
+
+    mocker.patch("joblib.load", side_effect=[mocker.Mock(), StandardScaler()])
+    rti = RealTimeInferenceML("dummy_model.pkl", "dummy_scaler.pkl")
+    with pytest.raises(RuntimeError):
+        rti.predict_sample({"f0": 1.0})
+
+
+def test_predict_sample_dict_needs_feature_names():
+    import numpy as np
+    from sklearn.dummy import DummyClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X = np.array([[0.0, 1.0], [2.0, 3.0], [4.0, 1.0]])
+    rti = RealTimeInferenceML.__new__(RealTimeInferenceML)
+    rti.model = DummyClassifier(strategy="most_frequent").fit(X, [1, 1, 0])
+    rti.preprocessor = StandardScaler().fit(X)       # fitted on an array: no names
+    rti._prepare_fast_path()
+    assert rti.feature_names is None
+    assert rti.predict_sample(X[0])[0] == 1
+    with pytest.raises(ValueError, match="feature names"):
+        rti.predict_sample({"a": 0.0, "b": 1.0})
+
+
+def test_latency_stats_exist_before_concurrent_calls(mocker):
+    import threading
+    import numpy as np
+    from sklearn.dummy import DummyClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X = pd.DataFrame({"a": [0.0, 1.0, 2.0], "b": [1.0, 0.0, 1.0]})
+    model = DummyClassifier(strategy="most_frequent").fit(X.to_numpy(), [1, 1, 0])
+    mocker.patch("joblib.load", side_effect=[model, StandardScaler().fit(X)])
+    rti = RealTimeInferenceML("dummy_model.pkl", "dummy_scaler.pkl")
+    stats = vars(rti)["latency"]                # created eagerly, not on first use
+
+    def score():
+        for _ in range(50):
+            rti.predict_sample(np.array([1.0, 0.0]))
+
+    threads = [threading.Thread(target=score) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert rti.latency is stats and rti.latency_snapshot()["total"]["count"] == 400
+
+
+def test_ml_path_does_not_import_video_stack():
+    import json
+    import os
+    import subprocess
+    import sys
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import json, sys\n"
+            "import src.reel_traffic_detection.models.realtime_inference\n"
+            "print(json.dumps([m for m in ('torch', 'ultralytics', 'cv2') if m in sys.modules]))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                         capture_output=True, text=True, env={**os.environ, "PYTHONPATH": root})
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from reel_traffic_detection.models.scene_change import SceneChangeGate
+
+pytestmark = pytest.mark.unit
+pytest.importorskip("cv2")
+
+
+def _frame(value, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = np.full((360, 640, 3), value, dtype=np.float64) + rng.normal(0, noise, (360, 640, 3))
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def test_static_scene_runs_every_max_stride():
+    gate = SceneChangeGate(threshold=0.05, max_stride=5)
+    decisions = [gate.should_infer(_frame(100, noise=2, seed=i)) for i in range(20)]
+    assert decisions == [i % 5 == 0 for i in range(20)]
+    assert gate.stats() == {"frames": 20, "inferred": 4, "skipped": 16, "skip_rate": 0.8}
+
+
+def test_scene_change_triggers_detector():
+    gate = SceneChangeGate(threshold=0.05, max_stride=100)
+    assert gate.should_infer(_frame(100))
+    assert not gate.should_infer(_frame(101))
+    assert gate.score(_frame(101)) < 0.05
+    assert gate.score(_frame(180)) > 0.3
+    assert gate.should_infer(_frame(180))
+    assert not gate.should_infer(_frame(180))
+
+    # A cut that keeps the mean but moves the histogram is caught too
+    half = _frame(100)
+    half[:, ::2] = 60
+    half[:, 1::2] = 140
+    assert gate.score(half) >= 0.05
+
+
+def test_max_stride_one_disables_skipping_and_validation():
+    gate = SceneChangeGate(max_stride=1)
+    assert all(gate.should_infer(_frame(100)) for _ in range(5))
+    gate.reset()
+    assert gate.stats()["frames"] == 0
+    with pytest.raises(ValueError):
+        SceneChangeGate(max_stride=0)
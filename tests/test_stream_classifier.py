@@ -0,0 +1,82 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from reel_traffic_detection.app.stream_classifier import StreamClassifier
+from reel_traffic_detection.data.flow_features import FlowIndex
+from reel_traffic_detection.data.pcap_parser import parse_pcap
+from reel_traffic_detection.data.window_features import SlidingWindowExtractor
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+class ThresholdModel:
+    """Stand-in for RealTimeInferenceML: video when downstream heavy."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_batch(self, features: pd.DataFrame):
+        self.calls += 1
+        labels = (features["d_u_byte_ratio"].to_numpy() > 3).astype(np.int64)
+        return labels, np.full(len(features), 0.9)
+
+
+@pytest.fixture(scope="module")
+def capture(tmp_path_factory):
+    path = tmp_path_factory.mktemp("stream") / "capture.pcap"
+    flows = generate_synthetic_pcap(str(path), n_packets=3000, n_flows=5, duration=8)
+    return str(path), flows
+
+
+def _pipe_in(path, piece=4096):
+    """Feed a recorded capture through an OS pipe in small writes."""
+    read_fd, write_fd = os.pipe()
+
+    def writer():
+        with open(path, "rb") as src, os.fdopen(write_fd, "wb", buffering=0) as dst:
+            try:
+                while data := src.read(piece):
+                    dst.write(data)
+            except BrokenPipeError:
+                pass   # reader stopped early
+
+    threading.Thread(target=writer, daemon=True).start()
+    return os.fdopen(read_fd, "rb")
+
+
+def test_one_label_per_flow_per_hop(capture):
+    path, flows = capture
+    classifier = StreamClassifier(ThresholdModel(), block_size=8192)
+    with _pipe_in(path) as stream:
+        labels = pd.DataFrame(list(classifier.run(stream)))
+
+    cols = parse_pcap(path)
+    windows = SlidingWindowExtractor().transform(cols, FlowIndex(cols).flow_of)
+    assert len(labels) == len(windows)
+    assert not labels.duplicated(["flow", "window_end"]).any()
+    assert classifier.last_run_stats["packets"] == len(cols)
+
+    assert (labels["latency_ms"] >= 0).all()
+    assert (labels["emitted_at"] >= labels["received_at"]).all()
+    # Clients are the synthetic ephemeral-port side, servers the 443/80 side
+    assert set(labels["client_port"]) <= set(flows["client_port"])
+    assert set(labels["server_port"]) <= {80, 443}
+
+    # Video flows are labelled VIDEO more often than the others
+    is_video = dict(zip(flows["client_ip"], flows["traffic_type"] == 1))
+    share = labels.groupby(labels["client"].map(is_video))["prediction"].mean()
+    assert share[True] > share[False]
+
+
+def test_labels_arrive_before_stream_ends(capture):
+    path, _ = capture
+    classifier = StreamClassifier(ThresholdModel(), block_size=4096)
+    stream = _pipe_in(path, piece=2048)
+    labels = classifier.run(stream)
+    first = next(labels)
+    assert first["label"] in ("VIDEO", "NON-VIDEO")
+    assert not stream.closed
+    stream.close()
@@ -0,0 +1,182 @@
+import threading
+import time
+import numpy as np
+import pytest
+from reel_traffic_detection.models.video_pipeline import VideoPipeline
+
+pytestmark = pytest.mark.unit
+cv2 = pytest.importorskip("cv2")
+
+
+class _Boxes:
+    def __init__(self, cls):
+        self.cls = np.asarray(cls, dtype=np.float32)
+        self.conf = np.full(len(cls), 0.5, dtype=np.float32)
+        self.xyxy = np.tile(np.array([1.0, 2.0, 30.0, 40.0], dtype=np.float32), (len(cls), 1))
+
+
+class _Preds:
+    def __init__(self, frame, cls):
+        self.frame = frame
+        self.boxes = _Boxes(cls)
+
+    def plot(self, img=None):
+        self.plotted = True
+        return self.frame if img is None else img
+
+
+class FakeYOLO:
+    """Tags every result with the frame brightness, i.e. its index."""
+
+    names = {0: "car", 1: "bus"}
+
+    def __init__(self, delay=0.0, fail_at=None):
+        self.delay = delay
+        self.fail_at = fail_at
+        self.calls = 0
+        self.batch_sizes = []
+
+    def __call__(self, source, verbose=False):
+        frames = source if isinstance(source, list) else [source]
+        if self.calls == self.fail_at:
+            raise RuntimeError("model failed")
+        self.calls += len(frames)
+        self.batch_sizes.append(len(frames))
+        time.sleep(self.delay)
+        return [_Preds(f, [0] * (1 + int(f.mean() // 20) % 2) + [1]) for f in frames]
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for i in range(30):
+        writer.write(np.full((48, 64, 3), i * 8, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_frames_leave_in_order_with_counts(clip, tmp_path):
+    output = str(tmp_path / "out.mp4")
+    results, counts = VideoPipeline(FakeYOLO(), queue_size=2).run(clip, output_path=output)
+    brightness = [preds.frame.mean() for preds in results]
+    assert len(results) == 30 and brightness == sorted(brightness)
+    assert counts["bus"] == 30
+    assert counts["car"] == sum(1 + int(b // 20) % 2 for b in brightness)
+    reader = cv2.VideoCapture(output)
+    assert int(reader.get(cv2.CAP_PROP_FRAME_COUNT)) == 30
+
+
+def test_decoder_is_bounded_by_queue(clip, monkeypatch):
+    decoded = []
+    original = cv2.VideoCapture.read
+
+    def counting_read(cap):
+        decoded.append(time.perf_counter())
+        return original(cap)
+
+    monkeypatch.setattr(cv2.VideoCapture, "read", counting_read)
+    ahead = []
+
+    class Watching(FakeYOLO):
+        def __call__(self, source, verbose=False):
+            ahead.append(len(decoded) - self.calls)       # frames read ahead of inference
+            return super().__call__(source, verbose)
+
+    VideoPipeline(Watching(delay=0.02), queue_size=3).run(clip, keep_results=False)
+    assert max(ahead) <= 3 + 2          # the queue plus one frame in each thread's hands
+
+
+def test_stage_error_is_raised_and_threads_stop(clip):
+    before = threading.active_count()
+    with pytest.raises(RuntimeError, match="model failed"):
+        VideoPipeline(FakeYOLO(fail_at=5), queue_size=2).run(clip)
+    assert threading.active_count() == before
+
+
+@pytest.mark.parametrize("batch_size", [4, 7])
+def test_batches_fan_out_in_order(clip, batch_size):
+    model = FakeYOLO()
+    results, counts = VideoPipeline(model, batch_size=batch_size).run(clip)
+    brightness = [preds.frame.mean() for preds in results]
+    assert len(results) == 30 and brightness == sorted(brightness)
+    assert model.batch_sizes == [batch_size] * (30 // batch_size) + [30 % batch_size] * (30 % batch_size > 0)
+    assert counts["bus"] == 30
+
+
+def test_partial_batch_flushed_at_deadline(clip, monkeypatch):
+    original = cv2.VideoCapture.read
+
+    def live_read(cap):
+        time.sleep(0.03)                       # a 33 fps camera
+        return original(cap)
+
+    monkeypatch.setattr(cv2.VideoCapture, "read", live_read)
+    model = FakeYOLO()
+    results, _ = VideoPipeline(model, batch_size=8, max_wait_ms=40).run(clip)
+    assert len(results) == 30
+    assert max(model.batch_sizes) <= 3         # never waits for a full batch of 8
+
+
+def test_stream_yields_compact_records_headless(clip):
+    plotted = []
+
+    class Tracking(FakeYOLO):
+        def __call__(self, source, verbose=False):
+            preds = super().__call__(source, verbose)
+            plotted.extend(preds)
+            return preds
+
+    records = list(VideoPipeline(Tracking(), batch_size=4).stream(clip))
+    assert [r.frame_index for r in records] == list(range(30))
+    assert all(b >= a for a, b in zip([r.timestamp_ms for r in records],
+                                      [r.timestamp_ms for r in records][1:]))
+    first = records[0]
+    assert first.class_ids.dtype == np.int16 and first.class_ids.tolist() == [0, 1]
+    assert first.confidences.dtype == np.float32 and first.boxes.shape == (2, 4)
+    assert not any(hasattr(p, "plotted") for p in plotted)      # annotation is opt-in
+    assert sum(r.class_ids.nbytes + r.confidences.nbytes + r.boxes.nbytes for r in records) < 2000
+
+
+def test_stream_closed_early_stops_stages(clip):
+    before = threading.active_count()
+    stream = VideoPipeline(FakeYOLO(delay=0.01), queue_size=2).stream(clip)
+    assert next(stream).frame_index == 0
+    stream.close()
+    assert threading.active_count() == before
+
+
+def test_gate_skips_frames_and_carries_detections(tmp_path):
+    from reel_traffic_detection.models.scene_change import SceneChangeGate
+
+    # 10 frames of one scene, then 10 of another
+    path = str(tmp_path / "cut.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), 40 if i < 10 else 200, dtype=np.uint8))
+    writer.release()
+
+    model = FakeYOLO()
+    gate = SceneChangeGate(threshold=0.1, max_stride=4)
+    output = str(tmp_path / "out.mp4")
+    records = list(VideoPipeline(model, batch_size=2, gate=gate).stream(path, output_path=output))
+    assert [r.frame_index for r in records] == list(range(20))
+    inferred = [i for i, r in enumerate(records) if r.inferred]
+    assert inferred == [0, 4, 8, 10, 14, 18]
+    assert model.calls == len(inferred) and gate.stats()["skipped"] == 14
+    # Skipped frames repeat the detections of their keyframe
+    for r in records:
+        key = records[max(i for i in inferred if i <= r.frame_index)]
+        np.testing.assert_array_equal(r.class_ids, key.class_ids)
+    assert int(cv2.VideoCapture(output).get(cv2.CAP_PROP_FRAME_COUNT)) == 20
+
+
+def test_gate_is_reset_between_videos(clip):
+    from reel_traffic_detection.models.scene_change import SceneChangeGate
+
+    pipeline = VideoPipeline(FakeYOLO(), gate=SceneChangeGate(threshold=0.1, max_stride=100))
+    first = list(pipeline.stream(clip))
+    second = list(pipeline.stream(clip))
+    assert second[0].inferred
+    assert [r.inferred for r in second] == [r.inferred for r in first]
+    assert pipeline.gate.stats()["frames"] == 30
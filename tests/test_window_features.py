@@ -0,0 +1,83 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from reel_traffic_detection.data.flow_features import FlowIndex, summarize_groups
+from reel_traffic_detection.data.pcap_parser import parse_pcap
+from reel_traffic_detection.data.window_features import SlidingWindowExtractor
+from reel_traffic_detection.utils.helpers import generate_synthetic_pcap
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def capture(tmp_path_factory):
+    path = tmp_path_factory.mktemp("windows") / "capture.pcap"
+    generate_synthetic_pcap(str(path), n_packets=5000, n_flows=8, duration=10)
+    return parse_pcap(str(path))
+
+
+def _push_in_chunks(engine, cols, group=None, chunk=333):
+    parts = []
+    for i in range(0, len(cols), chunk):
+        part = slice(i, i + chunk)
+        parts.append(engine.push(cols.take(part), None if group is None else group[part]))
+    parts.append(engine.flush())
+    return pd.concat(parts, ignore_index=True)
+
+
+def test_window_matches_recomputation(capture):
+    windows = SlidingWindowExtractor(window=1.0, hop=0.25).transform(capture)
+    row = windows.iloc[len(windows) // 2]
+    assert row["window_end"] - row["window_start"] == pytest.approx(1.0)
+
+    idx = np.flatnonzero((capture.timestamp >= row["window_start"])
+                         & (capture.timestamp < row["window_end"]))
+    expected = summarize_groups(capture.length[idx], capture.timestamp[idx],
+                                capture.proto[idx], np.array([0]))
+    for name, value in expected.items():
+        assert row[name] == pytest.approx(value[0]), name
+
+
+@pytest.mark.parametrize("per_flow", [False, True])
+def test_incremental_matches_batch(capture, per_flow):
+    group = FlowIndex(capture).flow_of if per_flow else None
+    batch = SlidingWindowExtractor().transform(capture, group)
+    live = _push_in_chunks(SlidingWindowExtractor(), capture, group)
+
+    batch = batch.sort_values(["window_end", "flow"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(live, batch, check_dtype=False)
+
+
+def test_rejects_uneven_hop():
+    with pytest.raises(ValueError):
+        SlidingWindowExtractor(window=1.0, hop=0.3)
+
+
+def test_per_window_budget(capture):
+    start = time.perf_counter()
+    n = len(_push_in_chunks(SlidingWindowExtractor(), capture, FlowIndex(capture).flow_of))
+    per_window_ms = (time.perf_counter() - start) / n * 1e3
+    assert per_window_ms < 5.0
+
+
+def test_extractor_windows(tmp_path):
+    from reel_traffic_detection.data.feature_extractor import FeatureExtractor
+    path = tmp_path / "capture.pcap"
+    generate_synthetic_pcap(str(path), n_packets=1000, n_flows=3, duration=5)
+    windows = FeatureExtractor().extract_windows(str(path), per_flow=True)
+    assert set(windows["flow"]) == {0, 1, 2}
+    assert windows["packet_count"].groupby(windows["window_end"]).sum().max() <= 1000
+
+
+def test_sketch_quantiles_track_exact(capture):
+    group = FlowIndex(capture).flow_of
+    exact = _push_in_chunks(SlidingWindowExtractor(), capture, group)
+    sketched = _push_in_chunks(SlidingWindowExtractor(quantiles="kll", sketch_k=16),
+                               capture, group)
+    pd.testing.assert_frame_equal(sketched.drop(columns="p95_iat_down"),
+                                  exact.drop(columns="p95_iat_down"))
+    both = exact["p95_iat_down"].notna()
+    assert sketched["p95_iat_down"][both].notna().all()
+    error = (sketched["p95_iat_down"] - exact["p95_iat_down"]).abs()[both]
+    assert error.median() <= exact["p95_iat_down"][both].median() * 0.25
@@ -13,6 +13,7 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score
 
 from src.reel_traffic_detection.data.preprocess import Preprocessor
+from src.reel_traffic_detection.models.bundle import save_bundle
 
 
 def main(args):
@@ -48,7 +49,11 @@ def main(args):
     # Save artifacts
     joblib.dump(model, "models/trained_model.pkl")
     joblib.dump(pre, "models/preprocessor.pkl")
-    print("\n💾 Model + Preprocessor saved in models/")
+    save_bundle("models/model.rtdb", model, pre, metadata={
+        "dataset": args.data,
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+    })
+    print("\n💾 Model + Preprocessor saved in models/ (bundle: models/model.rtdb)")
 
 
 if __name__ == "__main__":